@@ -0,0 +1,81 @@
+"""Time a page of gigs through GigSerializer and through the values-row path
+
+Builds the same page both ways from a musician's gigs, checks the output is
+identical, and reports the time per page for reading + serializing and for
+rendering with JSONRenderer and FastJSONRenderer (orjson, when installed).
+
+Needs a migrated database with some data:
+
+    python benchmarks/list_serialization.py --musician 1 --page-size 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gig_tax_server.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from gigtaxapi.models import Gig  # noqa: E402
+from gigtaxapi.renderers import FastJSONRenderer, orjson  # noqa: E402
+from gigtaxapi.views.gig import GigSerializer, GigView  # noqa: E402
+
+
+def timed(function, repeat):
+    """Returns: tuple -- (median seconds per call, last result)"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--musician', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--fields', default='', help='a ?fields= list, e.g. id,date,gig_pay')
+    args = parser.parse_args()
+
+    query = {'fields': args.fields} if args.fields else {}
+    request = Request(RequestFactory().get('/gigs', query))
+    gigs = Gig.objects.filter(musician_id=args.musician).order_by(*GigView.ordering)
+
+    def with_serializer():
+        page = GigSerializer.sparse_queryset(gigs, request, required=GigView.ordering)
+        return GigSerializer(page[:args.page_size], many=True, context={'request': request}).data
+
+    def with_values():
+        rows = GigSerializer.values_queryset(gigs, request, required=GigView.ordering)
+        return GigSerializer.values_data(rows[:args.page_size], request)
+
+    serializer_time, expected = timed(with_serializer, args.repeat)
+    values_time, data = timed(with_values, args.repeat)
+    if JSONRenderer().render(data) != JSONRenderer().render(expected):
+        sys.exit('The values-row output differs from the serializer output')
+
+    renderer_time, _ = timed(lambda: JSONRenderer().render(data), args.repeat)
+    fast_renderer_time, _ = timed(lambda: FastJSONRenderer().render(data), args.repeat)
+
+    print(f'{len(data)} gigs per page, median of {args.repeat} runs')
+    print(f'  ModelSerializer      {serializer_time * 1000:8.2f} ms')
+    print(f'  values rows          {values_time * 1000:8.2f} ms')
+    print(f'  JSONRenderer         {renderer_time * 1000:8.2f} ms')
+    print(f'  FastJSONRenderer     {fast_renderer_time * 1000:8.2f} ms'
+          + ('' if orjson else '  (orjson not installed)'))
+
+
+if __name__ == '__main__':
+    main()
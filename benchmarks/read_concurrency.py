@@ -0,0 +1,131 @@
+"""Compare sync WSGI and ASGI workers serving the read endpoints
+
+Starts the server under each profile in turn with the same number of
+gunicorn workers, then has many concurrent clients GET an endpoint. Each
+client can trickle its request out slowly (--send-delay) the way a phone on
+a bad connection does; a sync worker is tied up for the whole request while
+an ASGI worker keeps serving others in the meantime.
+
+Needs gunicorn and uvicorn installed, a migrated database with some data,
+and a musician's auth token:
+
+    python benchmarks/read_concurrency.py --token <key> --workers 2 --clients 100
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    'wsgi': ['gig_tax_server.wsgi:application'],
+    'asgi': ['gig_tax_server.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def start_server(profile, port, workers):
+    command = [sys.executable, '-m', 'gunicorn', *PROFILES[profile],
+               '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning']
+    env = dict(os.environ)
+    env.pop('GIGTAX_ASYNC_READS', None)
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+
+async def wait_until_listening(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+async def fetch(port, path, token, send_delay):
+    """Send one GET, optionally in two halves, and time it to the last byte"""
+    started = time.monotonic()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = (f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+               f'Authorization: Token {token}\r\nConnection: close\r\n\r\n').encode()
+    half = len(request) // 2
+    writer.write(request[:half])
+    await writer.drain()
+    if send_delay:
+        await asyncio.sleep(send_delay)
+    writer.write(request[half:])
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b' ', 2)[1]) if response else 0
+    return status, time.monotonic() - started
+
+
+async def run_clients(port, path, token, clients, requests, send_delay):
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for _ in range(requests):
+            try:
+                status, elapsed = await fetch(port, path, token, send_delay)
+            except OSError:
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, errors, time.monotonic() - started
+
+
+def report(profile, latencies, errors, elapsed):
+    if not latencies:
+        print(f'{profile}: no successful requests ({errors} errors)')
+        return
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'{profile}: {len(latencies) / elapsed:8.1f} req/s  '
+          f'median {statistics.median(latencies) * 1000:7.1f} ms  '
+          f'p95 {p95 * 1000:7.1f} ms  errors {errors}')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--token', required=True, help="a musician's auth token")
+    parser.add_argument('--path', default='/gigs')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=5, help='requests per client')
+    parser.add_argument('--send-delay', type=float, default=0.2,
+                        help='seconds between the halves of each request')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        server = start_server(profile, args.port, args.workers)
+        try:
+            await wait_until_listening(args.port)
+            # One warm-up request per worker so startup is not measured
+            await run_clients(args.port, args.path, args.token, args.workers, 1, 0)
+            report(profile, *await run_clients(
+                args.port, args.path, args.token, args.clients, args.requests, args.send_delay))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
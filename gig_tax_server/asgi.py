@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gig_tax_server.settings')
+# Serve the read endpoints with the async views (see gig_tax_server/urls_async.py)
+os.environ.setdefault('GIGTAX_ASYNC_READS', '1')
 
 application = get_asgi_application()
@@ -16,17 +16,23 @@ Including another URLconf
 from django.contrib import admin
 from django.conf.urls import include
 from django.urls import path
-from rest_framework import routers
+from gigtaxapi.routers import BulkRouter
 from gigtaxapi.models.musician import Musician
-from gigtaxapi.views import register_user, login_user, GigView, ReceiptView, TourView, MusicianView, CategoryView
+from gigtaxapi.views import register_user, login_user, GigView, ReceiptView, TourView, MusicianView, CategoryView, SummaryView, ExportView, SearchView, TimelineView, ConflictView, EstimateView
 
 # route the URL to the proper viewset and add a new URL mapping to the default router
-router = routers.DefaultRouter(trailing_slash=False)
+router = BulkRouter(trailing_slash=False)
 router.register(r'gigs', GigView, 'gig')
 router.register(r'receipts', ReceiptView, 'receipt')
 router.register(r'tours', TourView, 'tour')
 router.register(r'musicians', MusicianView, 'musician')
 router.register(r'categories', CategoryView, 'category')
+router.register(r'summary', SummaryView, 'summary')
+router.register(r'export', ExportView, 'export')
+router.register(r'search', SearchView, 'search')
+router.register(r'timeline', TimelineView, 'timeline')
+router.register(r'conflicts', ConflictView, 'conflict')
+router.register(r'estimates', EstimateView, 'estimate')
 
 urlpatterns = [
     path('register', register_user),
@@ -0,0 +1,9 @@
+"""URL configuration for the ASGI deployment
+
+The same routes as gig_tax_server.urls, with GET and HEAD on the read
+endpoints answered by the async views in gigtaxapi.views.async_reads.
+"""
+from gigtaxapi.views.async_reads import async_urlpatterns
+from gig_tax_server.urls import router, urlpatterns as sync_urlpatterns
+
+urlpatterns = async_urlpatterns(router) + sync_urlpatterns
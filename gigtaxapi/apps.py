@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GigtaxapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gigtaxapi'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel,unused-import
+        from gigtaxapi import signals
@@ -0,0 +1,197 @@
+"""Token authentication backed by an in-process LRU and the Django cache
+
+DRF's TokenAuthentication joins authtoken_token to auth_user on every
+request. Here a token key maps to `(user id, musician id)` in a small
+per-process LRU with a short TTL, in front of a shared Django cache, and
+only a miss in both reaches the database.
+
+Entries are removed from the shared cache (and this process's LRU) when the
+token is deleted or rotated, or the user or musician changes. Other
+processes only drop their local copy when it expires, so LOCAL_TIMEOUT bounds
+how long a revoked token can keep working there.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from gigtaxapi.models import Musician
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LOCAL_TIMEOUT': 30,
+    'LOCAL_MAX_ENTRIES': 4096,
+}
+
+
+def auth_cache_setting(name):
+    return getattr(settings, 'GIGTAX_AUTH_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class LRUCache:
+    """A thread-safe, size-bounded mapping whose entries expire"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_tokens = LRUCache(auth_cache_setting('LOCAL_MAX_ENTRIES'), auth_cache_setting('LOCAL_TIMEOUT'))
+
+
+def _cache_key(key):
+    # Raw token keys never leave the process
+    return 'gigtax:auth:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def lookup_token(key):
+    """Resolve a token key to `(user id, musician id)`
+
+    Returns:
+        tuple -- the ids, or None when the token is unknown or its user inactive
+    """
+    cache_key = _cache_key(key)
+
+    entry = local_tokens.get(cache_key)
+    if entry is not None:
+        return entry
+
+    shared = caches[auth_cache_setting('CACHE_ALIAS')]
+    entry = shared.get(cache_key)
+    if entry is None:
+        row = Token.objects.filter(key=key, user__is_active=True).values_list(
+            'user_id', 'user__musician__id').first()
+        if row is None:
+            return None
+        entry = tuple(row)
+        shared.set(cache_key, entry, auth_cache_setting('TIMEOUT'))
+
+    local_tokens.set(cache_key, entry)
+    return entry
+
+
+def invalidate_token(key):
+    """Forget a token key everywhere this process can reach"""
+    cache_key = _cache_key(key)
+    local_tokens.delete(cache_key)
+    caches[auth_cache_setting('CACHE_ALIAS')].delete(cache_key)
+
+
+def invalidate_user(user_id):
+    """Forget every token belonging to a user"""
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that usually answers without a database query
+
+    The user is built from its cached id with every other column deferred,
+    so code that only filters by `request.auth.user` costs nothing, and
+    anything that reads e.g. the username loads it on first use. The
+    musician id is attached to the request as `request.musician_id`.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            request.musician_id = result[1].musician_id
+        return result
+
+    def authenticate_credentials(self, key):
+        entry = lookup_token(key)
+        if entry is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        user_id, musician_id = entry
+        user = User.from_db(DEFAULT_DB_ALIAS, ['id', 'is_active'], [user_id, True])
+        token = Token.from_db(DEFAULT_DB_ALIAS, ['key', 'user_id'], [key, user_id])
+        token.user = user
+        token.musician_id = musician_id
+
+        return (user, token)
+
+
+async def aauthenticate(request):
+    """Authenticate a plain Django request for the async read views
+
+    Accepts the same `Authorization: Token <key>` header as
+    CachedTokenAuthentication. A token in this process's LRU costs nothing;
+    anything else is looked up on a worker thread.
+
+    Returns:
+        tuple -- (user id, musician id), or None when no token was sent
+    """
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != b'token':
+        return None
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    entry = local_tokens.get(_cache_key(key))
+    if entry is None:
+        entry = await sync_to_async(lookup_token)(key)
+    if entry is None:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    return entry
+
+
+def get_musician_id(request):
+    """Resolve the caller's musician id, at most once per request
+
+    CachedTokenAuthentication normally attaches it while authenticating, so
+    this only queries for requests authenticated some other way.
+
+    Returns:
+        int -- the id of the musician belonging to the authenticated user
+    """
+    musician_id = getattr(request, 'musician_id', None)
+    if musician_id is None:
+        musician_id = Musician.objects.filter(
+            user_id=request.user.id).values_list('id', flat=True).first()
+        if musician_id is None:
+            raise exceptions.PermissionDenied('Only musicians can use this resource')
+        request.musician_id = musician_id
+    return musician_id
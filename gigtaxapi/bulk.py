@@ -0,0 +1,129 @@
+"""Multi-row writes that keep the derived tables in step
+
+Bulk queryset operations skip the per-object save/delete signals, so
+everything those receivers maintain (rollups, data versions, the search
+index and the longest tour per musician) is updated here in aggregate instead.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from gigtaxapi import conflicts, rollups, search, versioning
+
+_pending_delta = ContextVar('gigtax_pending_delta', default=None)
+
+
+def pending_delta():
+    """The RollupDelta collecting a bulk write's changes, or None outside one"""
+    return _pending_delta.get()
+
+
+@contextmanager
+def deferred_rollups():
+    """Collect what the save/delete receivers would apply and apply it once
+
+    QuerySet.delete() still sends a post_delete per row; inside this block
+    the receivers add the row to one shared delta instead of writing each
+    row's rollup change and version bump themselves.
+    """
+    delta = rollups.RollupDelta()
+    token = _pending_delta.set(delta)
+    try:
+        yield delta
+    finally:
+        _pending_delta.reset(token)
+    delta.apply()
+
+
+def bulk_create_records(model, objs, batch_size=500):
+    """Insert gigs, tours or receipts in one transaction
+
+    Returns:
+        list -- the created objects
+    """
+    delta = rollups.RollupDelta()
+    with transaction.atomic():
+        created = model.objects.bulk_create(objs, batch_size=batch_size)
+        for obj in created:
+            delta.add(obj)
+        delta.apply()
+        versioning.bump(*{obj.musician_id for obj in created})
+        search.index_records(model, [obj.pk for obj in created])
+        conflicts.note_created(model, created)
+    return created
+
+
+def patch_record(model, musician_id, pk, values):
+    """Write only the given columns of one of a musician's rows
+
+    When none of the columns feed the rollups this is a single
+    `UPDATE ... WHERE id = pk AND musician_id = musician_id` and the row is
+    never loaded. Otherwise the row is saved with `update_fields`, so the
+    save signals can move its totals.
+
+    Returns:
+        bool -- False when the musician has no such row
+    """
+    queryset = model.objects.filter(pk=pk, musician_id=musician_id)
+
+    if set(values) & set(rollups.TRACKED_FIELDS[model]):
+        instance = queryset.first()
+        if instance is None:
+            return False
+        for name, value in values.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=[model._meta.get_field(name).name for name in values])
+        return True
+
+    with transaction.atomic():
+        if not queryset.update(**values):
+            return False
+        versioning.bump(musician_id)
+        search.index_changed(model, [pk], values)
+        conflicts.note_changed(model, [pk], values)
+    return True
+
+
+def bulk_delete_records(model, musician_id, ids):
+    """Delete many of a musician's gigs, tours or receipts in one transaction
+
+    Returns:
+        int -- the number of rows deleted
+    """
+    with transaction.atomic():
+        with deferred_rollups():
+            _, deleted = model.objects.filter(musician_id=musician_id, pk__in=ids).delete()
+        count = deleted.get(model._meta.label, 0)
+        if count:
+            versioning.bump(musician_id)
+    return count
+
+
+def bulk_update_records(model, musician_id, ids, values):
+    """Set the same column values on many of a musician's rows
+
+    The rows are changed with one UPDATE. If the columns feed the rollups
+    their old values are read first (and locked, where the database can),
+    so the totals move as one aggregated delta.
+
+    Returns:
+        int -- the number of rows updated
+    """
+    queryset = model.objects.filter(musician_id=musician_id, pk__in=ids)
+    tracked = rollups.TRACKED_FIELDS[model]
+
+    with transaction.atomic():
+        delta = rollups.RollupDelta()
+        if set(values) & set(tracked):
+            for row in queryset.select_for_update().only(*tracked):
+                delta.remove(row)
+                for name, value in values.items():
+                    setattr(row, name, value)
+                delta.add(row)
+
+        updated = queryset.update(**values)
+        delta.apply()
+        if updated:
+            versioning.bump(musician_id)
+            search.index_changed(model, ids, values)
+            conflicts.note_changed(model, ids, values)
+    return updated
@@ -0,0 +1,66 @@
+"""Process-wide catalogue of expense categories
+
+Categories are reference data that almost never change, so they are read
+once into memory and served from there. Saving or deleting a Category drops
+this process's copy (see gigtaxapi.signals). Other processes reload theirs
+once it is older than MAX_AGE seconds.
+"""
+import threading
+import time
+from gigtaxapi.models import Category
+
+MAX_AGE = 300
+
+
+class CategoryRegistry:
+    """A lazily loaded, thread-safe `id -> {'id', 'label'}` mapping"""
+
+    def __init__(self, max_age=MAX_AGE):
+        self.max_age = max_age
+        self._categories = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def _current(self):
+        categories = self._categories
+        if categories is not None and time.monotonic() - self._loaded_at < self.max_age:
+            return categories
+
+        with self._lock:
+            if self._categories is None or time.monotonic() - self._loaded_at >= self.max_age:
+                self._categories = {
+                    row['id']: row for row in Category.objects.order_by('id').values('id', 'label')
+                }
+                self._loaded_at = time.monotonic()
+            return self._categories
+
+    def all(self):
+        """Every category, ordered by id
+
+        Returns:
+            list -- dicts with the id and label
+        """
+        return list(self._current().values())
+
+    def get(self, pk):
+        """Look up one category
+
+        Returns:
+            dict -- the id and label, or None when there is no such category
+        """
+        try:
+            return self._current().get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def missing(self, pks):
+        """Return the ids in `pks` that are not categories"""
+        categories = self._current()
+        return {pk for pk in pks if pk not in categories}
+
+    def clear(self):
+        with self._lock:
+            self._categories = None
+
+
+registry = CategoryRegistry()
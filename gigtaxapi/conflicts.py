@@ -0,0 +1,205 @@
+"""Double-booking checks for gigs and tours
+
+A gig clashes with another gig on the same date and with every tour whose
+date_start-date_end window contains its date; two tours clash when their
+windows overlap.
+
+Each check is an index range scan rather than a walk over every tour. Gigs
+are found on the (musician, date) index. A tour cannot reach a date if it
+started more than the musician's longest tour before it, so tours are read
+from the (musician, date_start) index between `start - longest` and `end`.
+`Musician.longest_tour_days` only ever grows: a stale, larger value makes
+the range wider but never misses a clash.
+"""
+from datetime import date, timedelta
+from gigtaxapi.models import Gig, Musician, Tour
+
+DATE_FIELDS = {Gig: ('date',), Tour: ('date_start', 'date_end')}
+
+
+def _to_date(model, name, value):
+    return model._meta.get_field(name).to_python(value)
+
+
+def tour_days(date_start, date_end):
+    """The number of days a tour spans beyond its first, 0 for bad data"""
+    if date_start is None or date_end is None:
+        return 0
+    return max((date_end - date_start).days, 0)
+
+
+def note_tour_spans(rows):
+    """Widen `longest_tour_days` for the musicians of some saved tours
+
+    Arguments:
+        rows -- (musician id, date_start, date_end) tuples
+    """
+    longest = {}
+    for musician_id, date_start, date_end in rows:
+        days = tour_days(_to_date(Tour, 'date_start', date_start), _to_date(Tour, 'date_end', date_end))
+        longest[musician_id] = max(longest.get(musician_id, 0), days)
+
+    for musician_id, days in longest.items():
+        if days:
+            Musician.objects.filter(pk=musician_id, longest_tour_days__lt=days).update(longest_tour_days=days)
+
+
+def note_created(model, objs):
+    """Record the spans of newly saved tours"""
+    if model is Tour:
+        note_tour_spans((obj.musician_id, obj.date_start, obj.date_end) for obj in objs)
+
+
+def note_changed(model, ids, columns):
+    """Record the spans of tours after an UPDATE, if it moved their dates"""
+    if model is Tour and set(columns) & set(DATE_FIELDS[Tour]):
+        note_tour_spans(Tour.objects.filter(pk__in=list(ids)).values_list(
+            'musician_id', 'date_start', 'date_end'))
+
+
+def longest_tour_days(musician_id):
+    return Musician.objects.filter(pk=musician_id).values_list('longest_tour_days', flat=True).first() or 0
+
+
+def earliest_start(day, longest):
+    """The first date_start of a tour that can still be running on `day`"""
+    if day.toordinal() - date.min.toordinal() <= longest:
+        return date.min
+    return day - timedelta(days=longest)
+
+
+def booking(kind, pk, date_start, date_end, title):
+    return {'type': kind, 'id': pk, 'date': date_start, 'end': date_end, 'title': title}
+
+
+def find_conflicts(musician_id, date_start, date_end=None, exclude=None):
+    """Find the musician's bookings that clash with one on date_start-date_end
+
+    Arguments:
+        date_end -- the last day of a tour, or None for a gig
+        exclude -- (kind, pk) of the booking being changed, which cannot
+                   clash with itself
+
+    Returns:
+        list -- booking dicts (type, id, date, end, title), by date
+    """
+    date_end = date_end or date_start
+    longest = longest_tour_days(musician_id)
+    excluded_gig = exclude[1] if exclude and exclude[0] == 'gig' else None
+    excluded_tour = exclude[1] if exclude and exclude[0] == 'tour' else None
+
+    gigs = Gig.objects.filter(musician_id=musician_id, date__gte=date_start, date__lte=date_end)
+    tours = Tour.objects.filter(
+        musician_id=musician_id, date_start__gte=earliest_start(date_start, longest),
+        date_start__lte=date_end, date_end__gte=date_start)
+
+    clashes = [
+        booking('gig', pk, day, day, artist)
+        for pk, day, artist in gigs.exclude(pk=excluded_gig).values_list('id', 'date', 'artist')
+    ] + [
+        booking('tour', pk, start, end, artist)
+        for pk, start, end, artist in tours.exclude(pk=excluded_tour).values_list(
+            'id', 'date_start', 'date_end', 'artist')
+    ]
+    return sorted(clashes, key=lambda clash: (clash['date'], clash['type'], clash['id']))
+
+
+def batch_conflicts(musician_id, kind, spans, moved_ids=()):
+    """Find the clashes of a batch of new or moved gigs or tours
+
+    The stored bookings in the window the batch covers are read with one
+    range scan per table and swept once in date order together with the
+    batch, so items are checked against each other as well.
+
+    Arguments:
+        spans -- (pk, date_start, date_end, title) per item; pk is None for
+                 a new booking, and date_end is the date_start of a gig
+        moved_ids -- the stored bookings of this kind the batch moves, whose
+                     old dates are ignored
+
+    Returns:
+        list -- (position in spans, clashing booking dicts) for each item
+                that clashes; bookings from the batch itself carry their
+                `index` when they are new
+    """
+    if not spans:
+        return []
+    first_day = min(start for _, start, _, _ in spans)
+    last_day = max(end for _, _, end, _ in spans)
+    longest = longest_tour_days(musician_id)
+    excluded_gigs = list(moved_ids) if kind == 'gig' else []
+    excluded_tours = list(moved_ids) if kind == 'tour' else []
+
+    gigs = Gig.objects.filter(
+        musician_id=musician_id, date__gte=first_day, date__lte=last_day).exclude(
+            pk__in=excluded_gigs).values_list('id', 'date', 'artist')
+    tours = Tour.objects.filter(
+        musician_id=musician_id, date_start__gte=earliest_start(first_day, longest),
+        date_start__lte=last_day, date_end__gte=first_day).exclude(
+            pk__in=excluded_tours).values_list('id', 'date_start', 'date_end', 'artist')
+
+    # (booking, position in the batch or None for a stored booking)
+    entries = [(booking('gig', pk, day, day, artist), None) for pk, day, artist in gigs]
+    entries += [(booking('tour', pk, start, end, artist), None) for pk, start, end, artist in tours]
+    for position, (pk, start, end, title) in enumerate(spans):
+        entry = booking(kind, pk, start, end, title)
+        if pk is None:
+            entry['index'] = position
+        entries.append((entry, position))
+    entries.sort(key=lambda entry: (entry[0]['date'], entry[0]['end']))
+
+    clashes = {}
+    running = []
+    for current, position in entries:
+        running = [entry for entry in running if entry[0]['end'] >= current['date']]
+        for other, other_position in running:
+            if position is not None:
+                clashes.setdefault(position, []).append(other)
+            if other_position is not None:
+                clashes.setdefault(other_position, []).append(current)
+        running.append((current, position))
+
+    return [
+        (position, sorted(found, key=lambda clash: (clash['date'], clash['type'], clash['id'] or 0)))
+        for position, found in sorted(clashes.items())
+    ]
+
+
+def year_conflicts(musician_id, year):
+    """Every pair of clashing bookings that touches a calendar year
+
+    The year's gigs and the tours overlapping it are read from their
+    indexes and swept once in date order, keeping the tours still running
+    and the gigs on the current date.
+
+    Returns:
+        list -- {'first': booking, 'second': booking} pairs, by date
+    """
+    first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+    longest = longest_tour_days(musician_id)
+
+    gigs = Gig.objects.filter(
+        musician_id=musician_id, date__gte=first_day, date__lte=last_day).values_list('id', 'date', 'artist')
+    tours = Tour.objects.filter(
+        musician_id=musician_id, date_start__gte=earliest_start(first_day, longest),
+        date_start__lte=last_day, date_end__gte=first_day).values_list('id', 'date_start', 'date_end', 'artist')
+
+    # On a shared first day, tours are swept before gigs so the tour is running
+    bookings = sorted(
+        [(start, 0, booking('tour', pk, start, end, artist)) for pk, start, end, artist in tours]
+        + [(day, 1, booking('gig', pk, day, day, artist)) for pk, day, artist in gigs],
+        key=lambda entry: (entry[0], entry[1], entry[2]['id']))
+
+    pairs = []
+    running = []
+    same_day = []
+    for start, _, current in bookings:
+        running = [tour for tour in running if tour['end'] >= start]
+        pairs += [{'first': tour, 'second': current} for tour in running]
+        if current['type'] == 'tour':
+            running.append(current)
+            continue
+        same_day = [gig for gig in same_day if gig['date'] == start]
+        pairs += [{'first': gig, 'second': current} for gig in same_day]
+        same_day.append(current)
+    return pairs
@@ -0,0 +1,276 @@
+"""Streaming import of bank and card statement exports as receipts
+
+Statements are read one line at a time and turned into receipts by a chain
+of generators, then written in fixed-size `bulk_create` batches. Memory use
+therefore depends on the batch size, not on the length of the file.
+"""
+import csv
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date
+from gigtaxapi.bulk import bulk_create_records
+from gigtaxapi.models import Receipt
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 20
+
+# Header names used by common bank and card exports, most specific first
+CSV_COLUMNS = {
+    'date': ('transaction date', 'date', 'posted date', 'posting date'),
+    'business_name': ('payee', 'merchant', 'name', 'description'),
+    'description': ('memo', 'category', 'details', 'description'),
+    'amount': ('amount', 'transaction amount'),
+    'debit': ('debit', 'withdrawal', 'withdrawals'),
+    'receipt_number': ('reference', 'reference number', 'transaction id', 'check number', 'fitid'),
+}
+
+CSV_DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%d-%b-%Y', '%Y%m%d')
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+class ImportRowError(ValueError):
+    """A statement row that cannot be turned into a receipt"""
+
+
+class SkipRow(Exception):
+    """A valid statement row that is not a purchase, such as a deposit"""
+
+
+class ImportResult:
+    """Counts of what happened to each row of a statement"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'message': message})
+
+    def as_dict(self):
+        return {
+            'inserted': self.inserted,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+def detect_format(filename):
+    """Guess the statement format from a file name
+
+    Returns:
+        str -- 'ofx' for .ofx/.qfx files, otherwise 'csv'
+    """
+    return 'ofx' if filename.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+def parse_amount(value):
+    try:
+        amount = Decimal(str(value).replace('$', '').replace(',', '').strip())
+    except InvalidOperation:
+        raise ImportRowError(f'"{value}" is not an amount')
+    try:
+        # Checked as the price column will store it, so no row fails at write time
+        Receipt._meta.get_field('price').to_cents(amount)
+    except ValidationError:
+        raise ImportRowError(f'"{value}" is not an amount')
+    return amount
+
+
+def parse_statement_date(value):
+    value = (value or '').strip()
+    # OFX dates carry a time and time zone after the first eight digits
+    if re.match(r'^\d{8}', value):
+        value = value[:8]
+    if '-' in value:
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            return parsed
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ImportRowError(f'"{value}" is not a date')
+
+
+def to_receipt_fields(date, name, amount, memo='', reference=''):
+    """Map one statement transaction onto Receipt columns
+
+    Purchases are the money going out, so only negative amounts become
+    receipts and anything else is skipped.
+
+    Returns:
+        dict -- keyword arguments for Receipt
+    """
+    amount = parse_amount(amount)
+    if amount >= 0:
+        raise SkipRow()
+
+    name = (name or '').strip()
+    if not name:
+        raise ImportRowError('missing payee')
+
+    return {
+        'business_name': name[:50],
+        'business_address': '',
+        'description': (memo or '').strip()[:150],
+        'date': parse_statement_date(date),
+        'price': -amount,
+        'receipt_number': (reference or '').strip()[:100],
+    }
+
+
+def _column(header, field):
+    for name in CSV_COLUMNS[field]:
+        if name in header:
+            return header[name]
+    return None
+
+
+def parse_csv(lines):
+    """Read a CSV export lazily
+
+    Yields:
+        tuple -- (line number, receipt fields, or the exception for that row)
+    """
+    reader = csv.reader(lines)
+    try:
+        header_row = next(reader)
+    except StopIteration:
+        return
+
+    header = {}
+    for index, name in enumerate(header_row):
+        header.setdefault(name.strip().lower(), index)
+
+    columns = {field: _column(header, field) for field in CSV_COLUMNS}
+    if columns['date'] is None or (columns['amount'] is None and columns['debit'] is None):
+        yield reader.line_num, ImportRowError('CSV header needs a date and an amount or debit column')
+        return
+
+    def cell(row, field):
+        index = columns[field]
+        return row[index] if index is not None and index < len(row) else ''
+
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            if columns['debit'] is not None and cell(row, 'debit').strip():
+                amount = -abs(parse_amount(cell(row, 'debit')))
+            elif columns['amount'] is not None:
+                amount = cell(row, 'amount')
+            else:
+                # A credit on a statement with separate debit/credit columns
+                raise SkipRow()
+            memo = cell(row, 'description') if columns['description'] != columns['business_name'] else ''
+            yield reader.line_num, to_receipt_fields(
+                cell(row, 'date'), cell(row, 'business_name'), amount,
+                memo=memo, reference=cell(row, 'receipt_number'))
+        except (ImportRowError, SkipRow) as ex:
+            yield reader.line_num, ex
+
+
+def parse_ofx(lines):
+    """Read the <STMTTRN> transactions of an OFX/QFX export lazily
+
+    Handles both SGML (OFX 1.x, no closing tags) and XML (OFX 2.x) files.
+
+    Yields:
+        tuple -- (line number, receipt fields, or the exception for that row)
+    """
+    transaction = None
+    start_line = 0
+
+    for line_number, line in enumerate(lines, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if transaction is not None:
+                    yield start_line, _ofx_transaction(transaction)
+                transaction = None if closing else {}
+                start_line = line_number
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+
+    if transaction is not None:
+        yield start_line, _ofx_transaction(transaction)
+
+
+def _ofx_transaction(transaction):
+    try:
+        return to_receipt_fields(
+            transaction.get('DTPOSTED'),
+            transaction.get('NAME') or transaction.get('PAYEE') or transaction.get('MEMO'),
+            transaction.get('TRNAMT', ''),
+            memo=transaction.get('MEMO', '') if transaction.get('NAME') else '',
+            reference=transaction.get('FITID') or transaction.get('CHECKNUM') or '')
+    except (ImportRowError, SkipRow) as ex:
+        return ex
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+}
+
+
+def import_receipts(musician_id, lines, statement_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import a statement for one musician
+
+    Rows whose reference number the musician already has a receipt for are
+    skipped, so re-importing an overlapping statement does not duplicate.
+
+    Returns:
+        ImportResult -- inserted, skipped and failed counts
+    """
+    result = ImportResult()
+    chunk = []
+
+    for line, row in PARSERS[statement_format](lines):
+        if isinstance(row, SkipRow):
+            result.skipped += 1
+        elif isinstance(row, Exception):
+            result.fail(line, str(row))
+        else:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                _write_chunk(musician_id, chunk, result)
+                chunk = []
+
+    if chunk:
+        _write_chunk(musician_id, chunk, result)
+
+    return result
+
+
+def _write_chunk(musician_id, rows, result):
+    references = {row['receipt_number'] for row in rows if row['receipt_number']}
+    seen = set(Receipt.objects.filter(
+        musician_id=musician_id, receipt_number__in=references,
+    ).values_list('receipt_number', flat=True)) if references else set()
+
+    receipts = []
+    for row in rows:
+        reference = row['receipt_number']
+        if reference and reference in seen:
+            result.skipped += 1
+            continue
+        if reference:
+            seen.add(reference)
+        receipts.append(Receipt(musician_id=musician_id, **row))
+
+    if receipts:
+        bulk_create_records(Receipt, receipts)
+        result.inserted += len(receipts)
@@ -0,0 +1,45 @@
+"""Management command that refreshes the quarterly tax estimates of many musicians"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from gigtaxapi import tax
+from gigtaxapi.models import MonthlyExpenseRollup, MonthlyRollup, QuarterlyEstimate
+
+
+class Command(BaseCommand):
+    help = 'Work out the quarterly estimated tax of every musician with data in a year'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=date.today().year)
+        parser.add_argument(
+            '--musician', type=int, action='append', dest='musicians',
+            help='Only refresh this musician id (may be repeated)')
+        parser.add_argument('--filing-status', default='single', choices=tax.FILING_STATUSES)
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Musicians read and written together')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year not in tax.YEARS:
+            raise CommandError(f'--year must be between {tax.YEARS[0]} and {tax.YEARS[-1]}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        musician_ids = options['musicians'] or self.musicians_in(year)
+        recomputed = 0
+        for start in range(0, len(musician_ids), options['batch_size']):
+            batch = musician_ids[start:start + options['batch_size']]
+            _, changed = tax.refresh(batch, year, options['filing_status'])
+            recomputed += changed
+
+        quarters = len(musician_ids) * 4
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {len(musician_ids)} musicians for {year}: {recomputed} quarters recomputed, '
+            f'{quarters - recomputed} unchanged'))
+
+    def musicians_in(self, year):
+        """Every musician with rollups or stored estimates in the year"""
+        musician_ids = set()
+        for model in (MonthlyRollup, MonthlyExpenseRollup, QuarterlyEstimate):
+            musician_ids.update(model.objects.filter(year=year).values_list('musician_id', flat=True).distinct())
+        return sorted(musician_ids)
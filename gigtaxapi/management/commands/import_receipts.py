@@ -0,0 +1,34 @@
+"""Management command that imports a bank or card statement as receipts"""
+from django.core.management.base import BaseCommand, CommandError
+from gigtaxapi.importers import DEFAULT_CHUNK_SIZE, PARSERS, detect_format, import_receipts
+from gigtaxapi.models import Musician
+
+
+class Command(BaseCommand):
+    help = 'Import receipts for a musician from a CSV or OFX/QFX statement export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('musician', type=int, help='Musician id to import the receipts for')
+        parser.add_argument('path', help='Statement file to read')
+        parser.add_argument(
+            '--statement-format', choices=sorted(PARSERS),
+            help='Defaults to ofx for .ofx/.qfx files and csv otherwise')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not Musician.objects.filter(pk=options['musician']).exists():
+            raise CommandError(f'Musician {options["musician"]} does not exist')
+
+        statement_format = options['statement_format'] or detect_format(options['path'])
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', errors='replace', newline='') as lines:
+                result = import_receipts(
+                    options['musician'], lines, statement_format, chunk_size=options['chunk_size'])
+        except OSError as ex:
+            raise CommandError(str(ex))
+
+        for error in result.errors:
+            self.stderr.write(f'line {error["line"]}: {error["message"]}')
+        self.stdout.write(
+            f'Inserted {result.inserted}, skipped {result.skipped}, failed {result.failed}')
@@ -0,0 +1,30 @@
+"""Management command that rebuilds and verifies the monthly rollups"""
+from django.core.management.base import BaseCommand, CommandError
+from gigtaxapi import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-musician monthly rollups from gigs, tours and receipts, then verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--musician', type=int, action='append', dest='musicians',
+            help='Only rebuild this musician id (may be repeated)')
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='Compare the stored rollups with the source tables without rewriting them')
+
+    def handle(self, *args, **options):
+        musician_ids = options['musicians']
+
+        if not options['verify_only']:
+            monthly, expenses = rollups.rebuild(musician_ids)
+            self.stdout.write(f'Wrote {monthly} monthly rows and {expenses} expense rows')
+
+        problems = rollups.verify(musician_ids)
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f'{len(problems)} rollup values do not match the source tables')
+
+        self.stdout.write(self.style.SUCCESS('Rollups match the source tables'))
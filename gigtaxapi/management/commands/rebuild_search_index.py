@@ -0,0 +1,13 @@
+"""Management command that rebuilds the full-text search index"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from gigtaxapi import search
+
+
+class Command(BaseCommand):
+    help = 'Empty the search index and fill it again from every gig, tour and receipt'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} records'))
@@ -0,0 +1,22 @@
+"""Management command that reports the response cache hit and miss counters"""
+from django.core.management.base import BaseCommand
+from gigtaxapi import response_cache
+
+
+class Command(BaseCommand):
+    help = ('Print the response cache hit/miss counters. They live in the default cache, so '
+            'this only sees the web processes\' counts when that cache is shared (file or Redis)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        counters = response_cache.stats()
+        ratio = counters['hit_ratio']
+        self.stdout.write(
+            f"hits: {counters['hits']}  misses: {counters['misses']}  "
+            f"hit ratio: {'n/a' if ratio is None else ratio}")
+
+        if options['reset']:
+            response_cache.reset_stats()
+            self.stdout.write('Counters reset')
@@ -0,0 +1,29 @@
+"""Management command that copies a SQLite primary into SQLite read replicas
+
+SQLite has no replication, so this stands in for it when trying the replica
+router locally: point READ_REPLICA_URLS at another SQLite file and run this
+whenever the replica should catch up with the primary.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from gigtaxapi.replicas import db_routing_setting
+
+
+class Command(BaseCommand):
+    help = 'Copy the default SQLite database over each SQLite read replica'
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+
+        replicas = [alias for alias in db_routing_setting('REPLICAS') if connections[alias].vendor == 'sqlite']
+        if not replicas:
+            raise CommandError('No SQLite replicas are configured (set READ_REPLICA_URLS)')
+
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f'Copied {primary.settings_dict["NAME"]} to {replica.settings_dict["NAME"]}')
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_rollups(apps, schema_editor):
+    # The same totals as gigtaxapi.rollups.compute, from the historical
+    # models, while money is still stored as float dollars
+    Gig = apps.get_model('gigtaxapi', 'Gig')
+    Tour = apps.get_model('gigtaxapi', 'Tour')
+    Receipt = apps.get_model('gigtaxapi', 'Receipt')
+    MonthlyRollup = apps.get_model('gigtaxapi', 'MonthlyRollup')
+    MonthlyExpenseRollup = apps.get_model('gigtaxapi', 'MonthlyExpenseRollup')
+
+    monthly = {}
+    for row in Gig.objects.annotate(year=ExtractYear('date'), month=ExtractMonth('date')).values(
+            'musician_id', 'year', 'month').annotate(
+                gig_count=Count('id'), gig_income=Sum('gig_pay'), gig_mileage=Sum('mileage')).order_by():
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'))
+        monthly.setdefault(key, {}).update(row)
+
+    for row in Tour.objects.annotate(year=ExtractYear('date_start'), month=ExtractMonth('date_start')).values(
+            'musician_id', 'year', 'month').annotate(
+                tour_count=Count('id'),
+                tour_income=Sum(
+                    F('number_of_gigs') * F('tour_gig_pay') + F('travel_days') * F('travel_day_pay'),
+                    output_field=models.FloatField()),
+                per_diem=Sum(
+                    F('per_diem') * (F('number_of_gigs') + F('travel_days')),
+                    output_field=models.FloatField()),
+                tour_mileage=Sum('mileage')).order_by():
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'))
+        monthly.setdefault(key, {}).update(row)
+
+    MonthlyRollup.objects.bulk_create([
+        MonthlyRollup(musician_id=musician_id, year=year, month=month, **values)
+        for (musician_id, year, month), values in monthly.items()
+    ], batch_size=500)
+
+    MonthlyExpenseRollup.objects.bulk_create([
+        MonthlyExpenseRollup(**row)
+        for row in Receipt.objects.annotate(year=ExtractYear('date'), month=ExtractMonth('date')).values(
+            'musician_id', 'year', 'month', 'category_type_id').annotate(
+                count=Count('id'), total=Sum('price')).order_by()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0003_auto_20220625_2135'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('category_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='gigtaxapi.category')),
+                ('musician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gigtaxapi.musician')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('musician', 'year', 'month', 'category_type'), name='unique_monthly_expense_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('gig_count', models.IntegerField(default=0)),
+                ('gig_income', models.FloatField(default=0)),
+                ('gig_mileage', models.IntegerField(default=0)),
+                ('tour_count', models.IntegerField(default=0)),
+                ('tour_income', models.FloatField(default=0)),
+                ('per_diem', models.FloatField(default=0)),
+                ('tour_mileage', models.IntegerField(default=0)),
+                ('musician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gigtaxapi.musician')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('musician', 'year', 'month'), name='unique_monthly_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
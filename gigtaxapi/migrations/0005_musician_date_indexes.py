@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0004_monthly_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['musician', 'date'], name='gig_musician_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['musician', 'date'], name='receipt_musician_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['musician', 'category_type', 'date'], name='receipt_musician_cat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['musician', 'date_start'], name='tour_musician_start_idx'),
+        ),
+    ]
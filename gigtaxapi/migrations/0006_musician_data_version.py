@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0005_musician_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musician',
+            name='data_modified',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='musician',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:27
+
+import gigtaxapi.models.fields
+from django.db import migrations
+from django.db.models import F, Value
+from django.db.models.functions import Round
+
+MONEY_FIELDS = {
+    'gig': ('gig_pay',),
+    'tour': ('per_diem', 'travel_day_pay', 'tour_gig_pay'),
+    'receipt': ('price',),
+    'monthlyrollup': ('gig_income', 'tour_income', 'per_diem'),
+    'monthlyexpenserollup': ('total',),
+}
+
+
+def dollars_to_cents(apps, schema_editor):
+    # Runs while the columns are still floats, so the cents survive the
+    # change of column type
+    for model_name, fields in MONEY_FIELDS.items():
+        model = apps.get_model('gigtaxapi', model_name)
+        model.objects.update(**{name: Round(F(name) * 100) for name in fields})
+
+
+def cents_to_dollars(apps, schema_editor):
+    for model_name, fields in MONEY_FIELDS.items():
+        model = apps.get_model('gigtaxapi', model_name)
+        model.objects.update(**{name: F(name) / Value(100.0) for name in fields})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0006_musician_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(dollars_to_cents, cents_to_dollars),
+        migrations.AlterField(
+            model_name='gig',
+            name='gig_pay',
+            field=gigtaxapi.models.fields.CentsField(),
+        ),
+        migrations.AlterField(
+            model_name='monthlyexpenserollup',
+            name='total',
+            field=gigtaxapi.models.fields.CentsField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='gig_income',
+            field=gigtaxapi.models.fields.CentsField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='per_diem',
+            field=gigtaxapi.models.fields.CentsField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='tour_income',
+            field=gigtaxapi.models.fields.CentsField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='price',
+            field=gigtaxapi.models.fields.CentsField(),
+        ),
+        migrations.AlterField(
+            model_name='tour',
+            name='per_diem',
+            field=gigtaxapi.models.fields.CentsField(),
+        ),
+        migrations.AlterField(
+            model_name='tour',
+            name='tour_gig_pay',
+            field=gigtaxapi.models.fields.CentsField(),
+        ),
+        migrations.AlterField(
+            model_name='tour',
+            name='travel_day_pay',
+            field=gigtaxapi.models.fields.CentsField(),
+        ),
+    ]
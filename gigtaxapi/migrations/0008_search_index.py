@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from gigtaxapi import search
+    search.create_table(schema_editor.connection)
+    search.rebuild(apps, using=schema_editor.connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    from gigtaxapi import search
+    search.drop_table(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0007_money_in_cents'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
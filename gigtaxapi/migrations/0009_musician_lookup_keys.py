@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def fill_lookup_keys(apps, schema_editor):
+    Musician = apps.get_model('gigtaxapi', 'Musician')
+    for musician in Musician.objects.annotate(
+            username_lower=Lower('user__username'), email_lower=Lower('user__email')).iterator():
+        Musician.objects.filter(pk=musician.pk).update(
+            username_key=musician.username_lower, email_key=musician.email_lower)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0008_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musician',
+            name='email_key',
+            field=models.CharField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='musician',
+            name='username_key',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_lookup_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='musician',
+            index=models.Index(fields=['username_key'], name='musician_username_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='musician',
+            index=models.Index(fields=['email_key'], name='musician_email_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
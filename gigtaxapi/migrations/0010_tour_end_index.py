@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0009_musician_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['musician', 'date_end'], name='tour_musician_end_idx'),
+        ),
+    ]
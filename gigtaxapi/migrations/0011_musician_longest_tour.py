@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+def fill_longest_tour_days(apps, schema_editor):
+    Musician = apps.get_model('gigtaxapi', 'Musician')
+    Tour = apps.get_model('gigtaxapi', 'Tour')
+    longest = {}
+    for musician_id, date_start, date_end in Tour.objects.values_list(
+            'musician_id', 'date_start', 'date_end').iterator():
+        longest[musician_id] = max(longest.get(musician_id, 0), (date_end - date_start).days)
+    for musician_id, days in longest.items():
+        if days > 0:
+            Musician.objects.filter(pk=musician_id).update(longest_tour_days=days)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0010_tour_end_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musician',
+            name='longest_tour_days',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_longest_tour_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+import django.db.models.deletion
+import gigtaxapi.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0011_musician_longest_tour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuarterlyEstimate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('quarter', models.PositiveSmallIntegerField()),
+                ('filing_status', models.CharField(max_length=20)),
+                ('income', gigtaxapi.models.fields.CentsField(default=0)),
+                ('expenses', gigtaxapi.models.fields.CentsField(default=0)),
+                ('mileage_deduction', gigtaxapi.models.fields.CentsField(default=0)),
+                ('net_profit', gigtaxapi.models.fields.CentsField(default=0)),
+                ('annualized_profit', gigtaxapi.models.fields.CentsField(default=0)),
+                ('self_employment_tax', gigtaxapi.models.fields.CentsField(default=0)),
+                ('income_tax', gigtaxapi.models.fields.CentsField(default=0)),
+                ('installment', gigtaxapi.models.fields.CentsField(default=0)),
+                ('tables_version', models.CharField(max_length=20)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('computed_at', models.DateTimeField()),
+                ('musician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gigtaxapi.musician')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('musician', 'year', 'filing_status', 'quarter'), name='unique_quarterly_estimate')],
+            },
+        ),
+    ]
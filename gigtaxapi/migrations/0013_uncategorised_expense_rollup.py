@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+def merge_uncategorised_rows(apps, schema_editor):
+    # Concurrent first writes could create several rows for one month
+    MonthlyExpenseRollup = apps.get_model('gigtaxapi', 'MonthlyExpenseRollup')
+    rows = MonthlyExpenseRollup.objects.filter(category_type__isnull=True).order_by('id')
+    kept = {}
+    for row in rows.iterator():
+        key = (row.musician_id, row.year, row.month)
+        first = kept.get(key)
+        if first is None:
+            kept[key] = row
+            continue
+        first.count += row.count
+        first.total += row.total
+        first.save(update_fields=['count', 'total'])
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigtaxapi', '0012_quarterly_estimates'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorised_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='monthlyexpenserollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category_type__isnull', True)), fields=('musician', 'year', 'month'), name='unique_uncategorised_expense_rollup'),
+        ),
+    ]
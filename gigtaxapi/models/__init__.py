@@ -3,3 +3,5 @@ from .musician import Musician
 from .receipt import Receipt
 from .tour import Tour
 from .category import Category
+from .rollup import MonthlyRollup, MonthlyExpenseRollup
+from .estimate import QuarterlyEstimate
@@ -0,0 +1,33 @@
+from django.db import models
+from django.db.models.deletion import CASCADE
+from .fields import CentsField
+
+class QuarterlyEstimate(models.Model):
+    """One quarter's estimated tax payment for a musician, see gigtaxapi.tax
+
+    The amounts of the period itself (income to net_profit) and the year's
+    tax annualized from the profit so far. `fingerprint` identifies the
+    inputs and table it was worked out from, so an unchanged quarter is
+    never recomputed.
+    """
+    musician = models.ForeignKey("Musician", on_delete=CASCADE)
+    year = models.PositiveSmallIntegerField()
+    quarter = models.PositiveSmallIntegerField()
+    filing_status = models.CharField(max_length=20)
+    income = CentsField(default=0)
+    expenses = CentsField(default=0)
+    mileage_deduction = CentsField(default=0)
+    net_profit = CentsField(default=0)
+    annualized_profit = CentsField(default=0)
+    self_employment_tax = CentsField(default=0)
+    income_tax = CentsField(default=0)
+    installment = CentsField(default=0)
+    tables_version = models.CharField(max_length=20)
+    fingerprint = models.CharField(max_length=64)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['musician', 'year', 'filing_status', 'quarter'], name='unique_quarterly_estimate'),
+        ]
@@ -0,0 +1,61 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from django.core import exceptions
+from django.db import models
+
+CENT = Decimal('0.01')
+# Signed 64-bit, the range of every database's BIGINT
+MIN_CENTS, MAX_CENTS = -2 ** 63, 2 ** 63 - 1
+
+
+class CentsField(models.BigIntegerField):
+    """An amount of money stored as a whole number of cents
+
+    The database only ever sees integers, so SUMs are exact, while Python
+    code reads and writes Decimal dollars rounded to the cent. Expressions
+    that mix an amount with integer columns (e.g. a count times a rate) are
+    still cents and can use `output_field=CentsField()`.
+    """
+    description = 'Amount of money in cents'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return (Decimal(value) / 100).quantize(CENT)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            # str() first so a float such as 379.99 is not read as 379.98999...
+            amount = Decimal(str(value))
+            if not amount.is_finite():
+                raise ValueError(value)
+            return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+        except (InvalidOperation, ValueError):
+            raise exceptions.ValidationError(
+                '“%(value)s” value must be an amount of money.',
+                code='invalid', params={'value': value})
+
+    def to_cents(self, value):
+        """Convert an amount to the integer stored in the column
+
+        Raises:
+            ValidationError -- for values that are not an amount, or do not fit
+        """
+        cents = int(self.to_python(value) * 100)
+        if not MIN_CENTS <= cents <= MAX_CENTS:
+            raise exceptions.ValidationError(
+                '“%(value)s” is too large an amount of money.',
+                code='invalid', params={'value': value})
+        return cents
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        return self.to_cents(value)
+
+    def formfield(self, **kwargs):
+        from django import forms
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField, 'decimal_places': 2, **kwargs})
@@ -1,5 +1,6 @@
 from django.db import models
 from django.db.models.deletion import CASCADE
+from .fields import CentsField
 
 class Gig(models.Model):
     musician = models.ForeignKey("Musician", on_delete=CASCADE)
@@ -8,5 +9,10 @@ class Gig(models.Model):
     location_address = models.CharField(max_length=100)
     gig_description = models.CharField(max_length=150)
     date = models.DateField(auto_now=False, auto_now_add=False)
-    gig_pay = models.FloatField()
+    gig_pay = CentsField()
     mileage = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['musician', 'date'], name='gig_musician_date_idx'),
+        ]
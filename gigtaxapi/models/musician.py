@@ -3,4 +3,27 @@ from django.contrib.auth.models import User
 
 class Musician(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    address = models.CharField(max_length=100)
\ No newline at end of file
+    address = models.CharField(max_length=100)
+    # Bumped on every write to the musician's gigs, tours and receipts
+    data_version = models.PositiveBigIntegerField(default=0)
+    data_modified = models.DateTimeField(null=True, blank=True)
+    # Lowercased copies of the user's username and email for the indexed
+    # directory lookups, kept in step with the user by gigtaxapi.signals
+    username_key = models.CharField(max_length=150, default='', editable=False)
+    email_key = models.CharField(max_length=254, default='', editable=False)
+    # The most days any of the musician's tours has run past its first day,
+    # which bounds the index range of the double-booking checks (see gigtaxapi.conflicts)
+    longest_tour_days = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL serve LIKE 'prefix%' from the index
+            models.Index(fields=['username_key'], name='musician_username_key_idx',
+                         opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['email_key'], name='musician_email_key_idx',
+                         opclasses=['varchar_pattern_ops']),
+        ]
+
+    def set_lookup_keys(self, user):
+        self.username_key = user.username.lower()
+        self.email_key = user.email.lower()
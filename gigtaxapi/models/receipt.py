@@ -1,5 +1,6 @@
 from django.db import models
 from django.db.models.deletion import CASCADE
+from .fields import CentsField
 
 class Receipt(models.Model):
     musician = models.ForeignKey("Musician", on_delete=CASCADE)
@@ -7,6 +8,13 @@ class Receipt(models.Model):
     business_address = models.CharField(max_length=100)
     description = models.CharField(max_length=150)
     date = models.DateField(auto_now=False, auto_now_add=False)
-    price = models.FloatField()
+    price = CentsField()
     receipt_number = models.CharField(max_length=100)
     category_type = models.ForeignKey("Category", null=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['musician', 'date'], name='receipt_musician_date_idx'),
+            models.Index(
+                fields=['musician', 'category_type', 'date'], name='receipt_musician_cat_date_idx'),
+        ]
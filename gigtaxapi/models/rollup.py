@@ -0,0 +1,42 @@
+from django.db import models
+from django.db.models.deletion import CASCADE
+from .fields import CentsField
+
+class MonthlyRollup(models.Model):
+    """Running income and mileage totals for one musician and month"""
+    musician = models.ForeignKey("Musician", on_delete=CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    gig_count = models.IntegerField(default=0)
+    gig_income = CentsField(default=0)
+    gig_mileage = models.IntegerField(default=0)
+    tour_count = models.IntegerField(default=0)
+    tour_income = CentsField(default=0)
+    per_diem = CentsField(default=0)
+    tour_mileage = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['musician', 'year', 'month'], name='unique_monthly_rollup'),
+        ]
+
+class MonthlyExpenseRollup(models.Model):
+    """Running receipt totals for one musician, month and category"""
+    musician = models.ForeignKey("Musician", on_delete=CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    category_type = models.ForeignKey("Category", null=True, on_delete=models.SET_NULL)
+    count = models.IntegerField(default=0)
+    total = CentsField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['musician', 'year', 'month', 'category_type'],
+                name='unique_monthly_expense_rollup'),
+            # NULLs never clash, so the uncategorised rows need their own
+            models.UniqueConstraint(
+                fields=['musician', 'year', 'month'], condition=models.Q(category_type__isnull=True),
+                name='unique_uncategorised_expense_rollup'),
+        ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.db.models.deletion import CASCADE
+from .fields import CentsField
 
 class Tour(models.Model):
     musician = models.ForeignKey("Musician", on_delete=CASCADE)
@@ -7,10 +8,16 @@ class Tour(models.Model):
     tour_departure_address = models.CharField(max_length=100)
     tour_description = models.CharField(max_length=150)
     number_of_gigs = models.IntegerField()
-    per_diem = models.FloatField()
+    per_diem = CentsField()
     travel_days = models.IntegerField()
-    travel_day_pay = models.FloatField()
+    travel_day_pay = CentsField()
     date_start = models.DateField(auto_now=False, auto_now_add=False)
     date_end = models.DateField(auto_now=False, auto_now_add=False)
-    tour_gig_pay = models.FloatField()
-    mileage = models.IntegerField()
\ No newline at end of file
+    tour_gig_pay = CentsField()
+    mileage = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['musician', 'date_start'], name='tour_musician_start_idx'),
+            models.Index(fields=['musician', 'date_end'], name='tour_musician_end_idx'),
+        ]
@@ -0,0 +1,310 @@
+"""Keyset pagination for the Gig Tax list endpoints"""
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+# Signed 64-bit, the widest integer a query parameter can be bound as
+MIN_INT, MAX_INT = -2 ** 63, 2 ** 63 - 1
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on a composite key such as (date, id)
+
+    Every page is fetched with a single `WHERE key > cursor ORDER BY key
+    LIMIT page_size + 1` query, so its cost does not depend on how deep into
+    the history the client has paged and no `COUNT(*)` is ever run.
+
+    The ordering comes from the view's `ordering` attribute. Every field in
+    it must share the same direction and the last one must be unique (`id`).
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a single page of results
+
+        Returns:
+            list -- the rows for the requested page
+        """
+        queryset = self.page_queryset(queryset, request, view)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset, for the async read views"""
+        queryset = self.page_queryset(queryset, request, view)
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """Narrow a queryset to the rows of the requested page, plus one
+
+        Returns:
+            QuerySet -- the unevaluated page query
+        """
+        ascending = self.start_page(queryset, request, view)
+        queryset = queryset.order_by(*self.order_fields(ascending))
+        if self.cursor is not None:
+            queryset = queryset.filter(self.seek(self.cursor['position'], after=ascending))
+
+        return queryset[:self.page_size + 1]
+
+    def start_page(self, queryset, request, view=None):
+        """Read the page size and cursor for the request
+
+        Returns:
+            bool -- True when the rows are read in ascending key order
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, 'ordering', self.ordering)
+
+        descending = self.ordering[0].startswith('-')
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+        cursor = self.decode_cursor(request, queryset)
+        self.cursor = cursor
+        self.reverse = cursor is not None and cursor['reverse']
+
+        # Walking backwards means seeking the other way and flipping the page
+        return self.reverse == descending
+
+    def order_fields(self, ascending):
+        if ascending:
+            return list(self.fields)
+        return ['-' + field for field in self.fields]
+
+    def set_page(self, results):
+        """Keep a page of the rows fetched by page_queryset and work out the links"""
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_previous = self.cursor is not None
+            self.has_next = has_more
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        """Wrap a serialized page with its next/previous links
+
+        Returns:
+            Response -- JSON serialized page of results
+        """
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        """Honour ?page_size= up to max_page_size"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[0]), reverse=True)
+
+    def seek(self, position, after=True):
+        """Build the row-value comparison `(a, b) > (x, y)` as portable SQL"""
+        lookup = 'gt' if after else 'lt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            equal = {name: position[i] for i, name in enumerate(self.fields[:index])}
+            equal[f'{field}__{lookup}'] = position[index]
+            condition |= Q(**equal)
+        return condition
+
+    def position(self, item):
+        """Read the ordering key off a model instance or a .values() row"""
+        if isinstance(item, dict):
+            return [item[field] for field in self.fields]
+        return [getattr(item, field) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps(
+            {'p': position, 'r': int(reverse)}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        token = b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, queryset):
+        """Turn the opaque ?cursor= token back into a position
+
+        Each value is converted with its ordering field, so a tampered
+        token is refused here rather than failing in the query.
+
+        Returns:
+            dict -- position and direction, or None for the first page
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if token is None:
+            return None
+
+        try:
+            payload = json.loads(b64decode(token.encode('ascii')).decode('ascii'))
+            position = payload['p']
+            reverse = bool(payload.get('r', 0))
+        except (TypeError, ValueError, KeyError, UnicodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            position = [
+                self.ordering_field(queryset, name).to_python(value)
+                for name, value in zip(self.fields, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None or (isinstance(value, int) and not MIN_INT <= value <= MAX_INT)
+               for value in position):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'position': position, 'reverse': reverse}
+
+    def ordering_field(self, queryset, name):
+        """Find the model field or annotation an ordering name refers to"""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+
+class UnionKeysetPagination(KeysetPagination):
+    """KeysetPagination over the UNION ALL of several querysets
+
+    A combined query cannot be filtered, so the cursor's seek condition is
+    applied to each part. Where the database allows it (not SQLite), each
+    part is also ordered and cut to one page before the union, so every
+    part reads at most a page from its own index and only those rows are
+    merged and sorted.
+
+    The parts must select the same columns, in the same order, and all of
+    the view's ordering fields under the same names.
+    """
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """Return a single page of the merged rows
+
+        Returns:
+            list -- the rows for the requested page
+        """
+        return self.set_page(list(self.page_union(querysets, request, view)))
+
+    def page_union(self, querysets, request, view=None):
+        """Build the UNION ALL query for the rows of the requested page, plus one
+
+        Returns:
+            QuerySet -- the unevaluated page query
+        """
+        ascending = self.start_page(querysets[0], request, view)
+        order = self.order_fields(ascending)
+        limit = self.page_size + 1
+
+        parts = []
+        for queryset in querysets:
+            if self.cursor is not None:
+                queryset = queryset.filter(self.seek(self.cursor['position'], after=ascending))
+            if connections[queryset.db].features.supports_slicing_ordering_in_compound:
+                queryset = queryset.order_by(*order)[:limit]
+            parts.append(queryset)
+
+        first, *rest = parts
+        return first.union(*rest, all=True).order_by(*order)[:limit]
+
+
+class OffsetPagination(BasePagination):
+    """Offset pagination for results that have no stable key, such as ranked matches
+
+    The caller fetches `limit` rows (one more than the page size) from
+    `offset` and hands them to paginate_rows, so no `COUNT(*)` is run.
+    """
+    offset_query_param = 'offset'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    max_offset = 1000
+
+    get_page_size = KeysetPagination.get_page_size
+
+    def prepare(self, request):
+        """Read the page wanted from the query string
+
+        Returns:
+            tuple -- (offset, number of rows to fetch)
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        try:
+            self.offset = max(int(request.query_params.get(self.offset_query_param, 0)), 0)
+        except ValueError:
+            raise NotFound('Invalid offset')
+        if self.offset > self.max_offset:
+            raise NotFound('Invalid offset')
+        return self.offset, self.page_size + 1
+
+    def paginate_rows(self, rows):
+        """Keep a page of the rows fetched for prepare()'s offset and limit"""
+        self.has_next = len(rows) > self.page_size and self.offset + self.page_size <= self.max_offset
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.offset_query_param, self.offset + self.page_size)
+
+    def get_previous_link(self):
+        if not self.offset:
+            return None
+        return replace_query_param(
+            self.base_url, self.offset_query_param, max(self.offset - self.page_size, 0))
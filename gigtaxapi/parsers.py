@@ -0,0 +1,28 @@
+"""Parsers for Gig Tax API request bodies"""
+import io
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from gigtaxapi.renderers import orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes with orjson when it is installed
+
+    Bodies orjson rejects (e.g. NaN, which JSONParser accepts unless
+    STRICT_JSON is set, or a non-UTF-8 charset) are handed to JSONParser,
+    so the same payloads are accepted, and refused, either way.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        if encoding.lower().replace('-', '') == 'utf8':
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
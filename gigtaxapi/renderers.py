@@ -0,0 +1,57 @@
+"""Renderers for Gig Tax API responses and the export formats"""
+import json
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed
+
+    The output parses to the same values as JSONRenderer's compact output.
+    Values orjson has no (or a different) encoding for, such as Decimal and
+    datetime, go through DRF's encoder, and U+2028/U+2029 are escaped as DRF
+    does, so only floats can be spelled differently: orjson writes 1e-6
+    where the stdlib writes 1e-06. Indented output (e.g. for the browsable
+    API) and installs without orjson use JSONRenderer itself.
+    """
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not api_settings.COMPACT_JSON
+                or not api_settings.UNICODE_JSON or not api_settings.STRICT_JSON
+                or self.get_indent(accepted_media_type or '', renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except TypeError:
+            # e.g. integers wider than 64 bits, which the stdlib encoder handles
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class CSVRenderer(BaseRenderer):
+    """Selects CSV for ?format=csv
+
+    Export rows are streamed by the view itself; this only renders the
+    occasional error payload, as a single JSON line.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data) + '\n').encode(self.charset)
+
+
+class JSONLinesRenderer(CSVRenderer):
+    """Selects newline delimited JSON for ?format=jsonl"""
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
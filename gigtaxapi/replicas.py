@@ -0,0 +1,104 @@
+"""Routing of read traffic to read replicas
+
+Writes, and every read outside the views marked with `replica_reads`, go
+to the primary (`default`). The marked views are the gig, tour and receipt
+lists and details, the summary and the export. They read from one of the
+aliases in GIGTAX_DB_ROUTING['REPLICAS'], unless the musician wrote within
+the last STICKY_SECONDS. Their own changes are then read back from the
+primary until the replicas have had time to catch up.
+
+Auth, sessions and the Musician row (which carries the data version that
+ETags and the response cache depend on) are always read from the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from gigtaxapi.versioning import request_version
+
+DEFAULTS = {
+    'REPLICAS': [],
+    'STICKY_SECONDS': 10,
+}
+
+# Apps and models whose reads never leave the primary
+PRIMARY_APPS = {'admin', 'auth', 'authtoken', 'contenttypes', 'sessions'}
+PRIMARY_MODELS = {'gigtaxapi.musician'}
+
+_read_alias = ContextVar('gigtax_read_alias', default=DEFAULT_DB_ALIAS)
+
+
+def db_routing_setting(name):
+    return getattr(settings, 'GIGTAX_DB_ROUTING', {}).get(name, DEFAULTS[name])
+
+
+def read_alias():
+    """The database the current block's data reads are routed to
+
+    A transaction must see its own writes, so inside one this is always
+    the primary.
+    """
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return _read_alias.get()
+
+
+def choose_alias(modified):
+    """Pick where to read a musician's data from
+
+    Returns:
+        str -- a replica alias, or the primary when there are no replicas or
+            the musician last wrote (at `modified`) within STICKY_SECONDS
+    """
+    replicas = db_routing_setting('REPLICAS')
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    sticky = timedelta(seconds=db_routing_setting('STICKY_SECONDS'))
+    if modified is not None and timezone.now() - modified < sticky:
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+@contextmanager
+def reading_from(alias):
+    """Route the reads made inside the block to `alias`"""
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_reads(view_method):
+    """Serve a viewset method's reads from a replica
+
+    The musician's data version is looked up (on the primary, and usually
+    from the cache) first, to apply the read-your-writes window.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with reading_from(choose_alias(request_version(request)[2])):
+            return view_method(self, request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Send reads to the alias chosen by `reading_from` and writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        meta = model._meta
+        if meta.app_label in PRIMARY_APPS or meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
@@ -0,0 +1,158 @@
+"""Per-musician cache of list and summary responses
+
+A response is stored under the musician, the endpoint, its query string,
+the negotiated media type and the musician's data version (see
+gigtaxapi.versioning). Any write bumps the version, including a change to
+the categories or profile a response embeds, so a stale response can
+never be served; the write path also deletes the musician's entries straight
+away rather than leaving them to age out of the cache.
+
+The backend is the `responses` cache alias, so it can be the default
+per-process LRU, a file cache or a shared Redis. Hits and misses are counted
+in the default cache and reported by the `response_cache_stats` command.
+"""
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+from gigtaxapi import versioning
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'responses',
+    'TIMEOUT': 300,
+    'ENABLED': True,
+}
+
+# How many of a musician's entries the write path can find to delete
+MAX_TRACKED_KEYS = 200
+
+HITS_KEY = 'gigtax:response-cache:hits'
+MISSES_KEY = 'gigtax:response-cache:misses'
+
+
+def response_cache_setting(name):
+    return getattr(settings, 'GIGTAX_RESPONSE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _cache():
+    return caches[response_cache_setting('CACHE_ALIAS')]
+
+
+def _index_key(musician_id):
+    return f'gigtax:response:{musician_id}:keys'
+
+
+def cache_key(request, musician_id, version, modified):
+    """Build the cache key for a request
+
+    The write time is included with the version so a database restored to
+    an earlier version cannot pick up responses cached before the restore.
+
+    Returns:
+        str -- a key unique to the musician, data version, URL and media type
+    """
+    params = sorted(request.query_params.lists())
+    accepted = getattr(request, 'accepted_media_type', '')
+    digest = hashlib.sha256(repr((
+        request.get_host(), request.path, params, accepted,
+        modified.timestamp() if modified else None,
+    )).encode('utf-8')).hexdigest()
+    return f'gigtax:response:{musician_id}:{version}:{digest}'
+
+
+def _remember(cache, musician_id, key):
+    # Read-modify-write, so a concurrent store can drop a key from the index.
+    # Such an entry is still unreachable once the version moves on.
+    index_key = _index_key(musician_id)
+    keys = cache.get(index_key) or []
+    if key not in keys:
+        keys = (keys + [key])[-MAX_TRACKED_KEYS:]
+        cache.set(index_key, keys, response_cache_setting('TIMEOUT'))
+
+
+def _count(key):
+    counters = caches['default']
+    try:
+        counters.incr(key)
+    except ValueError:
+        # The first count since the cache started, or the counter was culled
+        counters.set(key, 1, None)
+
+
+def invalidate(*musician_ids):
+    """Delete every cached response belonging to the given musicians"""
+    if not response_cache_setting('ENABLED'):
+        return
+    cache = _cache()
+    for musician_id in musician_ids:
+        index_key = _index_key(musician_id)
+        cache.delete_many((cache.get(index_key) or []) + [index_key])
+
+
+def stats():
+    """Report the hit and miss counters
+
+    Returns:
+        dict -- hits, misses and the hit ratio
+    """
+    counters = caches['default'].get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+def reset_stats():
+    caches['default'].delete_many([HITS_KEY, MISSES_KEY])
+
+
+def lookup(request, musician_id, version, modified):
+    """Fetch a cached response's data, counting the hit or miss
+
+    Returns:
+        object -- the response data, or None on a miss
+    """
+    data = _cache().get(cache_key(request, musician_id, version, modified))
+    _count(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def store(request, musician_id, version, modified, data):
+    """Cache a response's data for later requests at the same version"""
+    cache = _cache()
+    key = cache_key(request, musician_id, version, modified)
+    cache.set(key, data, response_cache_setting('TIMEOUT'))
+    _remember(cache, musician_id, key)
+
+
+def cached_response(view_method):
+    """Serve a viewset method's 200 responses from the response cache
+
+    The cached value is the response data, so a hit skips the queries and
+    serialization but is still rendered for the negotiated media type. The
+    `X-Cache` header says whether it was a HIT or a MISS.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not response_cache_setting('ENABLED'):
+            return view_method(self, request, *args, **kwargs)
+
+        version = versioning.request_version(request)
+        data = lookup(request, *version)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = view_method(self, request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+            store(request, *version, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
@@ -0,0 +1,286 @@
+"""Incremental maintenance of the per-musician monthly rollup tables
+
+Every Gig, Tour and Receipt contributes to exactly one rollup row, picked by
+its musician and the month of its date (a tour's `date_start`). Writes turn
+into deltas against those rows instead of recomputing anything, and
+`rebuild` recomputes them from scratch for the management command.
+"""
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import ExtractMonth, ExtractYear
+from gigtaxapi.models import Gig, MonthlyExpenseRollup, MonthlyRollup, Receipt, Tour
+from gigtaxapi.models.fields import CentsField
+
+# Columns each model needs to work out its contribution
+TRACKED_FIELDS = {
+    Gig: ('musician_id', 'date', 'gig_pay', 'mileage'),
+    Tour: ('musician_id', 'date_start', 'number_of_gigs', 'tour_gig_pay',
+           'travel_days', 'travel_day_pay', 'per_diem', 'mileage'),
+    Receipt: ('musician_id', 'date', 'price', 'category_type_id'),
+}
+
+
+def _clean(instance, name):
+    """Read a field value as its Python type
+
+    Views assign raw request values (date strings, numeric strings) before
+    saving, so they are run back through the model field here.
+    """
+    field = instance._meta.get_field(name)
+    return field.to_python(getattr(instance, field.attname))
+
+
+def contribution(instance):
+    """Work out which rollup row an object feeds and by how much
+
+    Returns:
+        tuple -- (rollup model, lookup dict, values dict)
+    """
+    if isinstance(instance, Gig):
+        date = _clean(instance, 'date')
+        return MonthlyRollup, {
+            'musician_id': instance.musician_id, 'year': date.year, 'month': date.month,
+        }, {
+            'gig_count': 1,
+            'gig_income': _clean(instance, 'gig_pay'),
+            'gig_mileage': _clean(instance, 'mileage'),
+        }
+
+    if isinstance(instance, Tour):
+        date = _clean(instance, 'date_start')
+        number_of_gigs = _clean(instance, 'number_of_gigs')
+        travel_days = _clean(instance, 'travel_days')
+        return MonthlyRollup, {
+            'musician_id': instance.musician_id, 'year': date.year, 'month': date.month,
+        }, {
+            'tour_count': 1,
+            'tour_income': (number_of_gigs * _clean(instance, 'tour_gig_pay')
+                            + travel_days * _clean(instance, 'travel_day_pay')),
+            'per_diem': _clean(instance, 'per_diem') * (number_of_gigs + travel_days),
+            'tour_mileage': _clean(instance, 'mileage'),
+        }
+
+    if isinstance(instance, Receipt):
+        date = _clean(instance, 'date')
+        return MonthlyExpenseRollup, {
+            'musician_id': instance.musician_id, 'year': date.year, 'month': date.month,
+            'category_type_id': instance.category_type_id,
+        }, {
+            'count': 1,
+            'total': _clean(instance, 'price'),
+        }
+
+    raise TypeError(f'{type(instance).__name__} does not feed a rollup')
+
+
+class RollupDelta:
+    """Accumulates contributions and applies them as one UPDATE per row
+
+    Adding the old version of an object with sign -1 and the new one with
+    sign +1 moves its totals between months (or just applies the amount
+    difference when the month is unchanged).
+    """
+
+    def __init__(self):
+        self.changes = defaultdict(lambda: defaultdict(int))
+
+    def add(self, instance, sign=1):
+        rollup_model, lookup, values = contribution(instance)
+        return self.add_values(rollup_model, lookup, values, sign)
+
+    def add_values(self, rollup_model, lookup, values, sign=1):
+        key = (rollup_model, tuple(sorted(lookup.items())))
+        for name, value in values.items():
+            self.changes[key][name] += sign * value
+        return self
+
+    def remove(self, instance):
+        return self.add(instance, sign=-1)
+
+    def apply(self):
+        with transaction.atomic():
+            for (rollup_model, lookup), values in self.changes.items():
+                values = {name: value for name, value in values.items() if value}
+                if values:
+                    _apply_row(rollup_model, dict(lookup), values)
+        self.changes.clear()
+
+
+def _increments(rollup_model, values):
+    # The increment takes the column's field so money is sent as cents
+    return {
+        name: F(name) + Value(value, output_field=rollup_model._meta.get_field(name))
+        for name, value in values.items()
+    }
+
+
+def _apply_row(rollup_model, lookup, values):
+    updated = rollup_model.objects.filter(**lookup).update(**_increments(rollup_model, values))
+    if updated:
+        return
+
+    # Only new rows are created. A removal that finds no row means the rollup
+    # is going away with its musician, or has drifted and needs a rebuild.
+    if not any(value > 0 for name, value in values.items() if name.endswith('count')):
+        return
+
+    try:
+        with transaction.atomic():
+            rollup_model.objects.create(**lookup, **values)
+    except IntegrityError:
+        # Another request created the row first
+        rollup_model.objects.filter(**lookup).update(**_increments(rollup_model, values))
+
+
+def load_previous(instance):
+    """Fetch the stored version of an object that is about to be saved
+
+    Returns:
+        Model -- the row as it is in the database, or None for new objects
+    """
+    if instance.pk is None:
+        return None
+    model = type(instance)
+    return model.objects.filter(pk=instance.pk).only(*TRACKED_FIELDS[model]).first()
+
+
+def fold_category(category_id):
+    """Move a deleted category's expense rows into the uncategorised bucket"""
+    delta = RollupDelta()
+    rows = MonthlyExpenseRollup.objects.filter(category_type_id=category_id)
+    for row in rows:
+        delta.add_values(MonthlyExpenseRollup, {
+            'musician_id': row.musician_id, 'year': row.year, 'month': row.month,
+            'category_type_id': None,
+        }, {'count': row.count, 'total': row.total})
+
+    with transaction.atomic():
+        rows.delete()
+        delta.apply()
+
+
+def compute(musician_ids=None):
+    """Recompute every rollup row from the source tables in SQL
+
+    Returns:
+        tuple -- (monthly rows, expense rows) as dicts keyed by rollup key
+    """
+    gigs = Gig.objects.all()
+    tours = Tour.objects.all()
+    receipts = Receipt.objects.all()
+    if musician_ids is not None:
+        gigs = gigs.filter(musician_id__in=musician_ids)
+        tours = tours.filter(musician_id__in=musician_ids)
+        receipts = receipts.filter(musician_id__in=musician_ids)
+
+    monthly = defaultdict(dict)
+    for row in gigs.annotate(year=ExtractYear('date'), month=ExtractMonth('date')).values(
+            'musician_id', 'year', 'month').annotate(
+                gig_count=Count('id'), gig_income=Sum('gig_pay'), gig_mileage=Sum('mileage')):
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'))
+        monthly[key].update(row)
+
+    for row in tours.annotate(year=ExtractYear('date_start'), month=ExtractMonth('date_start')).values(
+            'musician_id', 'year', 'month').annotate(
+                tour_count=Count('id'),
+                tour_income=Sum(
+                    F('number_of_gigs') * F('tour_gig_pay') + F('travel_days') * F('travel_day_pay'),
+                    output_field=CentsField()),
+                per_diem=Sum(
+                    F('per_diem') * (F('number_of_gigs') + F('travel_days')),
+                    output_field=CentsField()),
+                tour_mileage=Sum('mileage')):
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'))
+        monthly[key].update(row)
+
+    expenses = {}
+    for row in receipts.annotate(year=ExtractYear('date'), month=ExtractMonth('date')).values(
+            'musician_id', 'year', 'month', 'category_type_id').annotate(
+                count=Count('id'), total=Sum('price')):
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'), row.pop('category_type_id'))
+        expenses[key] = row
+
+    return monthly, expenses
+
+
+def rebuild(musician_ids=None):
+    """Replace the stored rollups with freshly computed ones
+
+    Returns:
+        tuple -- number of (monthly, expense) rows written
+    """
+    monthly, expenses = compute(musician_ids)
+
+    with transaction.atomic():
+        monthly_rows = MonthlyRollup.objects.all()
+        expense_rows = MonthlyExpenseRollup.objects.all()
+        if musician_ids is not None:
+            monthly_rows = monthly_rows.filter(musician_id__in=musician_ids)
+            expense_rows = expense_rows.filter(musician_id__in=musician_ids)
+        monthly_rows.delete()
+        expense_rows.delete()
+
+        MonthlyRollup.objects.bulk_create([
+            MonthlyRollup(musician_id=musician_id, year=year, month=month, **values)
+            for (musician_id, year, month), values in monthly.items()
+        ], batch_size=500)
+        MonthlyExpenseRollup.objects.bulk_create([
+            MonthlyExpenseRollup(
+                musician_id=musician_id, year=year, month=month,
+                category_type_id=category_type_id, **values)
+            for (musician_id, year, month, category_type_id), values in expenses.items()
+        ], batch_size=500)
+
+    return len(monthly), len(expenses)
+
+
+def verify(musician_ids=None):
+    """Compare the stored rollups with freshly computed ones
+
+    Returns:
+        list -- a description of every row that differs
+    """
+    monthly, expenses = compute(musician_ids)
+    problems = []
+
+    stored_monthly = MonthlyRollup.objects.all()
+    stored_expenses = MonthlyExpenseRollup.objects.all()
+    if musician_ids is not None:
+        stored_monthly = stored_monthly.filter(musician_id__in=musician_ids)
+        stored_expenses = stored_expenses.filter(musician_id__in=musician_ids)
+
+    value_fields = ('gig_count', 'gig_income', 'gig_mileage', 'tour_count',
+                    'tour_income', 'per_diem', 'tour_mileage')
+    stored = {}
+    for row in stored_monthly.values('musician_id', 'year', 'month', *value_fields):
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'))
+        stored[key] = _add_rows(stored.get(key), row)
+    problems.extend(_compare('monthly', monthly, stored, value_fields))
+
+    stored = {}
+    for row in stored_expenses.values('musician_id', 'year', 'month', 'category_type_id', 'count', 'total'):
+        key = (row.pop('musician_id'), row.pop('year'), row.pop('month'), row.pop('category_type_id'))
+        stored[key] = _add_rows(stored.get(key), row)
+    problems.extend(_compare('expense', expenses, stored, ('count', 'total')))
+
+    return problems
+
+
+def _add_rows(existing, row):
+    # Summed, so a duplicated row shows up as a wrong total
+    if existing is None:
+        return row
+    return {name: existing[name] + value for name, value in row.items()}
+
+
+def _compare(label, expected, stored, value_fields):
+    problems = []
+    for key in sorted(set(expected) | set(stored), key=str):
+        want = expected.get(key, {})
+        have = stored.get(key, {})
+        for name in value_fields:
+            if (want.get(name) or 0) != (have.get(name) or 0):
+                problems.append(
+                    f'{label} {key}: {name} is {have.get(name) or 0}, expected {want.get(name) or 0}')
+    return problems
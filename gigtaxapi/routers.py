@@ -0,0 +1,15 @@
+"""URL routing for the Gig Tax viewsets"""
+from rest_framework import routers
+
+
+class BulkRouter(routers.DefaultRouter):
+    """DefaultRouter that also routes DELETE on a list URL to `bulk_destroy`
+
+    Like every other route, the method is only enabled for viewsets that
+    implement the action.
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, 'delete': 'bulk_destroy'})
+        if isinstance(route, routers.Route) and route.name == '{basename}-list' else route
+        for route in routers.DefaultRouter.routes
+    ]
@@ -0,0 +1,238 @@
+"""Full-text index over a musician's gigs, tours and receipts
+
+Every searchable row has one entry in the `gigtaxapi_search` table, keyed by
+an id that packs the record's kind and primary key together. On SQLite the
+table is an FTS5 virtual table, on PostgreSQL a table with a GIN-indexed
+`tsvector`. The entries are written by the save/delete receivers and the
+bulk write paths, and `rebuild` fills the table from scratch.
+
+Queries match every word the user typed as a prefix ("rym" finds "Ryman"),
+with English stemming, and are ranked by relevance (bm25 on SQLite,
+ts_rank on PostgreSQL).
+"""
+import re
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, connections
+
+TABLE = 'gigtaxapi_search'
+
+# Kind -> (model name, indexed columns). The kind's position is its code in entry ids.
+SEARCHABLE = {
+    'gig': ('Gig', ('artist', 'location_name', 'gig_description')),
+    'tour': ('Tour', ('artist', 'tour_description')),
+    'receipt': ('Receipt', ('business_name', 'description')),
+}
+KIND_CODES = {kind: code for code, kind in enumerate(SEARCHABLE, 1)}
+KINDS = {code: kind for kind, code in KIND_CODES.items()}
+CODE_BITS = 2
+
+MAX_TERMS = 16
+BATCH_SIZE = 500
+
+
+class SearchUnavailable(Exception):
+    """The database has no full-text search support here"""
+
+
+def entry_id(kind, pk):
+    return (pk << CODE_BITS) | KIND_CODES[kind]
+
+
+def split_entry_id(value):
+    """Returns: tuple -- (kind, primary key)"""
+    return KINDS[value & ((1 << CODE_BITS) - 1)], value >> CODE_BITS
+
+
+def kind_of(model):
+    """The search kind for a model class, or None if it is not indexed"""
+    name = model._meta.object_name
+    for kind, (model_name, _) in SEARCHABLE.items():
+        if model_name == name and model._meta.app_label == 'gigtaxapi':
+            return kind
+    return None
+
+
+def query_terms(text):
+    """Split what the user typed into at most MAX_TERMS lowercase words"""
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+class SQLiteIndex:
+    """An FTS5 table of (owner, body), with the entry id as its rowid
+
+    `owner` holds a token per musician, so a search only walks the
+    musician's own entries.
+    """
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5(owner, body, tokenize='porter unicode61')")
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def delete(self, cursor, ids):
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({', '.join(['%s'] * len(ids))})", ids)
+
+    def write(self, cursor, entries):
+        self.delete(cursor, [pk for pk, _, _ in entries])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, owner, body) VALUES (%s, %s, %s)',
+            [(pk, f'm{musician_id}', body) for pk, musician_id, body in entries])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+    def search(self, cursor, musician_id, terms, limit, offset):
+        prefixes = ' '.join(f'"{term}"*' for term in terms)
+        match = f'owner:m{musician_id} AND body:({prefixes})'
+        cursor.execute(
+            f'SELECT rowid, -bm25({TABLE}, 0, 1) AS score FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY score DESC, rowid LIMIT %s OFFSET %s', [match, limit, offset])
+        return cursor.fetchall()
+
+
+class PostgresIndex:
+    """A table of (id, musician_id, document tsvector) with a GIN index"""
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (id bigint PRIMARY KEY, musician_id bigint NOT NULL, '
+            f'document tsvector NOT NULL)')
+        cursor.execute(f'CREATE INDEX {TABLE}_document ON {TABLE} USING GIN (document)')
+        cursor.execute(f'CREATE INDEX {TABLE}_musician ON {TABLE} (musician_id)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def delete(self, cursor, ids):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE id = ANY(%s)', [list(ids)])
+
+    def write(self, cursor, entries):
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (id, musician_id, document) VALUES (%s, %s, to_tsvector('english', %s)) "
+            f'ON CONFLICT (id) DO UPDATE SET musician_id = EXCLUDED.musician_id, document = EXCLUDED.document',
+            entries)
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {TABLE}')
+
+    def search(self, cursor, musician_id, terms, limit, offset):
+        cursor.execute(
+            f"SELECT id, ts_rank(document, query) FROM {TABLE}, to_tsquery('english', %s) query "
+            f'WHERE musician_id = %s AND document @@ query '
+            f'ORDER BY 2 DESC, id LIMIT %s OFFSET %s',
+            [' & '.join(f'{term}:*' for term in terms), musician_id, limit, offset])
+        return cursor.fetchall()
+
+
+INDEXES = {
+    'sqlite': SQLiteIndex(),
+    'postgresql': PostgresIndex(),
+}
+
+
+def _index(connection):
+    return INDEXES.get(connection.vendor)
+
+
+def create_table(connection):
+    index = _index(connection)
+    if index is not None:
+        with connection.cursor() as cursor:
+            index.create(cursor)
+
+
+def drop_table(connection):
+    index = _index(connection)
+    if index is not None:
+        with connection.cursor() as cursor:
+            index.drop(cursor)
+
+
+def _entries(kind, queryset):
+    """Read (entry id, musician id, text) for each row of a queryset"""
+    _, fields = SEARCHABLE[kind]
+    for row in queryset.values_list('id', 'musician_id', *fields).iterator(chunk_size=BATCH_SIZE):
+        pk, musician_id, *values = row
+        yield entry_id(kind, pk), musician_id, ' '.join(value for value in values if value)
+
+
+def _write(kind, queryset, using):
+    connection = connections[using]
+    index = _index(connection)
+    if index is None:
+        return 0
+    written = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for entry in _entries(kind, queryset):
+            batch.append(entry)
+            if len(batch) == BATCH_SIZE:
+                index.write(cursor, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            index.write(cursor, batch)
+            written += len(batch)
+    return written
+
+
+def index_records(model, ids, using=DEFAULT_DB_ALIAS):
+    """(Re)write the entries of some gigs, tours or receipts"""
+    kind = kind_of(model)
+    if kind is not None and ids:
+        _write(kind, model._base_manager.using(using).filter(pk__in=list(ids)), using)
+
+
+def index_changed(model, ids, columns, using=DEFAULT_DB_ALIAS):
+    """Reindex rows after an UPDATE, if it touched any indexed column"""
+    kind = kind_of(model)
+    if kind is not None and set(columns) & set(SEARCHABLE[kind][1] + ('musician_id',)):
+        index_records(model, ids, using)
+
+
+def remove_records(model, ids, using=DEFAULT_DB_ALIAS):
+    """Drop the entries of deleted gigs, tours or receipts"""
+    kind = kind_of(model)
+    connection = connections[using]
+    index = _index(connection)
+    if kind is None or index is None or not ids:
+        return
+    with connection.cursor() as cursor:
+        index.delete(cursor, [entry_id(kind, pk) for pk in ids])
+
+
+def rebuild(apps=global_apps, using=DEFAULT_DB_ALIAS):
+    """Empty the index and fill it again from every gig, tour and receipt
+
+    Returns:
+        int -- the number of entries written
+    """
+    connection = connections[using]
+    index = _index(connection)
+    if index is None:
+        return 0
+    with connection.cursor() as cursor:
+        index.clear(cursor)
+    return sum(
+        _write(kind, apps.get_model('gigtaxapi', model_name)._base_manager.using(using), using)
+        for kind, (model_name, _) in SEARCHABLE.items())
+
+
+def search(musician_id, text, limit, offset=0, using=DEFAULT_DB_ALIAS):
+    """Find a musician's records matching every word in `text`
+
+    Returns:
+        list -- (kind, primary key, rank) tuples, best match first
+    """
+    terms = query_terms(text)
+    if not terms:
+        return []
+    connection = connections[using]
+    index = _index(connection)
+    if index is None:
+        raise SearchUnavailable(f'Full-text search is not supported on {connection.vendor}')
+    with connection.cursor() as cursor:
+        rows = index.search(cursor, musician_id, terms, limit, offset)
+    return [split_entry_id(pk) + (rank,) for pk, rank in rows]
@@ -0,0 +1,155 @@
+"""Signal receivers that keep derived data in step with gigs, tours and receipts"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from gigtaxapi.models import Category, Gig, Musician, Receipt, Tour
+from gigtaxapi import authentication, bulk, categories, conflicts, rollups, search, versioning
+
+
+@receiver(pre_save, sender=Gig)
+@receiver(pre_save, sender=Tour)
+@receiver(pre_save, sender=Receipt)
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Keep the stored row so post_save can diff old and new values"""
+    if not raw:
+        instance._rollup_previous = rollups.load_previous(instance)
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_save, sender=Tour)
+@receiver(post_save, sender=Receipt)
+def apply_saved(sender, instance, created, raw=False, **kwargs):
+    """Move a saved object's totals into its (possibly new) month"""
+    if raw:
+        return
+
+    delta = rollups.RollupDelta()
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        delta.remove(previous)
+    delta.add(instance)
+    delta.apply()
+
+    versioning.bump(instance.musician_id, previous.musician_id if previous is not None else None)
+    instance._rollup_previous = None
+
+
+@receiver(post_delete, sender=Gig)
+@receiver(post_delete, sender=Tour)
+@receiver(post_delete, sender=Receipt)
+def apply_deleted(sender, instance, **kwargs):
+    """Take a deleted object's totals back out of its month"""
+    pending = bulk.pending_delta()
+    if pending is not None:
+        # Part of a bulk delete, which applies the delta and bumps the version
+        pending.remove(instance)
+        return
+
+    rollups.RollupDelta().remove(instance).apply()
+    versioning.bump(instance.musician_id)
+
+
+@receiver(post_save, sender=Gig)
+@receiver(post_save, sender=Tour)
+@receiver(post_save, sender=Receipt)
+def index_saved(sender, instance, **kwargs):
+    """Rewrite a saved object's search entry"""
+    search.index_records(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Tour)
+def note_tour_span(sender, instance, raw=False, **kwargs):
+    """Widen the musician's longest tour, which bounds the conflict checks"""
+    if not raw:
+        conflicts.note_created(sender, [instance])
+
+
+@receiver(post_delete, sender=Gig)
+@receiver(post_delete, sender=Tour)
+@receiver(post_delete, sender=Receipt)
+def unindex_deleted(sender, instance, **kwargs):
+    """Drop a deleted object's search entry"""
+    search.remove_records(sender, [instance.pk])
+
+
+@receiver(pre_delete, sender=Category)
+def fold_deleted_category(sender, instance, **kwargs):
+    """Receipts fall back to no category, and so do their rollups"""
+    rollups.fold_category(instance.pk)
+    versioning.bump(*Receipt.objects.filter(category_type_id=instance.pk).values_list(
+        'musician_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Category)
+def bump_category_holders(sender, instance, created, raw=False, **kwargs):
+    """Responses embed category labels, so a renamed category changes them"""
+    if not created and not raw:
+        versioning.bump(*Receipt.objects.filter(category_type_id=instance.pk).values_list(
+            'musician_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def refresh_categories(sender, instance, raw=False, **kwargs):
+    """Reload the category catalogue on next use, once the change is visible"""
+    categories.registry.clear()
+    transaction.on_commit(categories.registry.clear)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    """Deleted or rotated tokens must stop authenticating"""
+    authentication.invalidate_token(instance.key)
+
+
+@receiver(pre_save, sender=Musician)
+def fill_lookup_keys(sender, instance, raw=False, **kwargs):
+    """Copy the user's username and email into the indexed lookup columns"""
+    if not raw and instance.user_id is not None:
+        instance.set_lookup_keys(instance.user)
+
+
+@receiver(post_save, sender=User)
+def refresh_lookup_keys(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """A renamed user or changed email must be found under the new one"""
+    if update_fields is not None and not {'username', 'email'} & set(update_fields):
+        return
+    if not created and not raw:
+        Musician.objects.filter(user_id=instance.pk).update(
+            username_key=instance.username.lower(), email_key=instance.email.lower())
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, raw=False, **kwargs):
+    """Deactivated users lose their cached tokens"""
+    if not created and not raw:
+        authentication.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def bump_user_profile(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """?expand=musician embeds the user's name and email"""
+    if update_fields is not None and not {'username', 'first_name', 'last_name', 'email'} & set(update_fields):
+        return
+    if not created and not raw:
+        versioning.bump(*Musician.objects.filter(user_id=instance.pk).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Musician)
+def bump_musician_profile(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """?expand=musician embeds the musician's address"""
+    if update_fields is not None and not {'address', 'user'} & set(update_fields):
+        return
+    if not created and not raw:
+        versioning.bump(instance.pk)
+
+
+@receiver(post_save, sender=Musician)
+@receiver(post_delete, sender=Musician)
+def forget_musician_tokens(sender, instance, raw=False, **kwargs):
+    """Cached tokens carry the musician id, so drop them when it changes"""
+    if not raw:
+        authentication.invalidate_user(instance.user_id)
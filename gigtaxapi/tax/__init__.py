@@ -0,0 +1,8 @@
+"""Estimated-tax engine for a musician's self-employment income
+
+`tables` holds the versioned federal tax tables, `engine` the arithmetic of
+the quarterly installments and `estimates` the stored, incrementally
+refreshed results.
+"""
+from .estimates import estimate_payload, refresh
+from .tables import FILING_STATUSES, YEARS, table_for
@@ -0,0 +1,135 @@
+"""Quarterly estimated tax by the annualized income installment method
+
+The year is split into the four estimate periods (January-March, April-May,
+June-August, September-December). For each one the profit so far this year
+is annualized, the year's self-employment and income tax is worked out on
+it, and the cumulative share of that tax due by the period's deadline
+(22.5%, 45%, 67.5% and 90%) less the earlier installments is the payment
+for the quarter.
+
+Profit is gig and tour income plus per diems, less receipts and the
+standard mileage deduction. Only the standard deduction is taken; credits,
+other income and the qualified business income deduction are not modelled.
+Everything here is plain arithmetic on Decimals; gigtaxapi.tax.estimates
+feeds it the monthly rollups and stores the results.
+"""
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from .tables import (ADDITIONAL_MEDICARE_RATE, ADDITIONAL_MEDICARE_THRESHOLD, MEDICARE_RATE,
+                     SE_EARNINGS_FACTOR, SE_MINIMUM_EARNINGS, SOCIAL_SECURITY_RATE)
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+# (quarter, first month, last month, annualization factor, share of the year's tax due)
+PERIODS = (
+    (1, 1, 3, Decimal('4'), Decimal('0.225')),
+    (2, 4, 5, Decimal('2.4'), Decimal('0.45')),
+    (3, 6, 8, Decimal('1.5'), Decimal('0.675')),
+    (4, 9, 12, Decimal('1'), Decimal('0.90')),
+)
+
+# Quarter -> (month, day) of the deadline; the fourth falls in the next year
+DUE_DATES = {1: (4, 15), 2: (6, 15), 3: (9, 15), 4: (1, 15)}
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def period_dates(year, quarter):
+    """Returns: tuple -- (first day, last day, due date) of an estimate period"""
+    _, first_month, last_month, _, _ = PERIODS[quarter - 1]
+    next_month = date(year + 1, 1, 1) if last_month == 12 else date(year, last_month + 1, 1)
+    due_month, due_day = DUE_DATES[quarter]
+    due = date(year + 1 if quarter == 4 else year, due_month, due_day)
+    return date(year, first_month, 1), date.fromordinal(next_month.toordinal() - 1), due
+
+
+def self_employment_tax(net_profit, table, filing_status):
+    """Social security and Medicare tax on a year's self-employment profit
+
+    Returns:
+        tuple -- (the tax, the half of it that is deducted from income)
+    """
+    earnings = net_profit * SE_EARNINGS_FACTOR
+    if earnings < SE_MINIMUM_EARNINGS:
+        return ZERO, ZERO
+    social_security = min(earnings, table['social_security_wage_base']) * SOCIAL_SECURITY_RATE
+    medicare = earnings * MEDICARE_RATE
+    additional = max(earnings - ADDITIONAL_MEDICARE_THRESHOLD[filing_status], 0) * ADDITIONAL_MEDICARE_RATE
+    return money(social_security + medicare + additional), money((social_security + medicare) / 2)
+
+
+def income_tax(taxable_income, table, filing_status):
+    """Tax on a year's taxable income through the filing status's brackets"""
+    tax = ZERO
+    lower = 0
+    for upper, rate in table['brackets'][filing_status]:
+        if taxable_income <= lower:
+            break
+        top = taxable_income if upper is None else min(taxable_income, upper)
+        tax += (top - lower) * Decimal(rate)
+        if upper is None:
+            break
+        lower = upper
+    return money(tax)
+
+
+def annual_tax(net_profit, table, filing_status):
+    """Returns: tuple -- (self-employment tax, income tax) for a year's profit"""
+    se_tax, se_deduction = self_employment_tax(net_profit, table, filing_status)
+    taxable = max(net_profit - se_deduction - table['standard_deduction'][filing_status], ZERO)
+    return se_tax, income_tax(taxable, table, filing_status)
+
+
+def totals(months, first_month, last_month, table):
+    """Add up the monthly inputs of a run of months
+
+    Arguments:
+        months -- month number -> (income, expenses, miles)
+
+    Returns:
+        dict -- income, expenses, mileage_deduction and net_profit
+    """
+    income = expenses = ZERO
+    miles = 0
+    for month in range(first_month, last_month + 1):
+        month_income, month_expenses, month_miles = months.get(month, (ZERO, ZERO, 0))
+        income += month_income
+        expenses += month_expenses
+        miles += month_miles
+    mileage_deduction = money(miles * Decimal(table['mileage_rate']))
+    return {
+        'income': money(income),
+        'expenses': money(expenses),
+        'mileage_deduction': mileage_deduction,
+        'net_profit': money(income - expenses - mileage_deduction),
+    }
+
+
+def quarter_estimate(months, quarter, table, filing_status, paid_before):
+    """Work out one quarter's estimated payment
+
+    Arguments:
+        months -- month number -> (income, expenses, miles) for the year
+        paid_before -- the installments of the earlier quarters
+
+    Returns:
+        dict -- the period's own totals, the annualized profit and tax, and the installment
+    """
+    _, first_month, last_month, factor, share = PERIODS[quarter - 1]
+    period = totals(months, first_month, last_month, table)
+    year_to_date = totals(months, 1, last_month, table)
+
+    annualized_profit = money(max(year_to_date['net_profit'], ZERO) * factor)
+    se_tax, tax = annual_tax(annualized_profit, table, filing_status)
+    required = money((se_tax + tax) * share)
+
+    return dict(
+        period,
+        annualized_profit=annualized_profit,
+        self_employment_tax=se_tax,
+        income_tax=tax,
+        installment=max(required - paid_before, ZERO),
+    )
@@ -0,0 +1,120 @@
+"""Stored quarterly estimates, recomputed only when their inputs change
+
+A quarter's estimate depends on the months from January to the end of its
+period, the tax table and the filing status. Those are hashed into a
+fingerprint, which is compared with the stored row's: a quarter whose
+inputs are unchanged is read back as it is, and only the quarters from the
+first changed month onwards are recomputed and written.
+
+The inputs come from the monthly rollups (see gigtaxapi.rollups), so a
+refresh reads at most twelve income rows and the expense months per
+musician rather than every gig, tour and receipt, and many musicians can
+be refreshed together by the `compute_estimates` command.
+"""
+import hashlib
+from collections import defaultdict
+from django.db.models import Sum
+from django.utils import timezone
+from gigtaxapi.models import MonthlyExpenseRollup, MonthlyRollup, QuarterlyEstimate
+from . import engine
+from .tables import table_for
+
+RESULT_FIELDS = ('income', 'expenses', 'mileage_deduction', 'net_profit', 'annualized_profit',
+                 'self_employment_tax', 'income_tax', 'installment')
+
+
+def monthly_inputs(musician_ids, year):
+    """Read the year's monthly income, expenses and mileage of some musicians
+
+    Returns:
+        dict -- musician id -> {month: (income, expenses, miles)}
+    """
+    months = defaultdict(lambda: defaultdict(lambda: [engine.ZERO, engine.ZERO, 0]))
+
+    for musician_id, month, gig_income, tour_income, per_diem, gig_miles, tour_miles in (
+            MonthlyRollup.objects.filter(musician_id__in=musician_ids, year=year).values_list(
+                'musician_id', 'month', 'gig_income', 'tour_income', 'per_diem',
+                'gig_mileage', 'tour_mileage')):
+        entry = months[musician_id][month]
+        entry[0] += gig_income + tour_income + per_diem
+        entry[2] += gig_miles + tour_miles
+
+    for row in (MonthlyExpenseRollup.objects.filter(musician_id__in=musician_ids, year=year)
+                .values('musician_id', 'month').annotate(month_total=Sum('total')).order_by()):
+        months[row['musician_id']][row['month']][1] += row['month_total'] or engine.ZERO
+
+    return {
+        musician_id: {month: tuple(values) for month, values in by_month.items()}
+        for musician_id, by_month in months.items()
+    }
+
+
+def fingerprint(months, last_month, table, filing_status):
+    """Identify everything a quarter ending with `last_month` is worked out from"""
+    parts = [table['version'], filing_status]
+    for month in range(1, last_month + 1):
+        income, expenses, miles = months.get(month, (engine.ZERO, engine.ZERO, 0))
+        parts.append(f'{month}:{engine.money(income)}:{engine.money(expenses)}:{miles}')
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def refresh(musician_ids, year, filing_status='single'):
+    """Bring the stored estimates of some musicians up to date
+
+    Returns:
+        tuple -- (musician id -> its four QuarterlyEstimate rows, number of quarters recomputed)
+    """
+    table = table_for(year)
+    inputs = monthly_inputs(musician_ids, year)
+    stored = {
+        (row.musician_id, row.quarter): row
+        for row in QuarterlyEstimate.objects.filter(
+            musician_id__in=musician_ids, year=year, filing_status=filing_status)
+    }
+
+    now = timezone.now()
+    changed = []
+    estimates = {}
+    for musician_id in musician_ids:
+        months = inputs.get(musician_id, {})
+        paid = engine.ZERO
+        rows = []
+        for quarter, _, last_month, _, _ in engine.PERIODS:
+            key = fingerprint(months, last_month, table, filing_status)
+            row = stored.get((musician_id, quarter))
+            if row is None or row.fingerprint != key:
+                values = engine.quarter_estimate(months, quarter, table, filing_status, paid)
+                row = QuarterlyEstimate(
+                    musician_id=musician_id, year=year, quarter=quarter, filing_status=filing_status,
+                    tables_version=table['version'], fingerprint=key, computed_at=now, **values)
+                changed.append(row)
+            paid += row.installment
+            rows.append(row)
+        estimates[musician_id] = rows
+
+    if changed:
+        # One upsert, so concurrent refreshes of the same quarter cannot collide.
+        # bulk_create(update_conflicts=...) needs Django 4.1+ (Pipfile pins 4.2)
+        QuarterlyEstimate.objects.bulk_create(
+            changed, update_conflicts=True,
+            unique_fields=['musician', 'year', 'filing_status', 'quarter'],
+            update_fields=list(RESULT_FIELDS) + ['tables_version', 'fingerprint', 'computed_at'])
+    return estimates, len(changed)
+
+
+def estimate_payload(rows, year, filing_status):
+    """Shape a musician's four estimates into the /estimates response"""
+    table = table_for(year)
+    quarters = []
+    for row in rows:
+        period_start, period_end, due_date = engine.period_dates(year, row.quarter)
+        quarters.append(dict(
+            {name: str(engine.money(getattr(row, name))) for name in RESULT_FIELDS},
+            quarter=row.quarter, period_start=period_start, period_end=period_end, due_date=due_date))
+    return {
+        'year': year,
+        'filing_status': filing_status,
+        'tables': table['version'],
+        'quarters': quarters,
+        'total': str(sum((engine.money(row.installment) for row in rows), engine.ZERO)),
+    }
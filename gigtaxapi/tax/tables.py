@@ -0,0 +1,85 @@
+"""Federal tax tables used by the estimate engine, one per tax year
+
+Every table carries a `version`. Estimates remember the version they were
+worked out with, so correcting a table (and bumping its version) makes the
+affected quarters recompute on their next refresh.
+
+Brackets are `(upper bound of taxable income, rate)` pairs, the last with
+no bound. Amounts are whole dollars, rates and the mileage rate Decimals.
+"""
+from decimal import Decimal
+
+FILING_STATUSES = ('single', 'married_joint')
+
+# Self-employment tax: the share of net profit it applies to, and its rates
+SE_EARNINGS_FACTOR = Decimal('0.9235')
+SE_MINIMUM_EARNINGS = 400
+SOCIAL_SECURITY_RATE = Decimal('0.124')
+MEDICARE_RATE = Decimal('0.029')
+ADDITIONAL_MEDICARE_RATE = Decimal('0.009')
+ADDITIONAL_MEDICARE_THRESHOLD = {'single': 200000, 'married_joint': 250000}
+
+TABLES = {
+    2023: {
+        'version': '2023.1',
+        'standard_deduction': {'single': 13850, 'married_joint': 27700},
+        'brackets': {
+            'single': ((11000, '0.10'), (44725, '0.12'), (95375, '0.22'), (182100, '0.24'),
+                       (231250, '0.32'), (578125, '0.35'), (None, '0.37')),
+            'married_joint': ((22000, '0.10'), (89450, '0.12'), (190750, '0.22'), (364200, '0.24'),
+                              (462500, '0.32'), (693750, '0.35'), (None, '0.37')),
+        },
+        'social_security_wage_base': 160200,
+        'mileage_rate': '0.655',
+    },
+    2024: {
+        'version': '2024.1',
+        'standard_deduction': {'single': 14600, 'married_joint': 29200},
+        'brackets': {
+            'single': ((11600, '0.10'), (47150, '0.12'), (100525, '0.22'), (191950, '0.24'),
+                       (243725, '0.32'), (609350, '0.35'), (None, '0.37')),
+            'married_joint': ((23200, '0.10'), (94300, '0.12'), (201050, '0.22'), (383900, '0.24'),
+                              (487450, '0.32'), (731200, '0.35'), (None, '0.37')),
+        },
+        'social_security_wage_base': 168600,
+        'mileage_rate': '0.67',
+    },
+    2025: {
+        'version': '2025.2',
+        'standard_deduction': {'single': 15750, 'married_joint': 31500},
+        'brackets': {
+            'single': ((11925, '0.10'), (48475, '0.12'), (103350, '0.22'), (197300, '0.24'),
+                       (250525, '0.32'), (626350, '0.35'), (None, '0.37')),
+            'married_joint': ((23850, '0.10'), (96950, '0.12'), (206700, '0.22'), (394600, '0.24'),
+                              (501050, '0.32'), (751600, '0.35'), (None, '0.37')),
+        },
+        'social_security_wage_base': 176100,
+        'mileage_rate': '0.70',
+    },
+    2026: {
+        'version': '2026.1',
+        'standard_deduction': {'single': 16100, 'married_joint': 32200},
+        'brackets': {
+            'single': ((12400, '0.10'), (50400, '0.12'), (105700, '0.22'), (201775, '0.24'),
+                       (256225, '0.32'), (640600, '0.35'), (None, '0.37')),
+            'married_joint': ((24800, '0.10'), (100800, '0.12'), (211400, '0.22'), (403550, '0.24'),
+                              (512450, '0.32'), (768700, '0.35'), (None, '0.37')),
+        },
+        'social_security_wage_base': 184500,
+        'mileage_rate': '0.725',
+    },
+}
+
+# The years estimates can be worked out for: the published tables, and the
+# year after the latest, which uses its table until its own is added
+YEARS = range(min(TABLES), max(TABLES) + 2)
+
+
+def table_for(year):
+    """The table for a tax year, or the nearest year's when there is none
+
+    Returns:
+        dict -- the table, with `year` set to the year it was published for
+    """
+    published = min(TABLES, key=lambda table_year: (abs(table_year - year), -table_year))
+    return dict(TABLES[published], year=published)
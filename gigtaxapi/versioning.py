@@ -0,0 +1,89 @@
+"""Per-musician data versions for conditional GET
+
+Every write to a musician's gigs, tours or receipts bumps
+`Musician.data_version` and stamps `data_modified`, and so does a change to
+anything the responses embed: the musician's profile and user (see
+?expand=musician) or the label of a category they have receipts in. The pair is cached, so
+working out a response's ETag and Last-Modified usually costs no query, and
+a matching `If-None-Match` is answered with 304 before the view runs.
+"""
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from gigtaxapi import response_cache
+from gigtaxapi.authentication import get_musician_id
+from gigtaxapi.models import Musician
+
+CACHE_ALIAS = 'default'
+CACHE_TIMEOUT = 3600
+
+
+def _cache_key(musician_id):
+    return f'gigtax:version:{musician_id}'
+
+
+def get_version(musician_id):
+    """Look up a musician's current data version
+
+    Returns:
+        tuple -- (version number, datetime of the last write or None)
+    """
+    cache = caches[CACHE_ALIAS]
+    entry = cache.get(_cache_key(musician_id))
+    if entry is None:
+        entry = Musician.objects.filter(pk=musician_id).values_list(
+            'data_version', 'data_modified').first() or (0, None)
+        entry = tuple(entry)
+        cache.set(_cache_key(musician_id), entry, CACHE_TIMEOUT)
+    return entry
+
+
+def bump(*musician_ids):
+    """Record a write to the data of one or more musicians"""
+    musician_ids = {musician_id for musician_id in musician_ids if musician_id is not None}
+    if not musician_ids:
+        return
+
+    Musician.objects.filter(pk__in=musician_ids).update(
+        data_version=F('data_version') + 1, data_modified=timezone.now())
+
+    # Dropped now for this connection and again once the write is visible to
+    # everyone else, so no request can re-cache the old version in between
+    cache = caches[CACHE_ALIAS]
+    keys = [_cache_key(musician_id) for musician_id in musician_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    response_cache.invalidate(*musician_ids)
+
+
+def request_version(request):
+    """The caller's musician id and data version, looked up once per request
+
+    Returns:
+        tuple -- (musician id, version number, datetime of the last write)
+    """
+    if getattr(request, '_data_version', None) is None:
+        musician_id = get_musician_id(request)
+        request._data_version = (musician_id,) + get_version(musician_id)
+    return request._data_version
+
+
+def format_etag(musician_id, version):
+    return f'W/"{musician_id}.{version}"'
+
+
+def data_etag(request, *args, **kwargs):
+    musician_id, version, _ = request_version(request)
+    return format_etag(musician_id, version)
+
+
+def data_last_modified(request, *args, **kwargs):
+    return request_version(request)[2]
+
+
+# Decorates viewset methods whose response only changes with the data version
+conditional_on_version = method_decorator(
+    condition(etag_func=data_etag, last_modified_func=data_last_modified))
@@ -3,4 +3,10 @@ from .gig import GigView
 from .receipt import ReceiptView
 from .tour import TourView
 from .musician import MusicianView
-from .category import CategoryView
\ No newline at end of file
+from .category import CategoryView
+from .summary import SummaryView
+from .export import ExportView
+from .search import SearchView
+from .timeline import TimelineView
+from .conflicts import ConflictView
+from .estimate import EstimateView
@@ -0,0 +1,243 @@
+"""Async versions of the read endpoints, for the ASGI deployment
+
+Under ASGI (see Procfile.asgi and gig_tax_server/urls_async.py) GET and HEAD
+requests for the gig, tour and receipt lists and details, the summary and
+the export are answered by the coroutines below with Django's async ORM.
+A worker then holds a slow client with a suspended coroutine rather than a
+thread. Every other method is passed to the regular DRF viewset.
+
+The coroutines reuse the viewsets' serializers, filters and keyset
+pagination and answer as the sync views do, ETag/304, response cache and
+replica routing included. They always send JSON; the browsable API is only served under
+WSGI.
+"""
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import path
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import exceptions
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from gigtaxapi import response_cache, versioning
+from gigtaxapi.authentication import aauthenticate
+from gigtaxapi.models import MonthlyExpenseRollup, MonthlyRollup
+from gigtaxapi.renderers import CSVRenderer, FastJSONRenderer, JSONLinesRenderer
+from gigtaxapi.replicas import choose_alias, reading_from
+from .export import aexport_rows, line_formatter
+from .gig import GigSerializer, GigView
+from .mixins import filter_date_range
+from .receipt import ReceiptSerializer, ReceiptView
+from .summary import build_summary, expense_totals, monthly_totals
+from .tour import TourSerializer, TourView
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def read_view(handler, sync_view, conditional=True):
+    """Answer GET/HEAD with an async handler and everything else with sync_view
+
+    The handler is called as `handler(request, musician_id, **kwargs)` with
+    a DRF Request wrapping the Django one (for its query_params), and
+    returns a Django response or the data for a JSON one.
+    """
+    sync_view = sync_to_async(sync_view)
+
+    async def view(http_request, *args, **kwargs):
+        if http_request.method not in SAFE_METHODS:
+            return await sync_view(http_request, *args, **kwargs)
+
+        request = Request(http_request)
+        request.accepted_renderer = FastJSONRenderer()
+        request.accepted_media_type = FastJSONRenderer.media_type
+        try:
+            musician_id = await authenticate(http_request)
+            if not conditional:
+                return await handler(request, musician_id, **kwargs)
+            return await conditional_response(handler, request, musician_id, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+
+    view.csrf_exempt = True
+    return view
+
+
+async def authenticate(http_request):
+    entry = await aauthenticate(http_request)
+    if entry is None:
+        raise exceptions.NotAuthenticated()
+    musician_id = entry[1]
+    if musician_id is None:
+        raise exceptions.PermissionDenied('Only musicians can use this resource')
+    http_request.musician_id = musician_id
+    return musician_id
+
+
+def error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = JsonResponse(detail, status=exc.status_code, safe=False)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+async def conditional_response(handler, request, musician_id, **kwargs):
+    """Apply the data-version ETag/Last-Modified the sync views get from condition()"""
+    version, modified = await sync_to_async(versioning.get_version)(musician_id)
+    request._data_version = (musician_id, version, modified)
+    etag = versioning.format_etag(musician_id, version)
+    last_modified = int(modified.timestamp()) if modified else None
+
+    response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+    if response is None:
+        with reading_from(choose_alias(modified)):
+            response = await handler(request, musician_id, **kwargs)
+
+    response.headers.setdefault('ETag', etag)
+    if last_modified:
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+async def cached_json(request, build):
+    """The async counterpart of response_cache.cached_response
+
+    `build` is awaited for the data on a miss, and may return a response
+    instead (such as a 404), which is passed through uncached.
+    """
+    if not response_cache.response_cache_setting('ENABLED'):
+        data = await build()
+        return data if isinstance(data, HttpResponse) else json_response(data)
+
+    version = request._data_version
+    data = await sync_to_async(response_cache.lookup)(request, *version)
+    if data is not None:
+        response = json_response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    data = await build()
+    if isinstance(data, HttpResponse):
+        return data
+    await sync_to_async(response_cache.store)(request, *version, data)
+    response = json_response(data)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def list_handler(view_class, serializer_class, date_field):
+    """A coroutine serving a page of a musician's gigs, tours or receipts"""
+
+    async def handler(request, musician_id):
+        async def build():
+            queryset = view_class.model.objects.filter(musician_id=musician_id)
+            queryset = filter_date_range(queryset, request, date_field)
+            rows = serializer_class.values_queryset(queryset, request, required=view_class.ordering)
+            if rows is not None:
+                paginator = view_class.pagination_class()
+                page = await paginator.apaginate_queryset(rows, request, view=view_class)
+                return paginator.get_paginated_response(serializer_class.values_data(page, request)).data
+
+            queryset = serializer_class.expand_queryset(queryset, request)
+            queryset = serializer_class.sparse_queryset(queryset, request, required=view_class.ordering)
+
+            paginator = view_class.pagination_class()
+            page = await paginator.apaginate_queryset(queryset, request, view=view_class)
+            serializer = serializer_class(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data).data
+
+        return await cached_json(request, build)
+
+    return handler
+
+
+def detail_handler(view_class, serializer_class):
+    """A coroutine serving one of a musician's gigs, tours or receipts"""
+
+    async def handler(request, musician_id, pk):
+        queryset = view_class.model.objects.filter(musician_id=musician_id)
+        queryset = serializer_class.expand_queryset(queryset, request)
+        queryset = serializer_class.sparse_queryset(queryset, request)
+        try:
+            instance = await queryset.aget(pk=pk)
+        except view_class.model.DoesNotExist as ex:
+            return json_response({'message': ex.args[0]}, status=404)
+        return json_response(serializer_class(instance, context={'request': request}).data)
+
+    return handler
+
+
+def parse_year(request):
+    try:
+        year = int(request.query_params.get('year', date.today().year))
+        date(year, 1, 1)
+    except ValueError:
+        raise exceptions.ValidationError({'message': 'year must be a number'})
+    return year
+
+
+async def summary_handler(request, musician_id):
+    """The tax-year summary, see SummaryView.list"""
+    year = parse_year(request)
+
+    async def build():
+        monthly = MonthlyRollup.objects.filter(musician_id=musician_id, year=year)
+        expenses = MonthlyExpenseRollup.objects.filter(musician_id=musician_id, year=year)
+        totals = await monthly.aaggregate(**monthly_totals())
+        return build_summary(year, totals, [row async for row in expense_totals(expenses)])
+
+    return await cached_json(request, build)
+
+
+async def export_handler(request, musician_id):
+    """The streamed year-end export, see ExportView.list"""
+    renderer, media_type = DefaultContentNegotiation().select_renderer(
+        request, [CSVRenderer(), JSONLinesRenderer()])
+    year = parse_year(request)
+    header, to_line = line_formatter(renderer.format)
+    _, modified = await sync_to_async(versioning.get_version)(musician_id)
+    using = choose_alias(modified)
+
+    async def lines():
+        if header:
+            yield header
+        async for row in aexport_rows(musician_id, year, using):
+            yield to_line(row)
+
+    response = StreamingHttpResponse(lines(), content_type=media_type)
+    response['Content-Disposition'] = f'attachment; filename="gig-tax-{year}.{renderer.format}"'
+    return response
+
+
+def async_urlpatterns(router):
+    """Routes for the async read views, to be listed ahead of the router's
+
+    Requests these do not answer are handed to the router's own views.
+    Detail routes only match integer ids, so e.g. /gigs/bulk still
+    resolves to the viewset.
+    """
+    sync_views = {}
+    for pattern in router.urls:
+        sync_views.setdefault(pattern.name, pattern.callback)
+
+    patterns = []
+    for prefix, basename, view_class, serializer_class, date_field in (
+            ('gigs', 'gig', GigView, GigSerializer, 'date'),
+            ('tours', 'tour', TourView, TourSerializer, 'date_start'),
+            ('receipts', 'receipt', ReceiptView, ReceiptSerializer, 'date')):
+        patterns += [
+            path(prefix, read_view(
+                list_handler(view_class, serializer_class, date_field), sync_views[f'{basename}-list'])),
+            path(f'{prefix}/<int:pk>', read_view(
+                detail_handler(view_class, serializer_class), sync_views[f'{basename}-detail'])),
+        ]
+
+    return patterns + [
+        path('summary', read_view(summary_handler, sync_views['summary-list'])),
+        path('export', read_view(export_handler, sync_views['export-list'], conditional=False)),
+    ]
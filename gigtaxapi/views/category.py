@@ -1,11 +1,17 @@
 """View module for handling requests about posts"""
-from django.core.exceptions import ValidationError
-from django.http import HttpResponseServerError
+from django.utils.cache import patch_cache_control
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
 from rest_framework import status
+from gigtaxapi import categories
+from gigtaxapi.categories import registry
 from gigtaxapi.models import Category
+from .mixins import SparseFieldsetSerializerMixin
+
+# The endpoint needs a token, so only the client may keep a copy, and for no
+# longer than the registry itself goes without reloading
+CATEGORY_MAX_AGE = categories.MAX_AGE
 
 class CategoryView(ViewSet):
     """Gig Tax Categories"""
@@ -16,27 +22,31 @@ class CategoryView(ViewSet):
         Returns:
             Response -- JSON serialized category instance
         """
-        try:
-            category = Category.objects.get(pk=pk)
-            serializer = CategorySerializer(category, context={'request': request})
-            return Response(serializer.data)
-        except Exception as ex:
-            return HttpResponseServerError(ex)
+        category = registry.get(pk)
+        if category is None:
+            return Response({'message': f'Category {pk} does not exist'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = CategorySerializer(category, context={'request': request})
+        return self.cacheable(Response(serializer.data))
 
     def list(self, request):
         """Handle GET requests to categorys resource
 
+        Served from the in-memory catalogue, so no query is run.
+
         Returns:
             Response -- JSON serialized list of categorys
         """
-
-        categorys = Category.objects.all()
-
         serializer = CategorySerializer(
-            categorys, many=True, context={'request': request})
-        return Response(serializer.data)
+            registry.all(), many=True, context={'request': request})
+        return self.cacheable(Response(serializer.data))
+
+    @staticmethod
+    def cacheable(response):
+        patch_cache_control(response, private=True, max_age=CATEGORY_MAX_AGE)
+        return response
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for categorys
 
     Arguments:
@@ -0,0 +1,36 @@
+"""View module for handling requests for double-booking reports"""
+from datetime import date
+from rest_framework import status
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from gigtaxapi import conflicts
+from gigtaxapi.replicas import replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .mixins import get_musician_id
+
+
+class ConflictView(ViewSet):
+    """Gig Tax double bookings"""
+
+    @conditional_on_version
+    @cached_response
+    @replica_reads
+    def list(self, request):
+        """Handle GET requests for the clashing gigs and tours in a year
+
+        Gigs on the same date, gigs during a tour and overlapping tours are
+        reported in pairs, including tours that run into the year from the
+        one before (see gigtaxapi.conflicts).
+
+        Returns:
+            Response -- JSON serialized pairs for ?year= (default this year)
+        """
+        try:
+            year = int(request.query_params.get('year', date.today().year))
+            date(year, 1, 1)
+        except ValueError:
+            return Response({'message': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        pairs = conflicts.year_conflicts(get_musician_id(request), year)
+        return Response({'year': year, 'conflicts': pairs})
@@ -0,0 +1,40 @@
+"""View module for handling requests for quarterly estimated tax"""
+from datetime import date
+from rest_framework import status
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from gigtaxapi import tax
+from .mixins import get_musician_id
+
+
+class EstimateView(ViewSet):
+    """Gig Tax quarterly estimated payments"""
+
+    def list(self, request):
+        """Handle GET requests for a year's quarterly tax estimates
+
+        ?filing_status= is single (default) or married_joint. Quarters whose
+        months have not changed since they were last worked out are read
+        back as stored (see gigtaxapi.tax.estimates).
+
+        Returns:
+            Response -- JSON serialized estimates for ?year= (default this year)
+        """
+        try:
+            year = int(request.query_params.get('year', date.today().year))
+        except ValueError:
+            return Response({'message': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if year not in tax.YEARS:
+            return Response(
+                {'message': f'year must be between {tax.YEARS[0]} and {tax.YEARS[-1]}'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        filing_status = request.query_params.get('filing_status', 'single')
+        if filing_status not in tax.FILING_STATUSES:
+            return Response(
+                {'message': f'filing_status must be one of {", ".join(tax.FILING_STATUSES)}'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        musician_id = get_musician_id(request)
+        estimates, _ = tax.refresh([musician_id], year, filing_status)
+        return Response(tax.estimate_payload(estimates[musician_id], year, filing_status))
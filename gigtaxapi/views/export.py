@@ -0,0 +1,148 @@
+"""View module for handling requests to export a tax year"""
+import csv
+import itertools
+import json
+from asgiref.sync import sync_to_async
+from datetime import date
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, ExpressionWrapper
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from gigtaxapi.models import Gig, Receipt, Tour
+from gigtaxapi.models.fields import CentsField
+from gigtaxapi.renderers import CSVRenderer, JSONLinesRenderer
+from gigtaxapi.replicas import read_alias, replica_reads
+from .mixins import get_musician_id
+
+EXPORT_COLUMNS = ('type', 'id', 'date', 'date_end', 'name', 'location', 'description',
+                  'income', 'per_diem', 'expense', 'mileage', 'category', 'reference')
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """A write-only file that hands each line straight back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+class ExportView(ViewSet):
+    """Gig Tax year-end export"""
+    renderer_classes = (CSVRenderer, JSONLinesRenderer)
+
+    @replica_reads
+    def list(self, request):
+        """Handle GET requests to export a tax year of gigs, tours and receipts
+
+        Rows are read with server-side chunked iterators and written to the
+        response as they arrive, so the download starts straight away and
+        memory stays flat however many rows the year holds.
+
+        Returns:
+            StreamingHttpResponse -- CSV (?format=csv, default) or JSON lines (?format=jsonl)
+        """
+        try:
+            year = int(request.query_params.get('year', date.today().year))
+            # Checked here: the year lookups below fail only once streaming has begun
+            date(year, 1, 1)
+        except ValueError:
+            return Response({'message': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The rows are read after this returns, so the replica is named explicitly
+        rows = export_rows(get_musician_id(request), year, using=read_alias())
+        export_format = request.accepted_renderer.format
+
+        header, to_line = line_formatter(export_format)
+        lines = itertools.chain([header] if header else [], map(to_line, rows))
+
+        response = StreamingHttpResponse(lines, content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="gig-tax-{year}.{export_format}"'
+        return response
+
+
+def line_formatter(export_format):
+    """Pick how rows are written for ?format=csv or ?format=jsonl
+
+    Returns:
+        tuple -- (header line or None, function turning a row into a line)
+    """
+    if export_format == 'jsonl':
+        return None, lambda row: json.dumps(dict(zip(EXPORT_COLUMNS, row)), cls=DjangoJSONEncoder) + '\n'
+
+    writer = csv.writer(Echo())
+    return writer.writerow(EXPORT_COLUMNS), writer.writerow
+
+
+def export_rows(musician_id, year, using=None):
+    """Yield one tuple per gig, tour and receipt in the year, in EXPORT_COLUMNS order
+
+    Each queryset is narrowed with values_list() and read with a chunked
+    iterator, so model instances are never built and only CHUNK_SIZE rows
+    are held at a time. `using` names the database to read from.
+    """
+    for queryset, to_row in export_querysets(musician_id, year, using):
+        for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+            yield to_row(row)
+
+
+async def aexport_rows(musician_id, year, using=None):
+    """Async counterpart of export_rows, for the async read views
+
+    The sync iterator is advanced a chunk at a time on the database thread.
+    QuerySet.aiterator() would do the same, but for values_list() querysets
+    it runs the query outside that thread and fails.
+    """
+    for queryset, to_row in export_querysets(musician_id, year, using):
+        rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+        while chunk := await sync_to_async(list)(itertools.islice(rows, CHUNK_SIZE)):
+            for row in chunk:
+                yield to_row(row)
+
+
+def export_querysets(musician_id, year, using=None):
+    """Build the year's gig, tour and receipt queries
+
+    Returns:
+        list -- (values_list queryset, function mapping a row to EXPORT_COLUMNS) pairs
+    """
+    gigs = Gig.objects.filter(musician_id=musician_id, date__year=year).order_by('date', 'id')
+    gigs = gigs.values_list(
+        'id', 'date', 'artist', 'location_name', 'gig_description', 'gig_pay', 'mileage')
+
+    def gig_row(row):
+        pk, gig_date, artist, location, description, pay, mileage = row
+        return ('gig', pk, gig_date, None, artist, location, description,
+                pay, None, None, mileage, None, None)
+
+    tours = Tour.objects.filter(musician_id=musician_id, date_start__year=year).order_by('date_start', 'id')
+    tours = tours.annotate(
+        income=ExpressionWrapper(
+            F('number_of_gigs') * F('tour_gig_pay') + F('travel_days') * F('travel_day_pay'),
+            output_field=CentsField()),
+        per_diem_total=ExpressionWrapper(
+            F('per_diem') * (F('number_of_gigs') + F('travel_days')),
+            output_field=CentsField()),
+    ).values_list(
+        'id', 'date_start', 'date_end', 'artist', 'tour_departure_address', 'tour_description',
+        'income', 'per_diem_total', 'mileage')
+
+    def tour_row(row):
+        pk, date_start, date_end, artist, location, description, income, per_diem, mileage = row
+        return ('tour', pk, date_start, date_end, artist, location, description,
+                income, per_diem, None, mileage, None, None)
+
+    receipts = Receipt.objects.filter(musician_id=musician_id, date__year=year).order_by('date', 'id')
+    receipts = receipts.values_list(
+        'id', 'date', 'business_name', 'business_address', 'description', 'price',
+        'category_type__label', 'receipt_number')
+
+    def receipt_row(row):
+        pk, receipt_date, name, location, description, price, category, reference = row
+        return ('receipt', pk, receipt_date, None, name, location, description,
+                None, None, price, None, category, reference)
+
+    return [(queryset.using(using), to_row)
+            for queryset, to_row in ((gigs, gig_row), (tours, tour_row), (receipts, receipt_row))]
@@ -1,25 +1,41 @@
 """View module for handling requests about gigs"""
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework import status
 from django.http import HttpResponseServerError
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
-from gigtaxapi.models import Gig, Musician
-from django.db.models import Q
+from gigtaxapi.models import Gig
+from gigtaxapi.bulk import (bulk_create_records, bulk_delete_records, bulk_update_records,
+                            patch_record)
+from gigtaxapi.pagination import KeysetPagination
+from gigtaxapi.replicas import replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .musician import MusicianSerializer
+from .mixins import (ExpandableSerializerMixin, MoneyField, MusicianScopedViewMixin,
+                     SparseFieldsetSerializerMixin, ValuesRowSerializerMixin, bulk_conflict_response,
+                     conflict_response, filter_date_range, parse_ids, query_param_list, validate_bulk, validate_bulk_update)
 
-class GigView(ViewSet):
+class GigView(MusicianScopedViewMixin, ViewSet):
     """Gig Tax Gigs """
+    model = Gig
+    pagination_class = KeysetPagination
+    ordering = ('date', 'id')
 
     def create(self, request):
         """Handle POST operations for a gig
+
+        A gig on the same date as another gig, or during a tour, is refused
+        with 409 unless ?allow_conflicts=true is sent.
+
         Returns:
             Response -- JSON serialized gig instance
         """
-        musician = Musician.objects.get(user=request.auth.user)
-
         gig = Gig()
-        gig.musician = musician
+        gig.musician_id = self.musician_id
         gig.artist = request.data["artist"]
         gig.location_name = request.data["locationName"]
         gig.location_address = request.data["locationAddress"]
@@ -28,13 +44,20 @@ class GigView(ViewSet):
         gig.gig_pay = request.data["gigPay"]
         gig.mileage = request.data["mileage"]
 
+        conflict = conflict_response(request, self.musician_id, 'gig', gig.date)
+        if conflict is not None:
+            return conflict
+
         try:
-            gig.save()
+            with transaction.atomic():
+                gig.save()
             serializer = GigSerializer(gig, context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except ValidationError as ex:
-            return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"reason": ex.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
 
+    @conditional_on_version
+    @replica_reads
     def retrieve(self, request, pk=None):
         """Handle GET requests for single gig
 
@@ -42,8 +65,9 @@ class GigView(ViewSet):
             Response -- JSON serialized gig instance
         """
         try:
-            # gig = Gig.objects.get(pk=pk)
-            gig = Gig.objects.get(Q(pk=pk) & Q(musician__user=request.auth.user))
+            gigs = GigSerializer.expand_queryset(self.get_queryset(), request)
+            gigs = GigSerializer.sparse_queryset(gigs, request)
+            gig = gigs.get(pk=pk)
             serializer = GigSerializer(gig, context={'request': request})
             return Response(serializer.data)
 
@@ -55,13 +79,16 @@ class GigView(ViewSet):
     def update(self, request, pk=None):
         """Handle PUT requests for a gig
 
+        Moving it onto another booking is refused with 409, as for create.
+
         Returns:
             Response -- Empty body with 204 status code
         """
-        musician = Musician.objects.get(user=request.auth.user)
+        try:
+            gig = self.get_queryset().get(pk=pk)
+        except Gig.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
-        gig = Gig.objects.get(pk=pk)
-        gig.musician = musician
         gig.artist = request.data["artist"]
         gig.location_name = request.data["locationName"]
         gig.location_address = request.data["locationAddress"]
@@ -69,7 +96,43 @@ class GigView(ViewSet):
         gig.date = request.data["date"]
         gig.gig_pay = request.data["gigPay"]
         gig.mileage = request.data["mileage"]
-        gig.save()
+
+        conflict = conflict_response(request, self.musician_id, 'gig', gig.date, pk=gig.pk)
+        if conflict is not None:
+            return conflict
+
+        try:
+            with transaction.atomic():
+                gig.save()
+        except ValidationError as ex:
+            return Response({"reason": ex.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({}, status=status.HTTP_204_NO_CONTENT)
+
+    def partial_update(self, request, pk=None):
+        """Handle PATCH requests for a gig
+
+        Only the fields sent are validated and written. New dates are
+        checked for double bookings as for PUT.
+
+        Returns:
+            Response -- Empty body with 204 status code
+        """
+        serializer = GigInputSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        values = serializer.validated_data
+        if not values:
+            return Response({'message': 'No fields to update'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if 'date' in values:
+            conflict = conflict_response(request, self.musician_id, 'gig', values['date'], pk=pk)
+            if conflict is not None:
+                return conflict
+
+        if not patch_record(Gig, self.musician_id, pk, values):
+            return Response({'message': 'Gig matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
@@ -79,7 +142,7 @@ class GigView(ViewSet):
             Response -- 200, 404, or 500 status code
         """
         try:
-            gig = Gig.objects.get(pk=pk)
+            gig = self.get_queryset().get(pk=pk)
             gig.delete()
 
             return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -90,24 +153,128 @@ class GigView(ViewSet):
         except Exception as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @conditional_on_version
+    @cached_response
+    @replica_reads
     def list(self, request):
         """Handle GET requests to gigs resource
+
+        ?start= and ?end= limit the gigs to a date range (inclusive)
+
         Returns:
-            Response -- JSON serialized list of gigs
+            Response -- JSON serialized page of gigs, ordered by (date, id)
         """
-        gigs = Gig.objects.filter(musician__user=request.auth.user)
+        gigs = self.get_queryset()
+        gigs = filter_date_range(gigs, request, 'date')
+        # Flat pages skip the serializer, see ValuesRowSerializerMixin
+        rows = GigSerializer.values_queryset(gigs, request, required=self.ordering)
+        if rows is not None:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(rows, request, view=self)
+            return paginator.get_paginated_response(GigSerializer.values_data(page, request))
+
+        gigs = GigSerializer.expand_queryset(gigs, request)
+        gigs = GigSerializer.sparse_queryset(gigs, request, required=self.ordering)
 
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(gigs, request, view=self)
         serializer = GigSerializer(
-            gigs, many=True, context={'request': request})
-        return Response(serializer.data)
+            page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
-class GigSerializer(serializers.ModelSerializer):
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Handle POST operations for a JSON array of gigs
+
+        The batch is validated as a whole and inserted in one transaction.
+        Invalid items are reported by their index and nothing is saved.
+        Items that double-book the musician, or each other, are refused
+        with 409 as for POST /gigs.
+
+        Returns:
+            Response -- JSON serialized list of the created gigs
+        """
+        items, errors = validate_bulk(request, GigInputSerializer)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        conflict = bulk_conflict_response(
+            request, self.musician_id, 'gig',
+            [(None, item['date'], item['date'], item['artist']) for item in items])
+        if conflict is not None:
+            return conflict
+
+        gigs = bulk_create_records(Gig, [Gig(musician_id=self.musician_id, **item) for item in items])
+        serializer = GigSerializer(gigs, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        """Handle DELETE requests for ?ids=1,2,3
+
+        The gigs are deleted by one query scoped to the musician, in a
+        single transaction. Ids that are not the musician's are ignored.
+
+        Returns:
+            Response -- the number of gigs deleted
+        """
+        ids = parse_ids(query_param_list(request, 'ids'))
+        deleted = bulk_delete_records(Gig, self.musician_id, ids)
+        return Response({'deleted': deleted})
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Handle PATCH requests that set the same fields on many gigs
+
+        The body lists the ids and the fields to set, e.g.
+        {"ids": [4, 8], "mileage": 12}. A new date is checked for double
+        bookings, including between the gigs moved.
+
+        Returns:
+            Response -- the number of gigs updated
+        """
+        ids, values = validate_bulk_update(request, GigInputSerializer)
+        if 'date' in values:
+            spans = [
+                (pk, values['date'], values['date'], values.get('artist', artist))
+                for pk, artist in self.get_queryset().filter(pk__in=ids).values_list('id', 'artist')
+            ]
+            conflict = bulk_conflict_response(
+                request, self.musician_id, 'gig', spans, moved_ids=[span[0] for span in spans])
+            if conflict is not None:
+                return conflict
+        updated = bulk_update_records(Gig, self.musician_id, ids, values)
+        return Response({'updated': updated})
+
+class GigInputSerializer(serializers.Serializer):
+    """Validates the camelCase gig payload sent by the client
+
+    Arguments:
+        serializer type
+    """
+    artist = serializers.CharField(max_length=50)
+    locationName = serializers.CharField(source='location_name', max_length=50)
+    locationAddress = serializers.CharField(source='location_address', max_length=100)
+    gigDescription = serializers.CharField(source='gig_description', max_length=150)
+    date = serializers.DateField()
+    gigPay = MoneyField(source='gig_pay')
+    mileage = serializers.IntegerField()
+
+class GigSerializer(ValuesRowSerializerMixin, SparseFieldsetSerializerMixin,
+                    ExpandableSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for gigs
 
+    Related rows are sent as flat ids unless requested with ?expand=, and
+    ?fields= narrows the output to the listed columns
+
     Arguments:
         serializer type
     """
+    gig_pay = MoneyField(read_only=True)
+
     class Meta:
         model = Gig
-        fields = ('__all__')
-        depth = 2
\ No newline at end of file
+        fields = ('id', 'musician_id', 'artist', 'location_name', 'location_address',
+                  'gig_description', 'date', 'gig_pay', 'mileage')
+        expandable_fields = {
+            'musician': (MusicianSerializer, 'musician__user'),
+        }
\ No newline at end of file
@@ -0,0 +1,439 @@
+"""Shared helpers for the Gig Tax viewsets and serializers"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import ExpressionWrapper, F
+from django.utils.dateparse import parse_date
+from rest_framework import ISO_8601, serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from gigtaxapi import conflicts
+from gigtaxapi.authentication import get_musician_id
+
+
+class MusicianScopedViewMixin:
+    """Limits a viewset to the rows owned by the caller's musician
+
+    Querysets filter on the `musician_id` column itself, so no request joins
+    through musician to auth_user, and a pk belonging to someone else is
+    simply not found.
+    """
+    model = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Resolved before the handler runs so a user without a musician gets
+        # a 403 rather than tripping a handler's own exception handling
+        get_musician_id(request)
+
+    @property
+    def musician_id(self):
+        return get_musician_id(self.request)
+
+    def get_queryset(self):
+        return self.model.objects.filter(musician_id=self.musician_id)
+
+
+def query_param_list(request, name):
+    """Split a comma separated query parameter such as ?expand=a,b
+
+    Returns:
+        list -- the non-empty values, in the order given
+    """
+    value = request.query_params.get(name, '')
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def validate_bulk(request, serializer_class, max_size=1000):
+    """Validate a JSON array of objects with a per-item input serializer
+
+    Problems are reported against the index of the item that caused them so
+    the caller can reject the whole batch.
+
+    Returns:
+        tuple -- (validated data for every item, list of per-index errors)
+    """
+    items = request.data
+    if not isinstance(items, list) or not items:
+        raise ValidationError({'message': 'Expected a non-empty JSON array'})
+    if len(items) > max_size:
+        raise ValidationError({'message': f'At most {max_size} items can be sent at once'})
+
+    serializer = serializer_class(data=items, many=True)
+    if serializer.is_valid():
+        return serializer.validated_data, []
+
+    # Older DRF releases return a list with an entry per item, newer ones a
+    # dict keyed by the index of each invalid item
+    errors = serializer.errors
+    indexed = sorted(errors.items()) if isinstance(errors, dict) else enumerate(errors)
+    return [], [
+        {'index': index, 'errors': item_errors}
+        for index, item_errors in indexed if item_errors
+    ]
+
+
+def parse_ids(values, max_size=1000):
+    """Read a list of primary keys sent as ?ids=1,2,3 or a JSON array
+
+    Returns:
+        list -- the distinct ids as ints
+    """
+    if not isinstance(values, list) or not values:
+        raise ValidationError({'ids': 'Expected a non-empty list of ids'})
+    if len(values) > max_size:
+        raise ValidationError({'ids': f'At most {max_size} ids can be sent at once'})
+    try:
+        return sorted({int(value) for value in values})
+    except (TypeError, ValueError):
+        raise ValidationError({'ids': 'Ids must be whole numbers'})
+
+
+def validate_bulk_update(request, serializer_class, max_size=1000):
+    """Validate a body such as {"ids": [4, 8], "categoryId": 3}
+
+    Every key other than `ids` is a field of the input serializer, checked
+    as a partial update.
+
+    Returns:
+        tuple -- (ids, validated field values)
+    """
+    data = request.data
+    if not isinstance(data, dict):
+        raise ValidationError({'message': 'Expected a JSON object with ids and the fields to set'})
+
+    ids = parse_ids(data.get('ids'), max_size)
+    serializer = serializer_class(
+        data={name: value for name, value in data.items() if name != 'ids'}, partial=True)
+    serializer.is_valid(raise_exception=True)
+    if not serializer.validated_data:
+        raise ValidationError({'message': 'No fields to update'})
+    return ids, serializer.validated_data
+
+
+def filter_date_range(queryset, request, field, end_field=None):
+    """Apply inclusive ?start=YYYY-MM-DD&end=YYYY-MM-DD bounds to a date column
+
+    Combined with the (musician, date) indexes this is a single index range
+    scan, so a tax-year view only touches the rows inside the year.
+
+    Arguments:
+        end_field -- for rows that span dates, the column holding the last
+                     one; ?start= is compared with it, so every row that
+                     overlaps the range is kept
+
+    Returns:
+        QuerySet -- the filtered queryset
+    """
+    for param, lookup, column in (('start', 'gte', end_field or field), ('end', 'lte', field)):
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({param: 'Expected a date formatted YYYY-MM-DD'})
+        queryset = queryset.filter(**{f'{column}__{lookup}': parsed})
+    return queryset
+
+
+def _as_date(value):
+    if value is None or hasattr(value, 'isoformat'):
+        return value
+    try:
+        return parse_date(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def allows_conflicts(request):
+    return request.query_params.get('allow_conflicts', '').lower() in ('1', 'true', 'yes')
+
+
+def conflict_response(request, musician_id, kind, date_start, date_end=None, pk=None):
+    """Refuse a gig or tour that double-books the musician
+
+    ?allow_conflicts=true books it anyway. Dates that do not parse are left
+    for the model to reject.
+
+    Returns:
+        Response -- 409 listing the clashing bookings, or None to go ahead
+    """
+    if allows_conflicts(request):
+        return None
+    date_start, date_end = _as_date(date_start), _as_date(date_end)
+    if date_start is None or (kind == 'tour' and date_end is None):
+        return None
+
+    clashes = conflicts.find_conflicts(
+        musician_id, date_start, date_end, exclude=(kind, pk) if pk is not None else None)
+    if not clashes:
+        return None
+    return Response(
+        {'message': f'The {kind} clashes with {len(clashes)} other booking(s); '
+                    'send ?allow_conflicts=true to book it anyway',
+         'conflicts': clashes},
+        status=status.HTTP_409_CONFLICT)
+
+
+def bulk_conflict_response(request, musician_id, kind, spans, moved_ids=()):
+    """Refuse a batch of gigs or tours if any item double-books the musician
+
+    Items are checked against the stored bookings and each other.
+    ?allow_conflicts=true books them anyway.
+
+    Arguments:
+        spans -- (pk, date_start, date_end, title) per item, see
+                 conflicts.batch_conflicts
+        moved_ids -- for bulk updates, the ids being moved; clashes are
+                     then reported by id instead of by index
+
+    Returns:
+        Response -- 409 listing each clashing item's bookings, or None to go ahead
+    """
+    if allows_conflicts(request):
+        return None
+
+    clashing = conflicts.batch_conflicts(musician_id, kind, spans, moved_ids)
+    if not clashing:
+        return None
+    return Response(
+        {'message': f'{len(clashing)} {kind}(s) clash with other bookings; '
+                    'send ?allow_conflicts=true to book them anyway',
+         'conflicts': [
+             {'id': spans[position][0], 'conflicts': clashes} if moved_ids
+             else {'index': position, 'conflicts': clashes}
+             for position, clashes in clashing
+         ]},
+        status=status.HTTP_409_CONFLICT)
+
+
+class MoneyField(serializers.DecimalField):
+    """An amount of money, sent and accepted as a decimal string such as "379.99"
+
+    Backs onto gigtaxapi.models.fields.CentsField columns.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', 15)
+        kwargs.setdefault('decimal_places', 2)
+        super().__init__(**kwargs)
+
+
+class ExpandableSerializerMixin:
+    """Serializes relations as flat ids unless the request asks for them
+
+    Serializers list the relations that may be expanded in
+    `Meta.expandable_fields` as `name -> (serializer class, select_related path)`.
+    `?expand=musician,category_type` swaps the `<name>_id` column for the
+    nested object, and `expand_queryset` loads it in the same query.
+    """
+    expand_query_param = 'expand'
+    expanded = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        self.expanded = self.get_expand(request)
+        for name in self.expanded:
+            serializer_class, _ = self.Meta.expandable_fields[name]
+            self.fields.pop(f'{name}_id', None)
+            self.fields[name] = serializer_class(read_only=True)
+
+    @classmethod
+    def get_expand(cls, request):
+        """Return the requested relations this serializer knows how to expand"""
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        return [
+            name for name in query_param_list(request, cls.expand_query_param)
+            if name in expandable
+        ]
+
+    @classmethod
+    def expand_queryset(cls, queryset, request):
+        """Join the expanded relations so no row costs an extra query"""
+        paths = [
+            cls.Meta.expandable_fields[name][1] for name in cls.get_expand(request)
+        ]
+        if paths:
+            queryset = queryset.select_related(*paths)
+        return queryset
+
+
+class SparseFieldsetSerializerMixin:
+    """Narrows the output, and the SQL behind it, to ?fields=id,date,gig_pay
+
+    Unknown names are ignored and an empty selection falls back to every
+    field. Relations picked with ?expand= are always kept.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        requested = self.get_requested_fields(request)
+        if requested is None:
+            return
+
+        keep = set(requested) | set(getattr(self, 'expanded', ()))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        """Return the requested serializer fields, or None to send them all"""
+        requested = [
+            name for name in query_param_list(request, cls.fields_query_param)
+            if name in cls.Meta.fields
+        ]
+        return requested or None
+
+    @classmethod
+    def includes_field(cls, request, name):
+        """True when the response will contain the given field"""
+        requested = cls.get_requested_fields(request)
+        return requested is None or name in requested
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request, required=()):
+        """Load only the columns the response needs
+
+        Arguments:
+            required -- extra columns the view itself reads, such as the
+                        pagination ordering
+        """
+        requested = cls.get_requested_fields(request)
+        if requested is None:
+            return queryset
+
+        opts = queryset.model._meta
+        columns = {opts.pk.name}
+        for name in list(requested) + [field.lstrip('-') for field in required]:
+            try:
+                columns.add(opts.get_field(name).name)
+            except FieldDoesNotExist:
+                # Serializer-only fields such as properties have no column
+                continue
+
+        # Relations joined with select_related have to keep their key column
+        related = queryset.query.select_related
+        if isinstance(related, dict):
+            columns.update(related)
+
+        return queryset.only(*columns)
+
+
+def format_cents(cents):
+    """Write a whole number of cents the way MoneyField does, e.g. -1234 -> "-12.34" """
+    if cents is None:
+        return None
+    sign = '-' if cents < 0 else ''
+    whole, part = divmod(abs(cents), 100)
+    return f'{sign}{whole}.{part:02d}'
+
+
+def _isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+def _represent(field):
+    def convert(value):
+        return None if value is None else field.to_representation(value)
+    return convert
+
+
+# Serializer fields whose to_representation leaves database values unchanged
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.ReadOnlyField)
+
+
+class ValuesRowSerializerMixin:
+    """Serializes list pages straight from `.values()` rows
+
+    Instantiating the serializer and running every field's to_representation
+    is most of the CPU time of a large page. For the flat output (no
+    ?expand=) `values_queryset` reads just the columns the response needs,
+    money as raw cents, and `values_data` turns each row into the same dict
+    the serializer would, with converters compiled once per field set.
+    """
+    _row_converters = None
+
+    @classmethod
+    def row_converters(cls, names):
+        """Compile `(name, key in the .values() row, converter)` for each output field"""
+        if cls.__dict__.get('_row_converters') is None:
+            cls._row_converters = {}
+        compiled = cls._row_converters.get(names)
+        if compiled is None:
+            fields = cls().fields
+            compiled = []
+            for name in names:
+                field = fields[name]
+                if (isinstance(field, MoneyField) and not field.localize
+                        and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+                    compiled.append((name, f'{name}_cents', format_cents))
+                elif (isinstance(field, serializers.DateField)
+                      and getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601):
+                    compiled.append((name, name, _isoformat))
+                elif isinstance(field, PLAIN_FIELDS) and not isinstance(field, serializers.DecimalField):
+                    compiled.append((name, name, None))
+                else:
+                    compiled.append((name, name, _represent(field)))
+            compiled = cls._row_converters[names] = tuple(compiled)
+        return compiled
+
+    @classmethod
+    def row_names(cls, request):
+        """The output fields, in Meta.fields order as the serializer sends them"""
+        requested = cls.get_requested_fields(request)
+        if requested is None:
+            return tuple(cls.Meta.fields)
+        return tuple(name for name in cls.Meta.fields if name in requested)
+
+    @classmethod
+    def values_queryset(cls, queryset, request, required=()):
+        """Narrow a queryset to `.values()` rows for values_data
+
+        Arguments:
+            required -- extra columns the view itself reads, such as the
+                        pagination ordering
+
+        Returns:
+            QuerySet -- the rows, or None when the request needs the serializer
+        """
+        if cls.get_expand(request):
+            return None
+
+        columns = set()
+        cents = {}
+        for name, key, _ in cls.row_converters(cls.row_names(request)):
+            if key == name:
+                columns.add(name)
+            else:
+                # The column as stored, skipping the Decimal conversion
+                cents[key] = ExpressionWrapper(F(name), output_field=models.BigIntegerField())
+        columns.update(field.lstrip('-') for field in required)
+        return queryset.values(*columns, **cents)
+
+    @classmethod
+    def values_data(cls, rows, request):
+        """Serialize `.values()` rows read by values_queryset
+
+        Returns:
+            list -- dicts with exactly the serializer's keys and values
+        """
+        converters = cls.row_converters(cls.row_names(request))
+        return [
+            {name: row[key] if convert is None else convert(row[key]) for name, key, convert in converters}
+            for row in rows
+        ]
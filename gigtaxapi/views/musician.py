@@ -4,11 +4,17 @@ from django.http import HttpResponseServerError
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
+from django.contrib.auth.models import User
 from gigtaxapi.models import Musician
+from gigtaxapi.pagination import KeysetPagination
+from .mixins import SparseFieldsetSerializerMixin
+from django.db import connection
 from django.db.models import Q
 
 class MusicianView(ViewSet):
     """Gig Tax Musicians"""
+    pagination_class = KeysetPagination
+    ordering = ('id',)
 
     def retrieve(self, request, pk=None):
         """Handle GET requests for single musician
@@ -17,7 +23,9 @@ class MusicianView(ViewSet):
         """
         try:
 
-            musician = Musician.objects.get(Q(pk=pk) & Q(user=request.auth.user))
+            musicians = MusicianSerializer.select_user(Musician.objects.all(), request)
+            musicians = MusicianSerializer.sparse_queryset(musicians, request)
+            musician = musicians.get(Q(pk=pk) & Q(user=request.auth.user))
 
             serializer = MusicianSerializer(musician, context={'request': request})
             return Response(serializer.data)
@@ -28,29 +36,103 @@ class MusicianView(ViewSet):
             return HttpResponseServerError(ex)
 
     def list(self, request):
-        """Handle GET requests to categories resource
+        """Handle GET requests to look up musicians
+
+        ?username= and ?email= match exactly and ?q= matches the start of
+        the username (and, for staff, the email), all ignoring case and all
+        served from indexed lowercase copies of those columns. A full email
+        in ?q= is matched exactly for anyone, as before.
+
+        Staff can page through every musician. Anyone else only sees the
+        musicians they searched for, or just themselves with no search, and
+        never another musician's email or address.
+
         Returns:
-            Response -- JSON serialized list of categories
+            Response -- JSON serialized page of {id, username, first_name, last_name}
         """
+        is_staff = request.user.is_staff
         musicians = Musician.objects.all()
 
-        search_text = self.request.query_params.get('q', None)
+        username = request.query_params.get('username')
+        email = request.query_params.get('email')
+        search_text = request.query_params.get('q')
+
+        if username:
+            musicians = musicians.filter(username_key=username.lower())
+        if email:
+            musicians = musicians.filter(email_key=email.lower())
+        if search_text:
+            search_text = search_text.lower()
+            matches = prefix_filter('username_key', search_text)
+            if is_staff:
+                matches |= prefix_filter('email_key', search_text)
+            elif '@' in search_text:
+                matches |= Q(email_key=search_text)
+            musicians = musicians.filter(matches)
+        if not (is_staff or username or email or search_text):
+            musicians = musicians.filter(user=request.auth.user)
+
+        fields = ['id', 'user__username', 'user__first_name', 'user__last_name']
+        if is_staff:
+            fields.append('user__email')
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(musicians.values(*fields), request, view=self)
+        serializer = MusicianDirectorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+def prefix_filter(field, prefix):
+    """Match lowercase keys starting with `prefix`, in a way their index can serve
+
+    PostgreSQL answers LIKE 'prefix%' from the varchar_pattern_ops index.
+    SQLite's LIKE ignores case, so it cannot use a plain index, but a range
+    over the binary-ordered keys can.
+    """
+    if connection.vendor == 'postgresql':
+        return Q(**{f'{field}__startswith': prefix})
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+
 
-        if search_text is not None:
-            musicians = musicians.filter(user__email=search_text)
+class UserSerializer(serializers.ModelSerializer):
+    """JSON serializer for the public parts of a musician's user
+
+    Arguments:
+        serializer type
+    """
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'email')
 
-        serializer = MusicianSerializer(
-            musicians, many=True, context={'request': request})
-        return Response(serializer.data)
-        
 
-class MusicianSerializer(serializers.ModelSerializer):
+class MusicianSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for musicians
 
     Arguments:
         serializer type
     """
+    user = UserSerializer(read_only=True)
+
     class Meta:
         model = Musician
         fields = ('id', 'user', 'address')
-        depth = 1
\ No newline at end of file
+
+    @classmethod
+    def select_user(cls, queryset, request):
+        """Join the user only when the response is going to include it"""
+        if cls.includes_field(request, 'user'):
+            queryset = queryset.select_related('user')
+        return queryset
+
+
+class MusicianDirectorySerializer(serializers.Serializer):
+    """JSON serializer for the slim musician rows of a directory lookup
+
+    Reads the `.values()` rows built by MusicianView.list. The email is
+    only present (and sent) for staff callers.
+    """
+    id = serializers.IntegerField()
+    username = serializers.CharField(source='user__username')
+    first_name = serializers.CharField(source='user__first_name')
+    last_name = serializers.CharField(source='user__last_name')
+    email = serializers.EmailField(source='user__email', required=False)
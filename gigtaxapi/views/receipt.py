@@ -1,25 +1,41 @@
 """View module for handling requests about receipts"""
+import io
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework import status
 from django.http import HttpResponseServerError
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
-from gigtaxapi.models import Receipt, Musician, Category
-from django.db.models import Q
+from gigtaxapi.models import Receipt
+from gigtaxapi.bulk import (bulk_create_records, bulk_delete_records, bulk_update_records,
+                            patch_record)
+from gigtaxapi.categories import registry
+from gigtaxapi.importers import PARSERS, detect_format, import_receipts
+from gigtaxapi.pagination import KeysetPagination
+from gigtaxapi.replicas import replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .category import CategorySerializer
+from .musician import MusicianSerializer
+from .mixins import (ExpandableSerializerMixin, MoneyField, MusicianScopedViewMixin,
+                     SparseFieldsetSerializerMixin, ValuesRowSerializerMixin, filter_date_range,
+                     parse_ids, query_param_list, validate_bulk, validate_bulk_update)
 
-class ReceiptView(ViewSet):
+class ReceiptView(MusicianScopedViewMixin, ViewSet):
     """Gig Tax Receipts"""
+    model = Receipt
+    pagination_class = KeysetPagination
+    ordering = ('date', 'id')
 
     def create(self, request):
         """Handle POST operations for a receipt purchase
         Returns:
             Response -- JSON serialized receipt instance
         """
-        musician = Musician.objects.get(user=request.auth.user)
-
         receipt = Receipt()
-        receipt.musician = musician
+        receipt.musician_id = self.musician_id
         receipt.business_name = request.data["businessName"]
         receipt.business_address = request.data["businessAddress"]
         receipt.description = request.data["description"]
@@ -27,15 +43,25 @@ class ReceiptView(ViewSet):
         receipt.price = request.data["price"]
         receipt.receipt_number = request.data["receiptNumber"]
 
-        receipt.category_type = Category.objects.get(pk=request.data["categoryId"])
+        category_id = request.data.get("categoryId")
+        if category_id is not None:
+            category = registry.get(category_id)
+            if category is None:
+                return Response({"reason": f"Category {category_id} does not exist"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            category_id = category["id"]
+        receipt.category_type_id = category_id
 
         try:
-            receipt.save()
+            with transaction.atomic():
+                receipt.save()
             serializer = ReceiptSerializer(receipt, context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except ValidationError as ex:
-            return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"reason": ex.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
 
+    @conditional_on_version
+    @replica_reads
     def retrieve(self, request, pk=None):
         """Handle GET requests for single receipt
 
@@ -43,8 +69,9 @@ class ReceiptView(ViewSet):
             Response -- JSON serialized receipt instance
         """
         try:
-            # receipt = Receipt.objects.get(pk=pk)
-            receipt = Receipt.objects.get(Q(pk=pk) & Q(musician__user=request.auth.user))
+            receipts = ReceiptSerializer.expand_queryset(self.get_queryset(), request)
+            receipts = ReceiptSerializer.sparse_queryset(receipts, request)
+            receipt = receipts.get(pk=pk)
             serializer = ReceiptSerializer(receipt, context={'request': request})
             return Response(serializer.data)
 
@@ -59,18 +86,57 @@ class ReceiptView(ViewSet):
         Returns:
             Response -- Empty body with 204 status code
         """
-        musician = Musician.objects.get(user=request.auth.user)
+        try:
+            receipt = self.get_queryset().get(pk=pk)
+        except Receipt.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
-        receipt = Receipt.objects.get(pk=pk)
-        receipt.musician = musician
         receipt.business_name = request.data["businessName"]
         receipt.business_address = request.data["businessAddress"]
         receipt.description = request.data["description"]
         receipt.date = request.data["date"]
         receipt.price = request.data["price"]
         receipt.receipt_number = request.data["receiptNumber"]
-        receipt.category_type = Category.objects.get(pk=request.data["categoryId"])
-        receipt.save()
+
+        category_id = request.data.get("categoryId")
+        if category_id is not None:
+            category = registry.get(category_id)
+            if category is None:
+                return Response({"reason": f"Category {category_id} does not exist"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            category_id = category["id"]
+        receipt.category_type_id = category_id
+        try:
+            with transaction.atomic():
+                receipt.save()
+        except ValidationError as ex:
+            return Response({"reason": ex.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({}, status=status.HTTP_204_NO_CONTENT)
+
+    def partial_update(self, request, pk=None):
+        """Handle PATCH requests for a receipt
+
+        Only the fields sent are validated and written.
+
+        Returns:
+            Response -- Empty body with 204 status code
+        """
+        serializer = ReceiptInputSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        values = serializer.validated_data
+        if not values:
+            return Response({'message': 'No fields to update'}, status=status.HTTP_400_BAD_REQUEST)
+
+        category_id = values.get('category_type_id')
+        if category_id is not None and registry.get(category_id) is None:
+            return Response({'categoryId': [f'Category {category_id} does not exist']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not patch_record(Receipt, self.musician_id, pk, values):
+            return Response({'message': 'Receipt matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
@@ -80,7 +146,7 @@ class ReceiptView(ViewSet):
             Response -- 200, 404, or 500 status code
         """
         try:
-            receipt = Receipt.objects.get(pk=pk)
+            receipt = self.get_queryset().get(pk=pk)
             receipt.delete()
 
             return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -91,24 +157,153 @@ class ReceiptView(ViewSet):
         except Exception as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @conditional_on_version
+    @cached_response
+    @replica_reads
     def list(self, request):
         """Handle GET requests to receipts resource
+
+        ?start= and ?end= limit the receipts to a date range (inclusive)
+
         Returns:
-            Response -- JSON serialized list of receipts
+            Response -- JSON serialized page of receipts, ordered by (date, id)
         """
-        receipts = Receipt.objects.filter(musician__user=request.auth.user)
+        receipts = self.get_queryset()
+        receipts = filter_date_range(receipts, request, 'date')
+        # Flat pages skip the serializer, see ValuesRowSerializerMixin
+        rows = ReceiptSerializer.values_queryset(receipts, request, required=self.ordering)
+        if rows is not None:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(rows, request, view=self)
+            return paginator.get_paginated_response(ReceiptSerializer.values_data(page, request))
+
+        receipts = ReceiptSerializer.expand_queryset(receipts, request)
+        receipts = ReceiptSerializer.sparse_queryset(receipts, request, required=self.ordering)
 
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(receipts, request, view=self)
         serializer = ReceiptSerializer(
-            receipts, many=True, context={'request': request})
-        return Response(serializer.data)
+            page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Handle POST operations for a JSON array of receipts
+
+        The batch is validated as a whole and inserted in one transaction.
+        Invalid items are reported by their index and nothing is saved.
+
+        Returns:
+            Response -- JSON serialized list of the created receipts
+        """
+        items, errors = validate_bulk(request, ReceiptInputSerializer)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Every category in the batch is checked against the in-memory catalogue
+        unknown_ids = registry.missing({item.get('category_type_id') for item in items} - {None})
+        errors = [
+            {'index': index, 'errors': {'categoryId': [f'Category {item["category_type_id"]} does not exist']}}
+            for index, item in enumerate(items)
+            if item.get('category_type_id') in unknown_ids
+        ]
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        receipts = bulk_create_records(
+            Receipt, [Receipt(musician_id=self.musician_id, **item) for item in items])
+        serializer = ReceiptSerializer(receipts, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class ReceiptSerializer(serializers.ModelSerializer):
+    @action(methods=['post'], detail=False, url_path='import')
+    def import_statement(self, request):
+        """Handle POST uploads of a CSV or OFX bank/card statement
+
+        The multipart `file` is read as a stream and written in batches.
+        The format comes from the `statementFormat` field, or the file name.
+
+        Returns:
+            Response -- counts of inserted, skipped and failed rows
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'message': 'Upload the statement as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+
+        statement_format = request.data.get('statementFormat') or detect_format(upload.name)
+        if statement_format not in PARSERS:
+            return Response(
+                {'message': f'statementFormat must be one of {", ".join(PARSERS)}'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+        result = import_receipts(self.musician_id, lines, statement_format)
+
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        """Handle DELETE requests for ?ids=1,2,3
+
+        The receipts are deleted by one query scoped to the musician, in a
+        single transaction. Ids that are not the musician's are ignored.
+
+        Returns:
+            Response -- the number of receipts deleted
+        """
+        ids = parse_ids(query_param_list(request, 'ids'))
+        deleted = bulk_delete_records(Receipt, self.musician_id, ids)
+        return Response({'deleted': deleted})
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Handle PATCH requests that set the same fields on many receipts
+
+        The body lists the ids and the fields to set, e.g.
+        {"ids": [4, 8], "categoryId": 3}
+
+        Returns:
+            Response -- the number of receipts updated
+        """
+        ids, values = validate_bulk_update(request, ReceiptInputSerializer)
+
+        category_id = values.get('category_type_id')
+        if category_id is not None and registry.get(category_id) is None:
+            return Response({'categoryId': [f'Category {category_id} does not exist']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        updated = bulk_update_records(Receipt, self.musician_id, ids, values)
+        return Response({'updated': updated})
+
+class ReceiptInputSerializer(serializers.Serializer):
+    """Validates the camelCase receipt payload sent by the client
+
+    Arguments:
+        serializer type
+    """
+    businessName = serializers.CharField(source='business_name', max_length=50)
+    businessAddress = serializers.CharField(source='business_address', max_length=100)
+    description = serializers.CharField(max_length=150)
+    date = serializers.DateField()
+    price = MoneyField()
+    receiptNumber = serializers.CharField(source='receipt_number', max_length=100)
+    categoryId = serializers.IntegerField(source='category_type_id', required=False, allow_null=True)
+
+class ReceiptSerializer(ValuesRowSerializerMixin, SparseFieldsetSerializerMixin,
+                        ExpandableSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for receipts
 
+    Related rows are sent as flat ids unless requested with ?expand=, and
+    ?fields= narrows the output to the listed columns
+
     Arguments:
         serializer type
     """
+    price = MoneyField(read_only=True)
+
     class Meta:
         model = Receipt
-        fields = ('__all__')
-        depth = 2
\ No newline at end of file
+        fields = ('id', 'musician_id', 'business_name', 'business_address', 'description',
+                  'date', 'price', 'receipt_number', 'category_type_id')
+        expandable_fields = {
+            'musician': (MusicianSerializer, 'musician__user'),
+            'category_type': (CategorySerializer, 'category_type'),
+        }
\ No newline at end of file
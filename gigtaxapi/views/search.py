@@ -0,0 +1,65 @@
+"""View module for handling full-text search requests"""
+from rest_framework import status
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from gigtaxapi import search
+from gigtaxapi.models import Gig, Receipt, Tour
+from gigtaxapi.pagination import OffsetPagination
+from gigtaxapi.replicas import read_alias, replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .gig import GigSerializer
+from .mixins import get_musician_id
+from .receipt import ReceiptSerializer
+from .tour import TourSerializer
+
+RESULT_TYPES = {
+    'gig': (Gig, GigSerializer),
+    'tour': (Tour, TourSerializer),
+    'receipt': (Receipt, ReceiptSerializer),
+}
+
+
+class SearchView(ViewSet):
+    """Gig Tax search across gigs, tours and receipts"""
+
+    @conditional_on_version
+    @cached_response
+    @replica_reads
+    def list(self, request):
+        """Handle GET requests to search a musician's records
+
+        ?q= is split into words and a record matches when every word starts
+        a word in its artist, venue, business name or description. Matches
+        come from the full-text index (see gigtaxapi.search), best first,
+        and are paged with ?offset= and ?page_size=.
+
+        Returns:
+            Response -- JSON serialized page of {type, rank, record} matches
+        """
+        text = request.query_params.get('q', '')
+        if not search.query_terms(text):
+            return Response({'message': 'q must contain at least one word'}, status=status.HTTP_400_BAD_REQUEST)
+
+        musician_id = get_musician_id(request)
+        paginator = OffsetPagination()
+        offset, limit = paginator.prepare(request)
+        try:
+            hits = search.search(musician_id, text, limit, offset, using=read_alias())
+        except search.SearchUnavailable as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        hits = paginator.paginate_rows(hits)
+
+        records = {}
+        for kind, (model, serializer_class) in RESULT_TYPES.items():
+            ids = [pk for hit_kind, pk, _ in hits if hit_kind == kind]
+            if ids:
+                rows = model.objects.filter(musician_id=musician_id, pk__in=ids)
+                for row in serializer_class(rows, many=True, context={'request': request}).data:
+                    records[kind, row['id']] = row
+
+        results = [
+            {'type': kind, 'rank': round(rank, 6), 'record': records[kind, pk]}
+            for kind, pk, rank in hits if (kind, pk) in records
+        ]
+        return paginator.get_paginated_response(results)
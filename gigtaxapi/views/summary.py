@@ -0,0 +1,113 @@
+"""View module for handling requests about tax-year summaries"""
+from datetime import date
+from decimal import Decimal
+from django.db.models import Sum
+from rest_framework import status
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from gigtaxapi.models import MonthlyExpenseRollup, MonthlyRollup
+from gigtaxapi.replicas import replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .mixins import get_musician_id
+
+ZERO = Decimal('0.00')
+
+
+class SummaryView(ViewSet):
+    """Gig Tax yearly totals"""
+
+    @conditional_on_version
+    @cached_response
+    @replica_reads
+    def list(self, request):
+        """Handle GET requests for a tax-year summary
+
+        The totals come from the incrementally maintained monthly rollups,
+        so this reads at most twelve income rows and the year's expense rows
+        rather than every gig, tour and receipt.
+
+        Returns:
+            Response -- JSON serialized totals for ?year= (default this year)
+        """
+        try:
+            year = int(request.query_params.get('year', date.today().year))
+        except ValueError:
+            return Response({'message': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        musician_id = get_musician_id(request)
+        monthly = MonthlyRollup.objects.filter(musician_id=musician_id, year=year)
+        expenses = MonthlyExpenseRollup.objects.filter(musician_id=musician_id, year=year)
+
+        return Response(summarize(year, monthly, expenses))
+
+
+def summarize(year, monthly, expense_rollups):
+    """Add up a year of monthly rollup rows
+
+    Tour income is `number_of_gigs * tour_gig_pay + travel_days * travel_day_pay`
+    and per diems are paid for every gig day and travel day of the tour; both
+    are worked out as each tour is saved (see gigtaxapi.rollups). Money is
+    summed as integer cents in the database and sent as decimal strings.
+
+    Returns:
+        dict -- the summary payload
+    """
+    return build_summary(year, monthly.aggregate(**monthly_totals()), expense_totals(expense_rollups))
+
+
+def monthly_totals():
+    """The aggregates taken over a year of MonthlyRollup rows"""
+    return {
+        name: Sum(name) for name in (
+            'gig_count', 'gig_income', 'gig_mileage',
+            'tour_count', 'tour_income', 'per_diem', 'tour_mileage')
+    }
+
+
+def expense_totals(expense_rollups):
+    """Total a year of MonthlyExpenseRollup rows per category
+
+    Returns:
+        QuerySet -- one values() row per category that has receipts
+    """
+    return expense_rollups.values('category_type', 'category_type__label').annotate(
+        sum_total=Sum('total'),
+        sum_count=Sum('count'),
+    ).filter(sum_count__gt=0).order_by('category_type')
+
+
+def build_summary(year, totals, expense_rows):
+    """Shape the monthly totals and per-category expense rows into the payload"""
+    expenses = [
+        {
+            'category_type_id': row['category_type'],
+            'label': row['category_type__label'],
+            'total': row['sum_total'] or ZERO,
+            'count': row['sum_count'],
+        }
+        for row in expense_rows
+    ]
+
+    gig_income = totals['gig_income'] or ZERO
+    tour_income = totals['tour_income'] or ZERO
+    per_diem = totals['per_diem'] or ZERO
+    gig_mileage = totals['gig_mileage'] or 0
+    tour_mileage = totals['tour_mileage'] or 0
+
+    return {
+        'year': year,
+        'gig_count': totals['gig_count'] or 0,
+        'tour_count': totals['tour_count'] or 0,
+        'gig_income': str(gig_income),
+        'tour_income': str(tour_income),
+        'per_diem': str(per_diem),
+        'total_income': str(gig_income + tour_income + per_diem),
+        'mileage': {
+            'gigs': gig_mileage,
+            'tours': tour_mileage,
+            'total': gig_mileage + tour_mileage,
+        },
+        'expenses': [dict(row, total=str(row['total'])) for row in expenses],
+        'total_expenses': str(sum((row['total'] for row in expenses), ZERO)),
+    }
@@ -0,0 +1,84 @@
+"""View module for handling requests for a musician's calendar timeline"""
+from django.db import models
+from django.db.models import ExpressionWrapper, F, Value
+from rest_framework.viewsets import ViewSet
+from gigtaxapi.models import Gig, Tour
+from gigtaxapi.pagination import UnionKeysetPagination
+from gigtaxapi.replicas import replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .mixins import filter_date_range, format_cents, get_musician_id
+
+# Columns every part of the UNION selects, in this order
+EVENT_COLUMNS = ('event_date', 'event_type', 'event_id', 'event_end', 'title', 'location', 'pay_cents')
+
+
+def cents(expression):
+    return ExpressionWrapper(expression, output_field=models.BigIntegerField())
+
+
+class TimelineView(ViewSet):
+    """Gig Tax calendar of gigs and tours"""
+    pagination_class = UnionKeysetPagination
+    ordering = ('event_date', 'event_type', 'event_id')
+
+    @conditional_on_version
+    @cached_response
+    @replica_reads
+    def list(self, request):
+        """Handle GET requests for the gigs and tours in a date range
+
+        ?start= and ?end= limit the events to a date range (inclusive). A
+        tour is included when any of its days falls inside the range. The
+        gigs and tours are read by one UNION ALL query, each side walking
+        its (musician, date) index, and paged by (date, type, id).
+
+        Returns:
+            Response -- JSON serialized page of events, ordered by date
+        """
+        musician_id = get_musician_id(request)
+
+        gigs = Gig.objects.filter(musician_id=musician_id)
+        gigs = filter_date_range(gigs, request, 'date')
+        gigs = gigs.annotate(
+            event_date=F('date'),
+            event_type=Value('gig', output_field=models.CharField()),
+            event_id=F('id'),
+            event_end=F('date'),
+            title=F('artist'),
+            location=F('location_name'),
+            pay_cents=cents(F('gig_pay')),
+        ).values(*EVENT_COLUMNS)
+
+        tours = Tour.objects.filter(musician_id=musician_id)
+        tours = filter_date_range(tours, request, 'date_start', end_field='date_end')
+        tours = tours.annotate(
+            event_date=F('date_start'),
+            event_type=Value('tour', output_field=models.CharField()),
+            event_id=F('id'),
+            event_end=F('date_end'),
+            title=F('artist'),
+            location=F('tour_departure_address'),
+            pay_cents=cents(F('number_of_gigs') * F('tour_gig_pay') + F('travel_days') * F('travel_day_pay')),
+        ).values(*EVENT_COLUMNS)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_querysets([gigs, tours], request, view=self)
+        return paginator.get_paginated_response([timeline_event(row) for row in page])
+
+
+def timeline_event(row):
+    """Turn a timeline row into the event sent to the client
+
+    Returns:
+        dict -- type, id, first and last date, title, location and pay
+    """
+    return {
+        'type': row['event_type'],
+        'id': row['event_id'],
+        'date': row['event_date'].isoformat(),
+        'end': row['event_end'].isoformat(),
+        'title': row['title'],
+        'location': row['location'],
+        'pay': format_cents(row['pay_cents']),
+    }
@@ -1,25 +1,41 @@
 """View module for handling requests about tours"""
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework import status
 from django.http import HttpResponseServerError
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
-from gigtaxapi.models import Tour, Musician
-from django.db.models import Q
+from gigtaxapi.models import Tour
+from gigtaxapi.bulk import (bulk_create_records, bulk_delete_records, bulk_update_records,
+                            patch_record)
+from gigtaxapi.pagination import KeysetPagination
+from gigtaxapi.replicas import replica_reads
+from gigtaxapi.response_cache import cached_response
+from gigtaxapi.versioning import conditional_on_version
+from .musician import MusicianSerializer
+from .mixins import (ExpandableSerializerMixin, MoneyField, MusicianScopedViewMixin,
+                     SparseFieldsetSerializerMixin, ValuesRowSerializerMixin, bulk_conflict_response,
+                     conflict_response, filter_date_range, parse_ids, query_param_list, validate_bulk, validate_bulk_update)
 
-class TourView(ViewSet):
+class TourView(MusicianScopedViewMixin, ViewSet):
     """Gig Tax Tours"""
+    model = Tour
+    pagination_class = KeysetPagination
+    ordering = ('date_start', 'id')
 
     def create(self, request):
         """Handle POST operations for a tour
+
+        A tour that overlaps another tour or a gig is refused with 409
+        unless ?allow_conflicts=true is sent.
+
         Returns:
             Response -- JSON serialized tour instance
         """
-        musician = Musician.objects.get(user=request.auth.user)
-
         tour = Tour()
-        tour.musician = musician
+        tour.musician_id = self.musician_id
         tour.artist = request.data["artist"]
         tour.tour_departure_address = request.data["tourDepartureAddress"]
         tour.tour_description = request.data["tourDescription"]
@@ -32,13 +48,20 @@ class TourView(ViewSet):
         tour.tour_gig_pay = request.data["tourGigPay"]
         tour.mileage = request.data["mileage"]
 
+        conflict = conflict_response(request, self.musician_id, 'tour', tour.date_start, tour.date_end)
+        if conflict is not None:
+            return conflict
+
         try:
-            tour.save()
+            with transaction.atomic():
+                tour.save()
             serializer = TourSerializer(tour, context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except ValidationError as ex:
-            return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"reason": ex.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
 
+    @conditional_on_version
+    @replica_reads
     def retrieve(self, request, pk=None):
         """Handle GET requests for single tour
 
@@ -46,8 +69,9 @@ class TourView(ViewSet):
             Response -- JSON serialized tour instance
         """
         try:
-            # tour = Tour.objects.get(pk=pk)
-            tour = Tour.objects.get(Q(pk=pk) & Q(musician__user=request.auth.user))
+            tours = TourSerializer.expand_queryset(self.get_queryset(), request)
+            tours = TourSerializer.sparse_queryset(tours, request)
+            tour = tours.get(pk=pk)
             serializer = TourSerializer(tour, context={'request': request})
             return Response(serializer.data)
 
@@ -59,13 +83,16 @@ class TourView(ViewSet):
     def update(self, request, pk=None):
         """Handle PUT requests for a tour
 
+        Moving it onto another booking is refused with 409, as for create.
+
         Returns:
             Response -- Empty body with 204 status code
         """
-        musician = Musician.objects.get(user=request.auth.user)
+        try:
+            tour = self.get_queryset().get(pk=pk)
+        except Tour.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
-        tour = Tour.objects.get(pk=pk)
-        tour.musician = musician
         tour.artist = request.data["artist"]
         tour.tour_departure_address = request.data["tourDepartureAddress"]
         tour.tour_description = request.data["tourDescription"]
@@ -77,7 +104,48 @@ class TourView(ViewSet):
         tour.date_end = request.data["dateEnd"]
         tour.tour_gig_pay = request.data["tourGigPay"]
         tour.mileage = request.data["mileage"]
-        tour.save()
+
+        conflict = conflict_response(
+            request, self.musician_id, 'tour', tour.date_start, tour.date_end, pk=tour.pk)
+        if conflict is not None:
+            return conflict
+
+        try:
+            with transaction.atomic():
+                tour.save()
+        except ValidationError as ex:
+            return Response({"reason": ex.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({}, status=status.HTTP_204_NO_CONTENT)
+
+    def partial_update(self, request, pk=None):
+        """Handle PATCH requests for a tour
+
+        Only the fields sent are validated and written. New dates are
+        checked for double bookings as for PUT.
+
+        Returns:
+            Response -- Empty body with 204 status code
+        """
+        serializer = TourInputSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        values = serializer.validated_data
+        if not values:
+            return Response({'message': 'No fields to update'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if {'date_start', 'date_end'} & set(values):
+            dates = self.get_queryset().filter(pk=pk).values('date_start', 'date_end').first()
+            if dates is not None:
+                dates.update((name, values[name]) for name in list(dates) if name in values)
+                conflict = conflict_response(
+                    request, self.musician_id, 'tour', dates['date_start'], dates['date_end'], pk=pk)
+                if conflict is not None:
+                    return conflict
+
+        if not patch_record(Tour, self.musician_id, pk, values):
+            return Response({'message': 'Tour matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
@@ -87,7 +155,7 @@ class TourView(ViewSet):
             Response -- 200, 404, or 500 status code
         """
         try:
-            tour = Tour.objects.get(pk=pk)
+            tour = self.get_queryset().get(pk=pk)
             tour.delete()
 
             return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -98,24 +166,137 @@ class TourView(ViewSet):
         except Exception as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @conditional_on_version
+    @cached_response
+    @replica_reads
     def list(self, request):
         """Handle GET requests to tours resource
+
+        ?start= and ?end= limit the tours to a date_start range (inclusive)
+
         Returns:
-            Response -- JSON serialized list of tours
+            Response -- JSON serialized page of tours, ordered by (date_start, id)
         """
-        tours = Tour.objects.filter(musician__user=request.auth.user)
+        tours = self.get_queryset()
+        tours = filter_date_range(tours, request, 'date_start')
+        # Flat pages skip the serializer, see ValuesRowSerializerMixin
+        rows = TourSerializer.values_queryset(tours, request, required=self.ordering)
+        if rows is not None:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(rows, request, view=self)
+            return paginator.get_paginated_response(TourSerializer.values_data(page, request))
+
+        tours = TourSerializer.expand_queryset(tours, request)
+        tours = TourSerializer.sparse_queryset(tours, request, required=self.ordering)
 
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(tours, request, view=self)
         serializer = TourSerializer(
-            tours, many=True, context={'request': request})
-        return Response(serializer.data)
+            page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
-class TourSerializer(serializers.ModelSerializer):
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Handle POST operations for a JSON array of tours
+
+        The batch is validated as a whole and inserted in one transaction.
+        Invalid items are reported by their index and nothing is saved.
+        Items that double-book the musician, or each other, are refused
+        with 409 as for POST /tours.
+
+        Returns:
+            Response -- JSON serialized list of the created tours
+        """
+        items, errors = validate_bulk(request, TourInputSerializer)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        conflict = bulk_conflict_response(
+            request, self.musician_id, 'tour',
+            [(None, item['date_start'], item['date_end'], item['artist']) for item in items])
+        if conflict is not None:
+            return conflict
+
+        tours = bulk_create_records(Tour, [Tour(musician_id=self.musician_id, **item) for item in items])
+        serializer = TourSerializer(tours, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        """Handle DELETE requests for ?ids=1,2,3
+
+        The tours are deleted by one query scoped to the musician, in a
+        single transaction. Ids that are not the musician's are ignored.
+
+        Returns:
+            Response -- the number of tours deleted
+        """
+        ids = parse_ids(query_param_list(request, 'ids'))
+        deleted = bulk_delete_records(Tour, self.musician_id, ids)
+        return Response({'deleted': deleted})
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Handle PATCH requests that set the same fields on many tours
+
+        The body lists the ids and the fields to set, e.g.
+        {"ids": [4, 8], "perDiem": "25.00"}. New dates are checked for
+        double bookings, including between the tours moved.
+
+        Returns:
+            Response -- the number of tours updated
+        """
+        ids, values = validate_bulk_update(request, TourInputSerializer)
+        if 'date_start' in values or 'date_end' in values:
+            spans = [
+                (pk, values.get('date_start', date_start), values.get('date_end', date_end),
+                 values.get('artist', artist))
+                for pk, date_start, date_end, artist in self.get_queryset().filter(pk__in=ids).values_list(
+                    'id', 'date_start', 'date_end', 'artist')
+            ]
+            conflict = bulk_conflict_response(
+                request, self.musician_id, 'tour', spans, moved_ids=[span[0] for span in spans])
+            if conflict is not None:
+                return conflict
+        updated = bulk_update_records(Tour, self.musician_id, ids, values)
+        return Response({'updated': updated})
+
+class TourInputSerializer(serializers.Serializer):
+    """Validates the camelCase tour payload sent by the client
+
+    Arguments:
+        serializer type
+    """
+    artist = serializers.CharField(max_length=50)
+    tourDepartureAddress = serializers.CharField(source='tour_departure_address', max_length=100)
+    tourDescription = serializers.CharField(source='tour_description', max_length=150)
+    numberOfGigs = serializers.IntegerField(source='number_of_gigs')
+    perDiem = MoneyField(source='per_diem')
+    travelDays = serializers.IntegerField(source='travel_days')
+    travelDayPay = MoneyField(source='travel_day_pay')
+    dateStart = serializers.DateField(source='date_start')
+    dateEnd = serializers.DateField(source='date_end')
+    tourGigPay = MoneyField(source='tour_gig_pay')
+    mileage = serializers.IntegerField()
+
+class TourSerializer(ValuesRowSerializerMixin, SparseFieldsetSerializerMixin,
+                     ExpandableSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for tours
 
+    Related rows are sent as flat ids unless requested with ?expand=, and
+    ?fields= narrows the output to the listed columns
+
     Arguments:
         serializer type
     """
+    per_diem = MoneyField(read_only=True)
+    travel_day_pay = MoneyField(read_only=True)
+    tour_gig_pay = MoneyField(read_only=True)
+
     class Meta:
         model = Tour
-        fields = ('__all__')
-        depth = 2
\ No newline at end of file
+        fields = ('id', 'musician_id', 'artist', 'tour_departure_address', 'tour_description',
+                  'number_of_gigs', 'per_diem', 'travel_days', 'travel_day_pay',
+                  'date_start', 'date_end', 'tour_gig_pay', 'mileage')
+        expandable_fields = {
+            'musician': (MusicianSerializer, 'musician__user'),
+        }
\ No newline at end of file
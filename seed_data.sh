@@ -10,4 +10,5 @@ python manage.py loaddata musicians
 python manage.py loaddata categories
 python manage.py loaddata gigs
 python manage.py loaddata tours
-python manage.py loaddata receipts
\ No newline at end of file
+python manage.py loaddata receipts
+python manage.py rebuild_rollups
\ No newline at end of file
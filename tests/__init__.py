@@ -1,3 +1,17 @@
 from .gig_tests import GigTests
 from .tour_tests import TourTests
-from .receipt_tests import ReceiptTests
\ No newline at end of file
+from .receipt_tests import ReceiptTests
+from .summary_tests import SummaryTests
+from .rollup_tests import RollupTests
+from .importer_tests import ImporterTests
+from .export_tests import ExportTests
+from .auth_tests import AuthTests
+from .category_tests import CategoryTests
+from .async_tests import AsyncReadTests
+from .replica_tests import ReplicaRoutingTests, ReplicaTransactionTests
+from .search_tests import SearchTests
+from .musician_tests import MusicianTests
+from .fast_read_tests import FastReadTests
+from .timeline_tests import TimelineTests
+from .conflict_tests import ConflictTests
+from .estimate_tests import EstimateTests
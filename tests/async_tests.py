@@ -0,0 +1,114 @@
+import json
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Category, Gig, Receipt
+
+# A replica's connection cannot see the test's uncommitted rows, so these
+# stay on the primary even when READ_REPLICA_URLS is set
+@override_settings(ROOT_URLCONF='gig_tax_server.urls_async', GIGTAX_DB_ROUTING={'REPLICAS': []})
+class AsyncReadTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with a gig and a receipt, served by the ASGI URLs
+        """
+        caches['default'].clear()
+        caches['responses'].clear()
+
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.headers = {"Authorization": "Token " + self.token}
+
+        self.gig = Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-06-30", gig_pay=100, mileage=52)
+        Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Double Bass Pedal", date="2021-07-01", price=379.99,
+            receipt_number="333", category_type=Category.objects.create(label="Supplies (gear)"))
+
+    async def test_list_and_retrieve(self):
+        """
+        Ensure the async list is paginated and cached like the sync one,
+        and retrieve 404s on an unknown id.
+        """
+        response = await self.async_client.get("/gigs", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "MISS")
+        json_response = json.loads(response.content)
+        self.assertIsNone(json_response["next"])
+        self.assertEqual(json_response["results"][0]["gig_pay"], "100.00")
+
+        response = await self.async_client.get("/gigs", headers=self.headers)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        response = await self.async_client.get(f"/gigs/{self.gig.id}", headers=self.headers)
+        self.assertEqual(json.loads(response.content)["artist"], "Syndrome of Fire")
+
+        response = await self.async_client.get("/gigs/999", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_conditional_get(self):
+        """
+        Ensure the async views send the data-version ETag and answer 304.
+        """
+        response = await self.async_client.get("/receipts", headers=self.headers)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"1.'))
+
+        response = await self.async_client.get(
+            "/receipts", headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_summary_and_export(self):
+        """
+        Ensure the summary and export are served from the async ORM.
+        """
+        response = await self.async_client.get("/summary?year=2021", headers=self.headers)
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["gig_income"], "100.00")
+        self.assertEqual(json_response["total_expenses"], "379.99")
+
+        response = await self.async_client.get("/export?year=2021&format=jsonl", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) async for line in response.streaming_content]
+        self.assertEqual([row["type"] for row in rows], ["gig", "receipt"])
+
+        response = await self.async_client.get("/export?year=1000000", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_authentication(self):
+        """
+        Ensure reads need a token and a bad one is a 401.
+        """
+        response = await self.async_client.get("/gigs")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+        response = await self.async_client.get("/gigs", headers={"Authorization": "Token nope"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_writes_use_the_viewsets(self):
+        """
+        Ensure other methods on the same URLs still reach DRF.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.patch(f"/gigs/{self.gig.id}", {"mileage": 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.patch("/gigs/bulk", {"ids": [self.gig.id], "mileage": 12}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Gig.objects.get(pk=self.gig.id).mileage, 12)
@@ -0,0 +1,59 @@
+import json
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+class AuthTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+    def test_cached_token_skips_auth_query(self):
+        """
+        Ensure a repeat request authenticates without touching the database.
+        """
+        self.client.get("/gigs")
+
+        # Only the page query is left (a new page size so the response
+        # cache misses)
+        with self.assertNumQueries(1):
+            response = self.client.get("/gigs?page_size=5")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_is_rejected(self):
+        """
+        Ensure deleting a cached token revokes it.
+        """
+        self.client.get("/gigs")
+        Token.objects.get(key=self.token).delete()
+
+        response = self.client.get("/gigs")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """
+        Ensure deactivating a user revokes their cached token.
+        """
+        self.client.get("/gigs")
+        user = User.objects.get(username="steve")
+        user.is_active = False
+        user.save()
+
+        response = self.client.get("/gigs")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,77 @@
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi import categories
+from gigtaxapi.models import Category
+
+class CategoryTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account and sample categories
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        self.gear = Category.objects.create(label="Supplies (gear)")
+        self.travel = Category.objects.create(label="Travel")
+
+    def test_list_categories_from_memory(self):
+        """
+        Ensure categories are served without a query and may be cached by clients.
+        """
+        self.client.get("/categories")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/categories")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn(f"max-age={categories.MAX_AGE}", response["Cache-Control"])
+        self.assertEqual(
+            json.loads(response.content),
+            [{"id": self.gear.id, "label": "Supplies (gear)"}, {"id": self.travel.id, "label": "Travel"}])
+
+    def test_category_changes_are_picked_up(self):
+        """
+        Ensure saving and deleting categories refreshes the catalogue.
+        """
+        self.client.get("/categories")
+        self.travel.label = "Travel (lodging)"
+        self.travel.save()
+        self.gear.delete()
+
+        response = self.client.get("/categories")
+        self.assertEqual(json.loads(response.content), [{"id": self.travel.id, "label": "Travel (lodging)"}])
+        self.assertEqual(self.client.get(f"/categories/{self.gear.id}").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_receipt_with_unknown_category_is_rejected(self):
+        """
+        Ensure receipts are checked against the catalogue.
+        """
+        data = {
+            "businessName": "Guitar Center",
+            "businessAddress": "Southfield, MI",
+            "description": "Double Bass Pedal",
+            "date": "2021-07-01",
+            "price": 379.99,
+            "receiptNumber": "3331212121",
+            "categoryId": self.travel.id + 100
+        }
+        response = self.client.post("/receipts", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data["categoryId"] = self.gear.id
+        response = self.client.post("/receipts", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content)["category_type_id"], self.gear.id)
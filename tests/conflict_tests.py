@@ -0,0 +1,279 @@
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Gig, Musician, Tour
+
+class ConflictTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with a gig and a two week tour
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        self.gig = Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-06-30", gig_pay=100, mileage=52)
+        self.tour = Tour.objects.create(
+            musician_id=1, artist="Reyna Roberts", tour_departure_address="Kroger",
+            tour_description="Country Tour", number_of_gigs=10, per_diem=15,
+            travel_days=4, travel_day_pay=50, date_start="2021-09-01",
+            date_end="2021-09-14", tour_gig_pay=100, mileage=15)
+
+    def gig_data(self, day):
+        return {
+            "artist": "Reyna Roberts",
+            "locationName": "The Barnyard",
+            "locationAddress": "Sharpsburg, KY",
+            "gigDescription": "Country Show",
+            "date": day,
+            "gigPay": 200,
+            "mileage": 10
+        }
+
+    def tour_data(self, start, end):
+        return {
+            "artist": "Syndrome of Fire",
+            "tourDepartureAddress": "Kroger",
+            "tourDescription": "Rock Tour",
+            "numberOfGigs": 5,
+            "perDiem": 15,
+            "travelDays": 2,
+            "travelDayPay": 50,
+            "dateStart": start,
+            "dateEnd": end,
+            "tourGigPay": 100,
+            "mileage": 15
+        }
+
+    def test_gig_on_a_booked_date_conflicts(self):
+        """
+        Ensure a gig on the same date as a gig, or during a tour, is a 409
+        """
+        response = self.client.post("/gigs", self.gig_data("2021-06-30"), format='json')
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(json_response["conflicts"], [{
+            "type": "gig", "id": self.gig.id, "date": "2021-06-30", "end": "2021-06-30",
+            "title": "Syndrome of Fire"}])
+
+        response = self.client.post("/gigs", self.gig_data("2021-09-14"), format='json')
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual([(c["type"], c["id"]) for c in json_response["conflicts"]], [("tour", self.tour.id)])
+        self.assertEqual(Gig.objects.count(), 1)
+
+        response = self.client.post("/gigs", self.gig_data("2021-09-15"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_allow_conflicts_books_anyway(self):
+        """
+        Ensure ?allow_conflicts=true saves a clashing gig
+        """
+        response = self.client.post("/gigs?allow_conflicts=true", self.gig_data("2021-06-30"), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Gig.objects.filter(date="2021-06-30").count(), 2)
+
+    def test_tour_overlaps_conflict(self):
+        """
+        Ensure a tour overlapping a tour or containing a gig is a 409
+        """
+        response = self.client.post("/tours", self.tour_data("2021-09-10", "2021-09-20"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.post("/tours", self.tour_data("2021-06-25", "2021-07-02"), format='json')
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual([(c["type"], c["id"]) for c in json_response["conflicts"]], [("gig", self.gig.id)])
+
+        response = self.client.post("/tours", self.tour_data("2021-07-01", "2021-07-05"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_updates_check_conflicts(self):
+        """
+        Ensure PUT and PATCH refuse to move a booking onto another, but not onto itself
+        """
+        response = self.client.put(f"/gigs/{self.gig.id}", self.gig_data("2021-06-30"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.put(f"/gigs/{self.gig.id}", self.gig_data("2021-09-05"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.patch(f"/gigs/{self.gig.id}", {"date": "2021-09-01"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # Only the end moves, onto the gig moved to 2021-09-20
+        Gig.objects.filter(pk=self.gig.id).update(date="2021-09-20")
+        response = self.client.patch(f"/tours/{self.tour.id}", {"dateEnd": "2021-09-21"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.patch(f"/tours/{self.tour.id}", {"dateEnd": "2021-09-16"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_bulk_create_checks_conflicts(self):
+        """
+        Ensure POST /gigs/bulk and /tours/bulk refuse items that clash with
+        stored bookings or with each other, unless ?allow_conflicts=true
+        """
+        response = self.client.post(
+            "/gigs/bulk", [self.gig_data("2021-07-04"), self.gig_data("2021-09-05")], format='json')
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            [(item["index"], [(c["type"], c["id"]) for c in item["conflicts"]]) for item in json_response["conflicts"]],
+            [(1, [("tour", self.tour.id)])])
+        self.assertEqual(Gig.objects.count(), 1)
+
+        response = self.client.post(
+            "/gigs/bulk", [self.gig_data("2021-07-04"), self.gig_data("2021-07-04")], format='json')
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual([item["index"] for item in json_response["conflicts"]], [0, 1])
+        self.assertEqual(json_response["conflicts"][0]["conflicts"][0]["index"], 1)
+
+        response = self.client.post(
+            "/tours/bulk", [self.tour_data("2021-10-01", "2021-10-10"), self.tour_data("2021-10-08", "2021-10-12"),
+                            self.tour_data("2021-06-29", "2021-07-01")], format='json')
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            [(item["index"], [(c["type"], c["id"], c.get("index")) for c in item["conflicts"]])
+             for item in json_response["conflicts"]],
+            [(0, [("tour", None, 1)]), (1, [("tour", None, 0)]), (2, [("gig", self.gig.id, None)])])
+        self.assertEqual(Tour.objects.count(), 1)
+
+        response = self.client.post(
+            "/gigs/bulk?allow_conflicts=true", [self.gig_data("2021-07-04"), self.gig_data("2021-09-05")],
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Gig.objects.count(), 3)
+
+    def test_bulk_update_checks_conflicts(self):
+        """
+        Ensure PATCH /gigs/bulk and /tours/bulk refuse new dates that clash,
+        but not with the old dates of the bookings being moved
+        """
+        other = Gig.objects.create(
+            musician_id=1, artist="Reyna Roberts", location_name="The Barnyard",
+            location_address="Sharpsburg, KY", gig_description="Country Show",
+            date="2021-07-04", gig_pay=200, mileage=10)
+
+        response = self.client.patch(
+            "/gigs/bulk", {"ids": [self.gig.id], "date": "2021-09-03"}, format='json')
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(json_response["conflicts"][0]["id"], self.gig.id)
+        self.assertEqual([(c["type"], c["id"]) for c in json_response["conflicts"][0]["conflicts"]],
+                         [("tour", self.tour.id)])
+
+        # Both gigs would land on one date
+        response = self.client.patch(
+            "/gigs/bulk", {"ids": [self.gig.id, other.id], "date": "2021-08-01"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.patch(
+            "/gigs/bulk", {"ids": [self.gig.id], "date": "2021-07-04"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.patch(
+            "/gigs/bulk", {"ids": [self.gig.id], "date": "2021-06-29"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(
+            "/tours/bulk", {"ids": [self.tour.id], "dateStart": "2021-07-01"}, format='json')
+        json_response = json.loads(response.content)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual([(c["type"], c["id"]) for c in json_response["conflicts"][0]["conflicts"]],
+                         [("gig", other.id)])
+
+        response = self.client.patch(
+            "/tours/bulk", {"ids": [self.tour.id], "dateStart": "2021-08-20"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(
+            "/tours/bulk?allow_conflicts=true", {"ids": [self.tour.id], "dateStart": "2021-07-01"},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(str(Tour.objects.get(pk=self.tour.id).date_start), "2021-07-01")
+
+    def test_long_tours_widen_the_check(self):
+        """
+        Ensure a gig late in a long tour is found, however early the tour started
+        """
+        self.assertEqual(Musician.objects.get(pk=1).longest_tour_days, 13)
+
+        response = self.client.post(
+            "/tours?allow_conflicts=true", self.tour_data("2021-01-01", "2021-12-31"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Musician.objects.get(pk=1).longest_tour_days, 364)
+
+        response = self.client.post("/gigs", self.gig_data("2021-11-30"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_conflict_report(self):
+        """
+        Ensure /conflicts lists every clashing pair in the year
+        """
+        Gig.objects.create(
+            musician_id=1, artist="Reyna Roberts", location_name="The Barnyard",
+            location_address="Sharpsburg, KY", gig_description="Country Show",
+            date="2021-06-30", gig_pay=200, mileage=10)
+        Gig.objects.create(
+            musician_id=1, artist="Reyna Roberts", location_name="The Barnyard",
+            location_address="Sharpsburg, KY", gig_description="Country Show",
+            date="2021-09-01", gig_pay=200, mileage=10)
+        Tour.objects.create(
+            musician_id=1, artist="Syndrome of Fire", tour_departure_address="Kroger",
+            tour_description="Rock Tour", number_of_gigs=5, per_diem=15,
+            travel_days=2, travel_day_pay=50, date_start="2020-12-20",
+            date_end="2021-01-05", tour_gig_pay=100, mileage=15)
+        Gig.objects.create(
+            musician_id=1, artist="Reyna Roberts", location_name="The Barnyard",
+            location_address="Sharpsburg, KY", gig_description="New Year Show",
+            date="2021-01-03", gig_pay=200, mileage=10)
+
+        response = self.client.get("/conflicts?year=2021")
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [((pair["first"]["type"], pair["first"]["date"]), (pair["second"]["type"], pair["second"]["date"]))
+             for pair in json_response["conflicts"]],
+            [(("tour", "2020-12-20"), ("gig", "2021-01-03")),
+             (("gig", "2021-06-30"), ("gig", "2021-06-30")),
+             (("tour", "2021-09-01"), ("gig", "2021-09-01"))])
+
+        response = self.client.get("/conflicts?year=next")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_first_years_do_not_overflow(self):
+        """
+        Ensure looking back a tour's length from year 1 stops at the first date
+        """
+        response = self.client.get("/conflicts?year=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["conflicts"], [])
+
+        response = self.client.post("/gigs", self.gig_data("0001-01-02"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post("/gigs/bulk", [self.gig_data("0001-01-03")], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,130 @@
+from decimal import Decimal
+from io import StringIO
+import json
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi import tax
+from gigtaxapi.models import Gig, QuarterlyEstimate, Receipt
+from gigtaxapi.tax import engine
+
+class EstimateTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with a gig and a receipt in the first quarter
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2024-02-10", gig_pay=10000, mileage=100)
+        Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Double Bass Pedal", date="2024-03-01", price=1000,
+            receipt_number="333")
+
+    def test_annual_tax(self):
+        """
+        Ensure self-employment and income tax follow the 2024 tables
+        """
+        table = tax.table_for(2024)
+
+        self.assertEqual(engine.self_employment_tax(Decimal('50000'), table, 'single'),
+                         (Decimal('7064.78'), Decimal('3532.39')))
+        self.assertEqual(engine.annual_tax(Decimal('50000'), table, 'single'),
+                         (Decimal('7064.78'), Decimal('3592.11')))
+        self.assertEqual(engine.annual_tax(Decimal('300'), table, 'single'), (Decimal('0.00'), Decimal('0.00')))
+        self.assertEqual(tax.table_for(1999)["year"], 2023)
+
+    def test_get_estimates(self):
+        """
+        Ensure /estimates annualizes the profit so far for each quarter
+        """
+        response = self.client.get("/estimates?year=2024")
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response["tables"], "2024.1")
+        first, second, _, fourth = json_response["quarters"]
+        self.assertEqual(first["period_end"], "2024-03-31")
+        self.assertEqual(first["due_date"], "2024-04-15")
+        self.assertEqual(fourth["due_date"], "2025-01-15")
+        self.assertEqual(first["income"], "10000.00")
+        self.assertEqual(first["expenses"], "1000.00")
+        self.assertEqual(first["mileage_deduction"], "67.00")
+        self.assertEqual(first["net_profit"], "8933.00")
+        self.assertEqual(first["annualized_profit"], "35732.00")
+        self.assertEqual(second["income"], "0.00")
+        self.assertEqual(second["annualized_profit"], "21439.20")
+
+        se_tax, income_tax = engine.annual_tax(Decimal("35732.00"), tax.table_for(2024), "single")
+        self.assertEqual(Decimal(first["installment"]), engine.money((se_tax + income_tax) * Decimal("0.225")))
+        self.assertEqual(
+            Decimal(json_response["total"]),
+            sum(Decimal(quarter["installment"]) for quarter in json_response["quarters"]))
+
+        response = self.client.get("/estimates?year=2024&filing_status=head")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_years_without_tables(self):
+        """
+        Ensure years the tax tables do not cover are refused, not worked out
+        """
+        for year in (9999, 1, 2022, 2028):
+            response = self.client.get(f"/estimates?year={year}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(json.loads(response.content)["message"], "year must be between 2023 and 2027")
+
+        self.assertEqual(self.client.get("/estimates?year=2027").status_code, status.HTTP_200_OK)
+        with self.assertRaises(CommandError):
+            call_command("compute_estimates", year=9999, stdout=StringIO())
+
+    def test_unchanged_quarters_are_not_recomputed(self):
+        """
+        Ensure only the quarters from a changed month onwards are worked out again
+        """
+        _, recomputed = tax.refresh([1], 2024)
+        self.assertEqual(recomputed, 4)
+        _, recomputed = tax.refresh([1], 2024)
+        self.assertEqual(recomputed, 0)
+        before = dict(QuarterlyEstimate.objects.values_list("quarter", "computed_at"))
+
+        Receipt.objects.create(
+            musician_id=1, business_name="Sam Ash", business_address="Nashville, TN",
+            description="Strings", date="2024-07-04", price=50, receipt_number="444")
+        _, recomputed = tax.refresh([1], 2024)
+        after = dict(QuarterlyEstimate.objects.values_list("quarter", "computed_at"))
+
+        self.assertEqual(recomputed, 2)
+        self.assertEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+        self.assertNotEqual(after[3], before[3])
+        self.assertEqual(QuarterlyEstimate.objects.get(quarter=3).expenses, Decimal("50.00"))
+
+    def test_compute_estimates_command(self):
+        """
+        Ensure the command refreshes every musician with data in the year
+        """
+        out = StringIO()
+        call_command("compute_estimates", year=2024, stdout=out)
+        self.assertIn("Refreshed 1 musicians for 2024: 4 quarters recomputed, 0 unchanged", out.getvalue())
+
+        out = StringIO()
+        call_command("compute_estimates", year=2024, stdout=out)
+        self.assertIn("0 quarters recomputed, 4 unchanged", out.getvalue())
+        self.assertEqual(QuarterlyEstimate.objects.filter(musician_id=1, year=2024).count(), 4)
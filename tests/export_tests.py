@@ -0,0 +1,83 @@
+import csv
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Category, Gig, Receipt, Tour
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with a gig, tour and receipt
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        gear = Category.objects.create(label="Supplies (gear)")
+        Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-06-30", gig_pay=100, mileage=52)
+        Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Last year",
+            date="2020-06-30", gig_pay=100, mileage=52)
+        Tour.objects.create(
+            musician_id=1, artist="Reyna Roberts", tour_departure_address="Kroger",
+            tour_description="Country Tour", number_of_gigs=10, per_diem=15,
+            travel_days=4, travel_day_pay=50, date_start="2021-09-01",
+            date_end="2021-09-14", tour_gig_pay=100, mileage=15)
+        Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Double Bass Pedal", date="2021-07-01", price=379.99,
+            receipt_number="333", category_type=gear)
+
+    def test_export_csv(self):
+        """
+        Ensure the year is streamed as CSV with a header row.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/export?year=2021&format=csv")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        rows = list(csv.DictReader(lines))
+        self.assertEqual([row["type"] for row in rows], ["gig", "tour", "receipt"])
+        self.assertEqual(rows[1]["income"], "1200.00")
+        self.assertEqual(rows[1]["per_diem"], "210.00")
+        self.assertEqual(rows[2]["category"], "Supplies (gear)")
+
+    def test_export_jsonl(self):
+        """
+        Ensure ?format=jsonl streams one JSON object per line.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/export?year=2021&format=jsonl")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["date"], "2021-06-30")
+        self.assertEqual(rows[2]["expense"], "379.99")
+
+    def test_export_unrepresentable_year(self):
+        """
+        Ensure a year outside the date range is a 400, not a failed stream.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        for year in ("1000000", "0", "abc"):
+            response = self.client.get(f"/export?year={year}&format=csv")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(response.streaming)
@@ -0,0 +1,130 @@
+from decimal import Decimal
+import io
+import json
+from datetime import date
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Gig, Receipt, Tour
+from gigtaxapi.parsers import FastJSONParser
+from gigtaxapi.renderers import FastJSONRenderer
+from gigtaxapi.views.gig import GigSerializer
+from gigtaxapi.views.receipt import ReceiptSerializer
+from gigtaxapi.views.tour import TourSerializer
+
+
+class FastReadTests(APITestCase):
+    def setUp(self):
+        """
+        Create a musician with a gig, a tour and a receipt
+        """
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "phone_number": "555-1212",
+            "first_name": "Steve",
+            "last_name": "Brownlee",
+            "bio": "Love those gigz!!"
+        }
+        response = self.client.post("/register", data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        Gig.objects.create(
+            musician_id=1, artist="Sigur Rós", location_name="Café Bar",
+            location_address="Nashville, TN", gig_description="Late \"set\"",
+            date="2021-07-08", gig_pay=Decimal("1234.50"), mileage=0)
+        Gig.objects.create(
+            musician_id=1, artist="Reyna Roberts", location_name="The Barnyard",
+            location_address="Sharpsburg, KY", gig_description="Country Show",
+            date="2021-07-09", gig_pay=Decimal("0.07"), mileage=10)
+        Tour.objects.create(
+            musician_id=1, artist="Syndrome of Fire", tour_departure_address="Kroger",
+            tour_description="Rock Tour", number_of_gigs=10, per_diem=Decimal("15.25"),
+            travel_days=4, travel_day_pay=50, date_start="2017-09-01", date_end="2017-09-14",
+            tour_gig_pay=100, mileage=15)
+        Receipt.objects.create(
+            musician_id=1, business_name="Mars Music", business_address="5555 Telegraph Road",
+            description="Tama Rockstar", date="2003-07-01", price=Decimal("599.99"),
+            receipt_number="121212121", category_type_id=None)
+
+    def assert_same_as_serializer(self, url, model, serializer_class, fields=None):
+        """The list page is byte-for-byte what the serializer would have sent"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        request = response.wsgi_request
+        request.query_params = request.GET
+        serializer = serializer_class(
+            model.objects.order_by(*model_ordering(model)), many=True, context={'request': request})
+        expected = serializer.data
+        if fields:
+            self.assertEqual(list(expected[0]), fields)
+
+        self.assertEqual(
+            JSONRenderer().render(json.loads(response.content)["results"]),
+            JSONRenderer().render(expected))
+
+    def test_gig_list_matches_serializer(self):
+        """
+        Ensure gig list pages read as values rows match GigSerializer's output
+        """
+        self.assert_same_as_serializer("/gigs", Gig, GigSerializer)
+        self.assert_same_as_serializer(
+            "/gigs?fields=id,gig_pay,date", Gig, GigSerializer, fields=["id", "date", "gig_pay"])
+
+    def test_tour_and_receipt_lists_match_serializer(self):
+        """
+        Ensure tour and receipt list pages read as values rows match their serializers
+        """
+        self.assert_same_as_serializer("/tours", Tour, TourSerializer)
+        self.assert_same_as_serializer("/receipts", Receipt, ReceiptSerializer)
+        self.assert_same_as_serializer(
+            "/receipts?fields=price,category_type_id", Receipt, ReceiptSerializer,
+            fields=["price", "category_type_id"])
+
+    def test_expanded_list_uses_serializer(self):
+        """
+        Ensure ?expand= still nests the related objects
+        """
+        response = self.client.get("/gigs?expand=musician")
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_response["results"][0]["musician"]["id"], 1)
+
+    def test_fast_renderer_matches_json_renderer(self):
+        """
+        Ensure FastJSONRenderer writes the same JSON as DRF's JSONRenderer,
+        byte for byte apart from the spelling of floats
+        """
+        data = {
+            "price": Decimal("12.30"),
+            "date": date(2021, 7, 8),
+            "name": "Café Bar\u2028",
+            "nested": [1, None, True, {"key": "value"}],
+            "big": 2 ** 70,
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        # e.g. a small search rank: orjson writes 1e-6 where the stdlib writes 1e-06
+        floats = {"rank": 1e-06, "pay": 2.5, "large": 1e20}
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(floats)), json.loads(JSONRenderer().render(floats)))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_fast_parser(self):
+        """
+        Ensure FastJSONParser reads JSON bodies like DRF's JSONParser
+        """
+        body = '{"artist": "Sigur Rós", "gigPay": 12.5, "ids": [1, 2]}'.encode()
+        parsed = FastJSONParser().parse(io.BytesIO(body))
+
+        self.assertEqual(parsed, {"artist": "Sigur Rós", "gigPay": 12.5, "ids": [1, 2]})
+
+
+def model_ordering(model):
+    return ('date_start', 'id') if model is Tour else ('date', 'id')
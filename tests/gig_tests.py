@@ -1,8 +1,12 @@
+from base64 import b64encode
+from decimal import Decimal
 import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from gigtaxapi.models import Gig, Musician
+from gigtaxapi.models import Gig, MonthlyRollup, Musician
 
 class GigTests(APITestCase):
     def setUp(self):
@@ -64,7 +68,7 @@ class GigTests(APITestCase):
         self.assertEqual(json_response["location_address"], data['locationAddress'])
         self.assertEqual(json_response["gig_description"], data['gigDescription'])
         self.assertEqual(json_response["date"], data['date'])
-        self.assertEqual(json_response["gig_pay"], data['gigPay'])
+        self.assertEqual(Decimal(json_response["gig_pay"]), Decimal(str(data['gigPay'])))
         self.assertEqual(json_response["mileage"], data['mileage'])
         
 
@@ -101,7 +105,7 @@ class GigTests(APITestCase):
         self.assertEqual(json_response["location_address"], gig.location_address)
         self.assertEqual(json_response["gig_description"], gig.gig_description)
         self.assertEqual(json_response["date"], gig.date)
-        self.assertEqual(json_response["gig_pay"], gig.gig_pay)
+        self.assertEqual(Decimal(json_response["gig_pay"]), Decimal(str(gig.gig_pay)))
         self.assertEqual(json_response["mileage"], gig.mileage)
 
     def test_change_gig(self):
@@ -146,7 +150,7 @@ class GigTests(APITestCase):
         self.assertEqual(json_response["location_address"], data['locationAddress'])
         self.assertEqual(json_response["gig_description"], data['gigDescription'])
         self.assertEqual(json_response["date"], data['date'])
-        self.assertEqual(json_response["gig_pay"], data['gigPay'])
+        self.assertEqual(Decimal(json_response["gig_pay"]), Decimal(str(data['gigPay'])))
         self.assertEqual(json_response["mileage"], data['mileage'])
         
 
@@ -171,4 +175,306 @@ class GigTests(APITestCase):
 
         # GET GIG AGAIN TO VERIFY 404 response
         response = self.client.get(f"/gigs/{gig.id}")
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_gig_pay_must_be_a_finite_amount(self):
+        """
+        Ensure NaN and Infinity are refused with 400 by POST and PUT.
+        """
+        data = {
+            "artist": "Reyna Roberts",
+            "locationName": "The Barnyard",
+            "locationAddress": "Sharpsburg, KY",
+            "gigDescription": "Country Show",
+            "date": "2021-07-08",
+            "gigPay": "NaN",
+            "mileage": 10
+        }
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        for amount in ("NaN", "Infinity", "-inf"):
+            data["gigPay"] = amount
+            response = self.client.post("/gigs", data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, amount)
+            self.assertEqual(json.loads(response.content)["reason"], f"“{amount}” value must be an amount of money.")
+        self.assertFalse(Gig.objects.exists())
+
+        gig = Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-07-08", gig_pay=100, mileage=52)
+        data["gigPay"] = "NaN"
+        response = self.client.put(f"/gigs/{gig.id}", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        gig.refresh_from_db()
+        self.assertEqual((gig.artist, gig.gig_pay), ("Syndrome of Fire", Decimal("100.00")))
+        self.assertEqual(MonthlyRollup.objects.get(musician_id=1).gig_income, Decimal("100.00"))
+
+    def test_list_gigs_paginates_by_date(self):
+        """
+        Ensure the gig list pages through gigs in (date, id) order.
+        """
+        for day in [5, 3, 3, 1, 4, 2, 2]:
+            gig = Gig()
+            gig.musician_id = 1
+            gig.artist = "Syndrome of Fire"
+            gig.location_name = "Exit In"
+            gig.location_address = "Nashville,TN"
+            gig.gig_description = "Rock Show"
+            gig.date = f"2017-06-0{day}"
+            gig.gig_pay = 100
+            gig.mileage = 52
+            gig.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        # Walk forward through every page
+        seen = []
+        pages = []
+        url = "/gigs?page_size=3"
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            json_response = json.loads(response.content)
+            pages.append(json_response)
+            seen.extend(json_response["results"])
+            url = json_response["next"]
+
+        expected = sorted(Gig.objects.values_list("date", "id"))
+        self.assertEqual(
+            [(gig["date"], gig["id"]) for gig in seen],
+            [(date.isoformat(), pk) for date, pk in expected])
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        # Step back from the last page
+        response = self.client.get(pages[-1]["previous"])
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["results"], pages[1]["results"])
+
+    def test_list_gigs_rejects_tampered_cursors(self):
+        """
+        Ensure a cursor whose position does not fit (date, id) is a 404, not a 500.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        for position in (["abc", 1], [{"a": 1}, 1], [None, 1], ["2017-06-01", "x"], ["2017-06-01", 10 ** 30]):
+            cursor = b64encode(json.dumps({"p": position}).encode()).decode()
+            response = self.client.get("/gigs", {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+            self.assertEqual(json.loads(response.content)["detail"], "Invalid cursor")
+
+    def test_list_gigs_expands_musician_in_one_query(self):
+        """
+        Ensure gigs are flat by default and ?expand=musician joins the musician.
+        """
+        for day in range(1, 6):
+            gig = Gig()
+            gig.musician_id = 1
+            gig.artist = "Syndrome of Fire"
+            gig.location_name = "Exit In"
+            gig.location_address = "Nashville,TN"
+            gig.gig_description = "Rock Show"
+            gig.date = f"2017-06-0{day}"
+            gig.gig_pay = 100
+            gig.mileage = 52
+            gig.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        response = self.client.get("/gigs")
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["results"][0]["musician_id"], 1)
+        self.assertNotIn("musician", json_response["results"][0])
+
+        # The token is cached by now, leaving one query for the joined page
+        with self.assertNumQueries(1):
+            response = self.client.get("/gigs?expand=musician")
+        json_response = json.loads(response.content)
+        musician = json_response["results"][0]["musician"]
+        self.assertEqual(musician["user"]["username"], "steve")
+        self.assertNotIn("password", musician["user"])
+        self.assertNotIn("musician_id", json_response["results"][0])
+
+    def test_bulk_create_gigs(self):
+        """
+        Ensure a JSON array of gigs is created in one request.
+        """
+        data = [
+            {
+                "artist": "Reyna Roberts",
+                "locationName": "The Barnyard",
+                "locationAddress": "Sharpsburg, KY",
+                "gigDescription": "Country Show",
+                "date": f"2021-07-0{day}",
+                "gigPay": 200,
+                "mileage": 10
+            }
+            for day in range(1, 6)
+        ]
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.post("/gigs/bulk", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        json_response = json.loads(response.content)
+        self.assertEqual([gig["date"] for gig in json_response], [item["date"] for item in data])
+        self.assertEqual(Gig.objects.filter(musician_id=1).count(), 5)
+
+    def test_bulk_create_gigs_reports_errors_by_index(self):
+        """
+        Ensure an invalid item rejects the whole batch and is reported by index.
+        """
+        data = [
+            {
+                "artist": "Reyna Roberts",
+                "locationName": "The Barnyard",
+                "locationAddress": "Sharpsburg, KY",
+                "gigDescription": "Country Show",
+                "date": "2021-07-01",
+                "gigPay": 200,
+                "mileage": 10
+            },
+            {
+                "artist": "Reyna Roberts",
+                "locationName": "The Barnyard",
+                "locationAddress": "Sharpsburg, KY",
+                "gigDescription": "Country Show",
+                "date": "someday",
+                "gigPay": 200
+            }
+        ]
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.post("/gigs/bulk", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        json_response = json.loads(response.content)
+        self.assertEqual(len(json_response["errors"]), 1)
+        self.assertEqual(json_response["errors"][0]["index"], 1)
+        self.assertEqual(set(json_response["errors"][0]["errors"]), {"date", "mileage"})
+        self.assertFalse(Gig.objects.exists())
+
+    def test_gigs_of_other_musicians_are_not_found(self):
+        """
+        Ensure another musician's gig cannot be read, changed or deleted.
+        """
+        other = User.objects.create_user(username="reyna", password="Admin8*")
+        other_musician = Musician.objects.create(
+            user=other, address="1 Main St")
+
+        gig = Gig.objects.create(
+            musician=other_musician, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2017-06-30", gig_pay=100, mileage=52)
+
+        data = {
+            "artist": "Mike Gordon",
+            "locationName": "The Ryman",
+            "locationAddress": "Nashville, TN",
+            "gigDescription": "Wedding Gig",
+            "date": "2017-06-29",
+            "gigPay": 500,
+            "mileage": 22
+        }
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.assertEqual(self.client.get(f"/gigs/{gig.id}").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.put(f"/gigs/{gig.id}", data, format="json").status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(f"/gigs/{gig.id}").status_code, status.HTTP_404_NOT_FOUND)
+
+        gig.refresh_from_db()
+        self.assertEqual(gig.artist, "Syndrome of Fire")
+        self.assertEqual(gig.musician_id, other_musician.id)
+
+    def test_list_gigs_not_modified_until_a_write(self):
+        """
+        Ensure a matching If-None-Match gets a 304 without querying gigs,
+        and that any write changes the ETag.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/gigs")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/gigs", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2017-06-30", gig_pay=100, mileage=52)
+
+        response = self.client.get("/gigs", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn("Last-Modified", response)
+
+    def test_expanded_gigs_etag_changes_with_the_profile(self):
+        """
+        Ensure editing the musician or their user changes the ETag, since
+        ?expand=musician embeds them.
+        """
+        Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2017-06-30", gig_pay=100, mileage=52)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        etag = self.client.get("/gigs?expand=musician")["ETag"]
+
+        user = User.objects.get(pk=1)
+        user.first_name = "Stephen"
+        user.save()
+        response = self.client.get("/gigs?expand=musician", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["results"][0]["musician"]["user"]["first_name"], "Stephen")
+        etag = response["ETag"]
+
+        musician = Musician.objects.get(pk=1)
+        musician.address = "1 Music Row"
+        musician.save()
+        response = self.client.get("/gigs?expand=musician", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["results"][0]["musician"]["address"], "1 Music Row")
+
+        # A login only stamps last_login, which no response shows
+        etag = response["ETag"]
+        user.save(update_fields=["last_login"])
+        response = self.client.get("/gigs?expand=musician", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_patch_gig_writes_only_sent_fields(self):
+        """
+        Ensure PATCH validates and writes just the fields sent, without
+        loading the gig unless its totals change. Changing a searchable
+        column only reads back what the search index needs.
+        """
+        gig = Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2017-06-30", gig_pay=100, mileage=52)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f"/gigs/{gig.id}", {"artist": "Mike Gordon"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        gig_queries = [query["sql"] for query in queries if "gigtaxapi_gig" in query["sql"]]
+        self.assertEqual(len(gig_queries), 2)
+        self.assertTrue(gig_queries[0].startswith("UPDATE"))
+        self.assertNotIn("gig_pay", gig_queries[1])
+
+        response = self.client.patch(f"/gigs/{gig.id}", {"gigPay": "125.50"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        gig.refresh_from_db()
+        self.assertEqual((gig.artist, gig.gig_pay, gig.location_name),
+                         ("Mike Gordon", Decimal("125.50"), "Exit In"))
+        self.assertEqual(MonthlyRollup.objects.get(musician_id=1).gig_income, Decimal("125.50"))
+
+        response = self.client.patch(f"/gigs/{gig.id}", {"mileage": "far"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.patch("/gigs/999", {"artist": "X"}, format="json").status_code,
+                         status.HTTP_404_NOT_FOUND)
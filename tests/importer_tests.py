@@ -0,0 +1,55 @@
+from decimal import Decimal
+import io
+from django.test import TestCase
+from gigtaxapi.importers import ImportRowError, SkipRow, parse_csv, parse_ofx
+
+class ImporterTests(TestCase):
+    def test_parse_ofx_sgml(self):
+        """
+        Ensure OFX 1.x transactions without closing tags are parsed lazily.
+        """
+        statement = io.StringIO(
+            "OFXHEADER:100\n"
+            "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20210701120000[-5:EST]<TRNAMT>-379.99\n"
+            "<FITID>9001<NAME>GUITAR CENTER<MEMO>Double bass pedal\n"
+            "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20210702<TRNAMT>1200.00<FITID>9002<NAME>PAYROLL\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+
+        rows = list(parse_ofx(statement))
+
+        self.assertEqual(len(rows), 2)
+        line, receipt = rows[0]
+        self.assertEqual(line, 3)
+        self.assertEqual(receipt["business_name"], "GUITAR CENTER")
+        self.assertEqual(receipt["description"], "Double bass pedal")
+        self.assertEqual(receipt["date"].isoformat(), "2021-07-01")
+        self.assertEqual(receipt["price"], Decimal("379.99"))
+        self.assertEqual(receipt["receipt_number"], "9001")
+        self.assertIsInstance(rows[1][1], SkipRow)
+
+    def test_parse_csv_debit_column(self):
+        """
+        Ensure statements with separate debit and credit columns are understood.
+        """
+        statement = io.StringIO(
+            "Posted Date,Payee,Debit,Credit\n"
+            "2021-07-01,Forks Drum Closet,60.00,\n"
+            "2021-07-02,Refund,,20.00\n"
+            "2021-07-03,,15.00,\n"
+            "2021-07-04,Sam Ash,NaN,\n"
+            "2021-07-05,Sam Ash,Infinity,\n"
+            "2021-07-06,Sam Ash,1e30,\n"
+            "2021-07-07,Sam Ash,100000000000000000000,\n"
+        )
+
+        rows = [row for _, row in parse_csv(statement)]
+
+        self.assertEqual(rows[0]["price"], Decimal("60.00"))
+        self.assertIsInstance(rows[1], SkipRow)
+        self.assertIsInstance(rows[2], ImportRowError)
+        self.assertIsInstance(rows[3], ImportRowError)
+        self.assertIsInstance(rows[4], ImportRowError)
+        self.assertIsInstance(rows[5], ImportRowError)
+        self.assertIsInstance(rows[6], ImportRowError)
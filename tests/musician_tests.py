@@ -0,0 +1,89 @@
+import json
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Musician
+from gigtaxapi.views.musician import prefix_filter
+
+class MusicianTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account and a few other musicians to look up
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        for username, email in [("Stella", "stella@example.com"), ("stan", "stan@example.com"),
+                                ("jo", "jo@stevebrownlee.com")]:
+            user = User.objects.create_user(
+                username=username, email=email, password="Admin8*", first_name=username.title())
+            Musician.objects.create(user=user, address="1 Elm St")
+
+    def usernames(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["username"] for row in json.loads(response.content)["results"]]
+
+    def test_lookup_by_username_prefix_and_exact_email(self):
+        """
+        Ensure ?q= matches username prefixes, ignoring case, and full emails,
+        and that the rows are slim.
+        """
+        self.assertEqual(self.usernames(self.client.get("/musicians?q=ST")), ["steve", "Stella", "stan"])
+        self.assertEqual(self.usernames(self.client.get("/musicians?q=STAN@example.com")), ["stan"])
+        self.assertEqual(self.usernames(self.client.get("/musicians?username=stella")), ["Stella"])
+        self.assertEqual(self.usernames(self.client.get("/musicians?email=jo@stevebrownlee.com")), ["jo"])
+
+        row = json.loads(self.client.get("/musicians?username=stan").content)["results"][0]
+        self.assertEqual(set(row), {"id", "username", "first_name", "last_name"})
+
+    def test_directory_is_limited_for_non_staff(self):
+        """
+        Ensure a musician can neither list everyone nor prefix-search emails.
+        """
+        self.assertEqual(self.usernames(self.client.get("/musicians")), ["steve"])
+        self.assertEqual(self.usernames(self.client.get("/musicians?q=jo@steve")), [])
+
+    def test_staff_page_through_everyone(self):
+        """
+        Ensure staff see every musician, with emails, a page at a time.
+        """
+        User.objects.filter(username="steve").update(is_staff=True)
+
+        response = self.client.get("/musicians?page_size=2")
+        json_response = json.loads(response.content)
+        self.assertEqual([row["username"] for row in json_response["results"]], ["steve", "Stella"])
+        self.assertEqual(json_response["results"][0]["email"], "steve@stevebrownlee.com")
+        self.assertEqual(self.usernames(self.client.get(json_response["next"])), ["stan", "jo"])
+
+        self.assertEqual(self.usernames(self.client.get("/musicians?q=jo@steve")), ["jo"])
+
+    def test_lookup_keys_follow_the_user(self):
+        """
+        Ensure renaming a user moves them in the directory.
+        """
+        user = User.objects.get(username="stan")
+        user.username = "Zed"
+        user.save()
+        self.assertEqual(self.usernames(self.client.get("/musicians?q=z")), ["Zed"])
+
+    def test_prefix_lookup_uses_an_index(self):
+        """
+        Ensure the prefix lookup is answered from the lookup key index.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("checks SQLite's query plan")
+        queryset = Musician.objects.filter(prefix_filter("username_key", "st"))
+        self.assertIn("musician_username_key_idx", queryset.explain())
@@ -1,8 +1,10 @@
+from decimal import Decimal
 import json
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from gigtaxapi.models import Receipt, Musician
+from gigtaxapi.models import Category, MonthlyExpenseRollup, Receipt, Musician
 
 class ReceiptTests(APITestCase):
     def setUp(self):
@@ -64,7 +66,7 @@ class ReceiptTests(APITestCase):
         self.assertEqual(json_response["business_address"], data['businessAddress'])
         self.assertEqual(json_response["description"], data['description'])
         self.assertEqual(json_response["date"], data['date'])
-        self.assertEqual(json_response["price"], data['price'])
+        self.assertEqual(Decimal(json_response["price"]), Decimal(str(data['price'])))
         self.assertEqual(json_response["receipt_number"], data['receiptNumber'])
 
     def test_get_receipt(self):
@@ -98,7 +100,7 @@ class ReceiptTests(APITestCase):
         self.assertEqual(json_response["business_address"], receipt.business_address)
         self.assertEqual(json_response["description"], receipt.description)
         self.assertEqual(json_response["date"], receipt.date)
-        self.assertEqual(json_response["price"], receipt.price)
+        self.assertEqual(Decimal(json_response["price"]), Decimal(str(receipt.price)))
         self.assertEqual(json_response["receipt_number"], receipt.receipt_number)
 
     def test_change_receipt(self):
@@ -140,7 +142,7 @@ class ReceiptTests(APITestCase):
         self.assertEqual(json_response["business_address"], data['businessAddress'])
         self.assertEqual(json_response["description"], data['description'])
         self.assertEqual(json_response["date"], data['date'])
-        self.assertEqual(json_response["price"], data['price'])
+        self.assertEqual(Decimal(json_response["price"]), Decimal(str(data['price'])))
         self.assertEqual(json_response["receipt_number"], data['receiptNumber'])
         
 
@@ -164,4 +166,157 @@ class ReceiptTests(APITestCase):
 
         # GET RECEIPT AGAIN TO VERIFY 404 response
         response = self.client.get(f"/receipts/{receipt.id}")
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_receipts_in_date_range(self):
+        """
+        Ensure ?start= and ?end= limit the receipts to an inclusive date range.
+        """
+        for date in ["2020-12-31", "2021-01-01", "2021-06-15", "2021-12-31", "2022-01-01"]:
+            receipt = Receipt()
+            receipt.musician_id = 1
+            receipt.business_name = "Mars Music"
+            receipt.business_address = "5555 Telegraph Road"
+            receipt.description = "Tama Rockstar Receipt"
+            receipt.date = date
+            receipt.price = 599.99
+            receipt.receipt_number = "121212121"
+            receipt.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        response = self.client.get("/receipts?start=2021-01-01&end=2021-12-31")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_response = json.loads(response.content)
+        self.assertEqual(
+            [receipt["date"] for receipt in json_response["results"]],
+            ["2021-01-01", "2021-06-15", "2021-12-31"])
+
+        response = self.client.get("/receipts?start=2021-13-01")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expanded_receipts_show_a_renamed_category(self):
+        """
+        Ensure cached ?expand=category_type pages are dropped when the label changes.
+        """
+        gear = Category.objects.create(label="Gear")
+        Receipt.objects.create(
+            musician_id=1, business_name="Mars Music", business_address="5555 Telegraph Road",
+            description="Tama Rockstar Receipt", date="2021-06-15", price=599.99,
+            receipt_number="121212121", category_type=gear)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        self.client.get("/receipts?expand=category_type")
+        response = self.client.get("/receipts?expand=category_type")
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        gear.label = "Instruments"
+        gear.save()
+
+        response = self.client.get("/receipts?expand=category_type")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(json.loads(response.content)["results"][0]["category_type"]["label"], "Instruments")
+
+    def test_bulk_create_receipts(self):
+        """
+        Ensure a JSON array of receipts is created and unknown categories are rejected.
+        """
+        category = Category.objects.create(label="Supplies (gear)")
+        data = [
+            {
+                "businessName": "Guitar Center",
+                "businessAddress": "29555 Northwestern Hwy, Southfield, MI, 48034",
+                "description": "Double Bass Pedal",
+                "date": "2021-07-01",
+                "price": 379.99,
+                "receiptNumber": "3331212121",
+                "categoryId": category.id
+            },
+            {
+                "businessName": "Forks Drum Closet",
+                "businessAddress": "308 Chestnut St,Nashville,TN,37210",
+                "description": "Drum sticks",
+                "date": "2021-06-05",
+                "price": 60,
+                "receiptNumber": "11121221"
+            }
+        ]
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        data[1]["categoryId"] = 999
+        response = self.client.post("/receipts/bulk", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        json_response = json.loads(response.content)
+        self.assertEqual([error["index"] for error in json_response["errors"]], [1])
+
+        del data[1]["categoryId"]
+        response = self.client.post("/receipts/bulk", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        json_response = json.loads(response.content)
+        self.assertEqual(
+            [receipt["category_type_id"] for receipt in json_response], [category.id, None])
+
+    def test_import_statement(self):
+        """
+        Ensure a CSV statement upload inserts purchases and reports skipped and failed rows.
+        """
+        statement = SimpleUploadedFile("statement.csv", (
+            "Date,Description,Amount,Reference\n"
+            "07/01/2021,GUITAR CENTER #123,-379.99,A1\n"
+            "07/02/2021,PAYROLL DEPOSIT,1200.00,A2\n"
+            "not a date,FORKS DRUM CLOSET,-60.00,A3\n"
+            "07/03/2021,FORKS DRUM CLOSET,-60.00,A4\n"
+            "07/04/2021,SAM ASH,-1e30,A5\n"
+        ).encode("utf-8"))
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.post("/receipts/import", {"file": statement}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        json_response = json.loads(response.content)
+        self.assertEqual(
+            (json_response["inserted"], json_response["skipped"], json_response["failed"]), (2, 1, 2))
+        self.assertEqual([error["line"] for error in json_response["errors"]], [4, 6])
+        self.assertEqual(
+            list(Receipt.objects.order_by("date").values_list("business_name", "price", "receipt_number")),
+            [("GUITAR CENTER #123", Decimal("379.99"), "A1"), ("FORKS DRUM CLOSET", Decimal("60.00"), "A4")])
+
+    def test_bulk_recategorize_and_delete_receipts(self):
+        """
+        Ensure many receipts can be recategorized and deleted in one request each.
+        """
+        gear = Category.objects.create(label="Supplies (gear)")
+        travel = Category.objects.create(label="Travel")
+        other = Musician.objects.create(
+            user=User.objects.create_user(username="reyna", password="Admin8*"), address="1 Main St")
+
+        receipts = [
+            Receipt.objects.create(
+                musician_id=musician_id, business_name="Guitar Center", business_address="Southfield, MI",
+                description="Strings", date="2021-07-01", price=price, receipt_number="333",
+                category_type=gear)
+            for musician_id, price in [(1, 10), (1, 20), (1, 30), (other.id, 40)]
+        ]
+        ids = [receipt.id for receipt in receipts]
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.patch(
+            "/receipts/bulk", {"ids": ids[1:], "categoryId": travel.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {"updated": 2})
+
+        self.assertEqual(
+            list(Receipt.objects.order_by("id").values_list("category_type_id", flat=True)),
+            [gear.id, travel.id, travel.id, gear.id])
+        totals = dict(MonthlyExpenseRollup.objects.filter(musician_id=1).values_list("category_type_id", "total"))
+        self.assertEqual(totals, {gear.id: Decimal("10.00"), travel.id: Decimal("50.00")})
+
+        response = self.client.delete(f"/receipts?ids={ids[0]},{ids[1]},{ids[3]}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {"deleted": 2})
+
+        self.assertEqual(list(Receipt.objects.order_by("id").values_list("id", flat=True)), [ids[2], ids[3]])
+        totals = dict(MonthlyExpenseRollup.objects.filter(musician_id=1).values_list("category_type_id", "total"))
+        self.assertEqual(totals[travel.id], Decimal("30.00"))
+        self.assertFalse(totals.get(gear.id))
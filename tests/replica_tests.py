@@ -0,0 +1,52 @@
+from datetime import timedelta
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from gigtaxapi.models import Gig, Musician
+from gigtaxapi.replicas import ReplicaRouter, choose_alias, reading_from
+
+@override_settings(GIGTAX_DB_ROUTING={'REPLICAS': ['replica1'], 'STICKY_SECONDS': 10})
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_follow_the_chosen_alias(self):
+        """
+        Ensure data reads go to the replica inside reading_from, and to the
+        primary outside it and for writes.
+        """
+        self.assertEqual(self.router.db_for_read(Gig), DEFAULT_DB_ALIAS)
+        with reading_from("replica1"):
+            self.assertEqual(self.router.db_for_read(Gig), "replica1")
+            self.assertEqual(self.router.db_for_write(Gig), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Gig), DEFAULT_DB_ALIAS)
+
+    def test_auth_and_musicians_stay_on_the_primary(self):
+        """
+        Ensure tokens and the musician's data version are never read from a replica.
+        """
+        with reading_from("replica1"):
+            self.assertEqual(self.router.db_for_read(Token), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Musician), DEFAULT_DB_ALIAS)
+
+    def test_recent_writes_are_sticky(self):
+        """
+        Ensure a musician who just wrote reads from the primary until the window passes.
+        """
+        now = timezone.now()
+        self.assertEqual(choose_alias(None), "replica1")
+        self.assertEqual(choose_alias(now - timedelta(seconds=2)), DEFAULT_DB_ALIAS)
+        self.assertEqual(choose_alias(now - timedelta(seconds=60)), "replica1")
+
+        with override_settings(GIGTAX_DB_ROUTING={'REPLICAS': []}):
+            self.assertEqual(choose_alias(None), DEFAULT_DB_ALIAS)
+
+
+class ReplicaTransactionTests(TestCase):
+    def test_transactions_read_the_primary(self):
+        """
+        Ensure reads inside a transaction see its writes.
+        """
+        with reading_from("replica1"):
+            self.assertEqual(ReplicaRouter().db_for_read(Gig), DEFAULT_DB_ALIAS)
@@ -0,0 +1,113 @@
+from decimal import Decimal
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Category, Gig, MonthlyExpenseRollup, MonthlyRollup, Receipt
+
+class RollupTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account and sample category
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.gear = Category.objects.create(label="Supplies (gear)")
+
+    def create_gig(self, date="2021-03-01", pay=100):
+        return Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date=date, gig_pay=pay, mileage=10)
+
+    def test_update_moves_totals_between_months(self):
+        """
+        Ensure changing a gig's date and pay moves its totals to the new month.
+        """
+        gig = self.create_gig()
+        self.create_gig(pay=50)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        data = {
+            "artist": "Reyna Roberts",
+            "locationName": "The Barnyard",
+            "locationAddress": "Sharpsburg, KY",
+            "gigDescription": "Country Show",
+            "date": "2021-07-08",
+            "gigPay": 200,
+            "mileage": 12
+        }
+        response = self.client.put(f"/gigs/{gig.id}", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        march = MonthlyRollup.objects.get(musician_id=1, year=2021, month=3)
+        july = MonthlyRollup.objects.get(musician_id=1, year=2021, month=7)
+        self.assertEqual((march.gig_count, march.gig_income, march.gig_mileage), (1, 50, 10))
+        self.assertEqual((july.gig_count, july.gig_income, july.gig_mileage), (1, 200, 12))
+
+        response = self.client.delete(f"/gigs/{gig.id}")
+        july.refresh_from_db()
+        self.assertEqual((july.gig_count, july.gig_income, july.gig_mileage), (0, 0, 0))
+
+    def test_deleting_category_folds_expenses(self):
+        """
+        Ensure receipts of a deleted category are rolled up as uncategorised.
+        """
+        Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Double Bass Pedal", date="2021-07-01", price=379.99,
+            receipt_number="333", category_type=self.gear)
+
+        self.gear.delete()
+
+        rollup = MonthlyExpenseRollup.objects.get(musician_id=1, year=2021, month=7)
+        self.assertIsNone(rollup.category_type_id)
+        self.assertEqual((rollup.count, rollup.total), (1, Decimal("379.99")))
+
+    def test_uncategorised_expenses_have_one_row_per_month(self):
+        """
+        Ensure a second uncategorised row for a month is refused, so a racing
+        first write falls back to updating the row the other one created.
+        """
+        Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Strings", date="2021-07-01", price=5, receipt_number="334")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MonthlyExpenseRollup.objects.create(musician_id=1, year=2021, month=7, count=1, total=5)
+
+        Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Picks", date="2021-07-02", price=2, receipt_number="335")
+        rollup = MonthlyExpenseRollup.objects.get(musician_id=1, year=2021, month=7)
+        self.assertEqual((rollup.count, rollup.total), (2, Decimal("7.00")))
+
+    def test_rebuild_rollups_command(self):
+        """
+        Ensure the management command rebuilds drifted rollups and verifies them.
+        """
+        self.create_gig()
+        MonthlyRollup.objects.update(gig_income=1)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", "--verify-only", stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+        self.assertIn("Rollups match", out.getvalue())
+        self.assertEqual(MonthlyRollup.objects.get(musician_id=1).gig_income, 100)
@@ -0,0 +1,105 @@
+import json
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Gig, Musician, Receipt, Tour
+from django.contrib.auth.models import User
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with a gig, tour and receipt to search
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        self.gig = Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="The Ryman",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-06-30", gig_pay=100, mileage=52)
+        self.tour = Tour.objects.create(
+            musician_id=1, artist="Reyna Roberts", tour_departure_address="Kroger",
+            tour_description="Country Tour with a Ryman stop", number_of_gigs=10, per_diem=15,
+            travel_days=4, travel_day_pay=50, date_start="2021-09-01",
+            date_end="2021-09-14", tour_gig_pay=100, mileage=15)
+        self.receipt = Receipt.objects.create(
+            musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+            description="Double Bass Pedal", date="2021-07-01", price=379.99,
+            receipt_number="333")
+
+    def search(self, query):
+        response = self.client.get("/search", {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)["results"]
+
+    def test_search_matches_word_prefixes(self):
+        """
+        Ensure every word must match, as a prefix, across gigs, tours and receipts.
+        """
+        results = self.search("rym")
+        self.assertEqual({(result["type"], result["record"]["id"]) for result in results},
+                         {("gig", self.gig.id), ("tour", self.tour.id)})
+
+        results = self.search("guitar cent")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["type"], "receipt")
+        self.assertEqual(results[0]["record"]["price"], "379.99")
+
+        self.assertEqual(self.search("guitar ryman"), [])
+
+    def test_index_follows_writes(self):
+        """
+        Ensure edits, bulk updates and deletes are reflected in the results.
+        """
+        self.client.patch(f"/gigs/{self.gig.id}", {"locationName": "Exit In"}, format='json')
+        self.assertEqual([result["type"] for result in self.search("ryman")], ["tour"])
+
+        self.client.patch("/receipts/bulk", {"ids": [self.receipt.id], "description": "Snare drum"}, format='json')
+        self.assertEqual(len(self.search("snare")), 1)
+
+        self.client.delete(f"/tours/{self.tour.id}")
+        self.assertEqual(self.search("ryman"), [])
+
+    def test_search_is_scoped_to_the_musician(self):
+        """
+        Ensure another musician's records never match.
+        """
+        user = User.objects.create_user(username="jo", password="Admin8*")
+        other = Musician.objects.create(user=user, address="1 Elm St")
+        Gig.objects.create(
+            musician=other, artist="Ryman Rockers", location_name="Ryman",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-06-30", gig_pay=100, mileage=52)
+
+        self.assertEqual(len(self.search("ryman")), 2)
+
+    def test_search_pages_and_rebuild(self):
+        """
+        Ensure results are paged with offset links and survive a rebuild.
+        """
+        response = self.client.get("/search", {"q": "ryman", "page_size": 1})
+        json_response = json.loads(response.content)
+        self.assertEqual(len(json_response["results"]), 1)
+        self.assertIn("offset=1", json_response["next"])
+
+        call_command("rebuild_search_index", stdout=open("/dev/null", "w"))
+        self.assertEqual(len(self.search("ryman")), 2)
+
+    def test_search_requires_a_word(self):
+        """
+        Ensure an empty query is a 400.
+        """
+        response = self.client.get("/search", {"q": " !! "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
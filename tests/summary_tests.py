@@ -0,0 +1,126 @@
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Category, Gig, Receipt, Tour
+
+class SummaryTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with a year of gigs, tours and receipts
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.gear = Category.objects.create(label="Supplies (gear)")
+
+        for date, pay, mileage in [("2021-03-01", 100, 10), ("2021-07-08", 250.5, 20), ("2020-12-31", 999, 99)]:
+            Gig.objects.create(
+                musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+                location_address="Nashville,TN", gig_description="Rock Show",
+                date=date, gig_pay=pay, mileage=mileage)
+
+        Tour.objects.create(
+            musician_id=1, artist="Reyna Roberts", tour_departure_address="Kroger",
+            tour_description="Country Tour", number_of_gigs=10, per_diem=15,
+            travel_days=4, travel_day_pay=50, date_start="2021-09-01",
+            date_end="2021-09-14", tour_gig_pay=100, mileage=15)
+
+        for price, category in [(379.99, self.gear), (20, self.gear), (5, None)]:
+            Receipt.objects.create(
+                musician_id=1, business_name="Guitar Center", business_address="Southfield, MI",
+                description="Double Bass Pedal", date="2021-07-01", price=price,
+                receipt_number="333", category_type=category)
+
+    def test_get_summary(self):
+        """
+        Ensure the summary totals a single tax year in a fixed number of queries.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        # The token and the data version (uncached after the writes above),
+        # then the income and expense rollups
+        with self.assertNumQueries(4):
+            response = self.client.get("/summary?year=2021")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["gig_income"], "350.50")
+        self.assertEqual(json_response["tour_income"], "1200.00")
+        self.assertEqual(json_response["per_diem"], "210.00")
+        self.assertEqual(json_response["mileage"], {"gigs": 30, "tours": 15, "total": 45})
+        self.assertEqual(json_response["total_expenses"], "404.99")
+        self.assertEqual(
+            {row["category_type_id"]: row["total"] for row in json_response["expenses"]},
+            {None: "5.00", self.gear.id: "399.99"})
+
+    def test_get_summary_rejects_bad_year(self):
+        """
+        Ensure a non-numeric year is a 400.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/summary?year=last")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary_served_from_cache_until_a_write(self):
+        """
+        Ensure a repeated summary is a cache hit and a write invalidates it.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/summary?year=2021")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/summary?year=2021")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(json.loads(response.content)["gig_count"], 2)
+
+        Gig.objects.create(
+            musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+            location_address="Nashville,TN", gig_description="Rock Show",
+            date="2021-11-11", gig_pay=50, mileage=5)
+
+        response = self.client.get("/summary?year=2021")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(json.loads(response.content)["gig_count"], 3)
+
+    def test_summary_etag_changes_when_a_category_is_renamed(self):
+        """
+        Ensure the ETag moves on when a label the summary shows changes.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.get("/summary?year=2021")
+        etag = response["ETag"]
+
+        self.gear.label = "Instruments"
+        self.gear.save()
+
+        response = self.client.get("/summary?year=2021", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn("Instruments", [row["label"] for row in json.loads(response.content)["expenses"]])
+
+    def test_cached_summary_misses_after_a_category_rename(self):
+        """
+        Ensure a renamed category is not served from the response cache.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.client.get("/summary?year=2021")
+        self.assertEqual(self.client.get("/summary?year=2021")["X-Cache"], "HIT")
+
+        self.gear.label = "Instruments"
+        self.gear.save()
+
+        response = self.client.get("/summary?year=2021")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("Instruments", [row["label"] for row in json.loads(response.content)["expenses"]])
@@ -0,0 +1,103 @@
+from base64 import b64encode
+import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from gigtaxapi.models import Gig, Tour
+
+class TimelineTests(APITestCase):
+    def setUp(self):
+        """
+        Create a new account with gigs and tours through the summer
+        """
+        url = "/register"
+        data = {
+            "username": "steve",
+            "password": "Admin8*",
+            "email": "steve@stevebrownlee.com",
+            "address": "100 Infinity Way",
+            "first_name": "Steve",
+            "last_name": "Brownlee"
+        }
+        response = self.client.post(url, data, format='json')
+        json_response = json.loads(response.content)
+        self.token = json_response["token"]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        for day in ("2021-05-30", "2021-06-10", "2021-06-10", "2021-07-04", "2021-08-20"):
+            Gig.objects.create(
+                musician_id=1, artist="Syndrome of Fire", location_name="Exit In",
+                location_address="Nashville,TN", gig_description="Rock Show",
+                date=day, gig_pay=100, mileage=52)
+        for start, end in (("2021-05-25", "2021-06-02"), ("2021-06-10", "2021-06-20"),
+                           ("2021-09-01", "2021-09-14")):
+            Tour.objects.create(
+                musician_id=1, artist="Reyna Roberts", tour_departure_address="Kroger",
+                tour_description="Country Tour", number_of_gigs=10, per_diem=15,
+                travel_days=4, travel_day_pay=50, date_start=start,
+                date_end=end, tour_gig_pay=100, mileage=15)
+
+    def test_timeline_merges_gigs_and_tours(self):
+        """
+        Ensure gigs and tours overlapping the range come back as one sorted list
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/timeline?start=2021-06-01&end=2021-08-31")
+        json_response = json.loads(response.content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(event["type"], event["date"]) for event in json_response["results"]],
+            [("tour", "2021-05-25"), ("gig", "2021-06-10"), ("gig", "2021-06-10"),
+             ("tour", "2021-06-10"), ("gig", "2021-07-04"), ("gig", "2021-08-20")])
+        self.assertEqual(json_response["results"][0], {
+            "type": "tour", "id": 1, "date": "2021-05-25", "end": "2021-06-02",
+            "title": "Reyna Roberts", "location": "Kroger", "pay": "1200.00"})
+        self.assertEqual(json_response["results"][1]["end"], "2021-06-10")
+        self.assertEqual(json_response["results"][1]["pay"], "100.00")
+
+        # The gigs and tours are read together
+        timeline_queries = [query["sql"] for query in queries.captured_queries if "UNION" in query["sql"]]
+        self.assertEqual(len(timeline_queries), 1)
+
+    def test_timeline_pages(self):
+        """
+        Ensure walking the next and previous links visits every event once
+        """
+        response = self.client.get("/timeline?page_size=3")
+        json_response = json.loads(response.content)
+        first_page = json_response["results"]
+        events = list(first_page)
+
+        while json_response["next"]:
+            response = self.client.get(json_response["next"])
+            json_response = json.loads(response.content)
+            events += json_response["results"]
+
+        self.assertEqual(len(events), 8)
+        self.assertEqual(events, sorted(events, key=lambda event: (event["date"], event["type"], event["id"])))
+
+        response = self.client.get(json_response["previous"])
+        self.assertEqual(json.loads(response.content)["results"], events[3:6])
+
+    def test_timeline_rejects_bad_dates(self):
+        """
+        Ensure a malformed date is a 400
+        """
+        response = self.client.get("/timeline?start=June")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timeline_rejects_tampered_cursors(self):
+        """
+        Ensure a cursor whose position does not fit (date, type, id) is a 404, not a 500
+        """
+        for position in (["abc", "gig", 1], [{"a": 1}, "gig", 1], [None, "gig", 1],
+                         ["2021-06-10", "gig", "x"], ["2021-06-10", None, 1],
+                         ["2021-06-10", "gig", 10 ** 30]):
+            cursor = b64encode(json.dumps({"p": position}).encode()).decode()
+            response = self.client.get("/timeline", {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+            self.assertEqual(json.loads(response.content)["detail"], "Invalid cursor")
@@ -1,4 +1,7 @@
+from decimal import Decimal
 import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
@@ -69,12 +72,12 @@ class TourTests(APITestCase):
         self.assertEqual(json_response["tour_departure_address"], data['tourDepartureAddress'])
         self.assertEqual(json_response["tour_description"], data['tourDescription'])
         self.assertEqual(json_response["number_of_gigs"], data['numberOfGigs'])
-        self.assertEqual(json_response["per_diem"], data['perDiem'])
+        self.assertEqual(Decimal(json_response["per_diem"]), Decimal(str(data['perDiem'])))
         self.assertEqual(json_response["travel_days"], data['travelDays'])
-        self.assertEqual(json_response["travel_day_pay"], data['travelDayPay'])
+        self.assertEqual(Decimal(json_response["travel_day_pay"]), Decimal(str(data['travelDayPay'])))
         self.assertEqual(json_response["date_start"], data['dateStart'])
         self.assertEqual(json_response["date_end"], data['dateEnd'])
-        self.assertEqual(json_response["tour_gig_pay"], data['tourGigPay'])
+        self.assertEqual(Decimal(json_response["tour_gig_pay"]), Decimal(str(data['tourGigPay'])))
         self.assertEqual(json_response["mileage"], data['mileage'])
         
 
@@ -114,12 +117,12 @@ class TourTests(APITestCase):
         self.assertEqual(json_response["tour_departure_address"], tour.tour_departure_address)
         self.assertEqual(json_response["tour_description"], tour.tour_description)
         self.assertEqual(json_response["number_of_gigs"], tour.number_of_gigs)
-        self.assertEqual(json_response["per_diem"], tour.per_diem)
+        self.assertEqual(Decimal(json_response["per_diem"]), Decimal(str(tour.per_diem)))
         self.assertEqual(json_response["travel_days"], tour.travel_days)
-        self.assertEqual(json_response["travel_day_pay"], tour.travel_day_pay)
+        self.assertEqual(Decimal(json_response["travel_day_pay"]), Decimal(str(tour.travel_day_pay)))
         self.assertEqual(json_response["date_start"], tour.date_start)
         self.assertEqual(json_response["date_end"], tour.date_end)
-        self.assertEqual(json_response["tour_gig_pay"], tour.tour_gig_pay)
+        self.assertEqual(Decimal(json_response["tour_gig_pay"]), Decimal(str(tour.tour_gig_pay)))
         self.assertEqual(json_response["mileage"], tour.mileage)
 
     def test_change_tour(self):
@@ -171,15 +174,46 @@ class TourTests(APITestCase):
         self.assertEqual(json_response["tour_departure_address"], data['tourDepartureAddress'])
         self.assertEqual(json_response["tour_description"], data['tourDescription'])
         self.assertEqual(json_response["number_of_gigs"], data['numberOfGigs'])
-        self.assertEqual(json_response["per_diem"], data['perDiem'])
+        self.assertEqual(Decimal(json_response["per_diem"]), Decimal(str(data['perDiem'])))
         self.assertEqual(json_response["travel_days"], data['travelDays'])
-        self.assertEqual(json_response["travel_day_pay"], data['travelDayPay'])
+        self.assertEqual(Decimal(json_response["travel_day_pay"]), Decimal(str(data['travelDayPay'])))
         self.assertEqual(json_response["date_start"], data['dateStart'])
         self.assertEqual(json_response["date_end"], data['dateEnd'])
-        self.assertEqual(json_response["tour_gig_pay"], data['tourGigPay'])
+        self.assertEqual(Decimal(json_response["tour_gig_pay"]), Decimal(str(data['tourGigPay'])))
         self.assertEqual(json_response["mileage"], data['mileage'])
         
 
+    def test_change_tour_refuses_non_finite_amounts(self):
+        """
+        Ensure a NaN amount is refused with 400 and leaves the tour as it was.
+        """
+        tour = Tour.objects.create(
+            musician_id=1, artist="Syndrome of Fire", tour_departure_address="Kroger",
+            tour_description="Rock Tour", number_of_gigs=10, per_diem=15,
+            travel_days=4, travel_day_pay=50, date_start="2017-09-01",
+            date_end="2017-09-14", tour_gig_pay=100, mileage=15)
+        data = {
+            "artist": "Reyna Roberts",
+            "tourDepartureAddress": "Kroger",
+            "tourDescription": "Country Tour",
+            "numberOfGigs": 12,
+            "perDiem": "NaN",
+            "travelDays": 5,
+            "travelDayPay": 100,
+            "dateStart": "2021-07-01",
+            "dateEnd": "2021-07-17",
+            "tourGigPay": 200,
+            "mileage": 10
+        }
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        response = self.client.put(f"/tours/{tour.id}", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content)["reason"], "“NaN” value must be an amount of money.")
+
+        tour.refresh_from_db()
+        self.assertEqual((tour.artist, tour.per_diem), ("Syndrome of Fire", Decimal("15.00")))
+
     def test_delete_tour(self):
         """
         Ensure we can delete an existing tour.
@@ -205,4 +239,34 @@ class TourTests(APITestCase):
 
         # GET TOUR AGAIN TO VERIFY 404 response
         response = self.client.get(f"/tours/{tour.id}")
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_tours_sparse_fields(self):
+        """
+        Ensure ?fields= narrows both the payload and the columns selected.
+        """
+        tour = Tour()
+        tour.musician_id = 1
+        tour.artist = "Syndrome of Fire"
+        tour.tour_departure_address = "Kroger"
+        tour.tour_description = "Rock Tour"
+        tour.number_of_gigs = 10
+        tour.per_diem = 15
+        tour.travel_days = 4
+        tour.travel_day_pay = 50
+        tour.date_start = "2017-09-01"
+        tour.date_end = "2017-09-14"
+        tour.tour_gig_pay = 100
+        tour.mileage = 15
+        tour.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/tours?fields=id,date_end,tour_gig_pay")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        json_response = json.loads(response.content)
+        self.assertEqual(
+            json_response["results"], [{"id": tour.id, "date_end": "2017-09-14", "tour_gig_pay": "100.00"}])
+        self.assertNotIn("tour_description", queries[-1]["sql"])